@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+from importlib.util import find_spec
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -126,3 +128,59 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Cache (see api/caching.py). Point API_CACHE_URL at Redis or a Redis-compatible
+# server (e.g. redis://127.0.0.1:6379/2) to share the cache between processes.
+if os.environ.get('API_CACHE_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['API_CACHE_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'advanced-api',
+        }
+    }
+
+# Seconds a cached list response is kept
+API_CACHE_TIMEOUT = int(os.environ.get('API_CACHE_TIMEOUT', 300))
+
+# Seconds a worker trusts its cached table generations when the cache is
+# per-process (LocMemCache), since other workers' writes can't invalidate them
+API_GENERATION_TIMEOUT = 5
+
+# Per-request query/latency log (see instrumentation/metrics.py), when the
+# shared django-instrumentation package is installed (see its README)
+if find_spec('instrumentation'):
+    INSTALLED_APPS.append('instrumentation')
+    # First, so the other middleware is included in the request time
+    MIDDLEWARE.insert(0, 'instrumentation.middleware.InstrumentationMiddleware')
+INSTRUMENTATION_LOG_FILE = BASE_DIR / 'logs' / 'instrumentation.log'
+
+# Maximum number of books embedded per author by the author endpoints (None for all)
+API_AUTHOR_BOOKS_LIMIT = 50
+
+# Embed the books in author responses unless ?fields= leaves them out; when
+# False they are only embedded with ?expand=books or books in ?fields=
+API_EMBED_BOOKS_BY_DEFAULT = True
+
+# Maximum number of items accepted by one request to the bulk endpoints
+API_BULK_MAX_ITEMS = 10000
+
+# Write rate limits (see api/throttling.py): per user across all write
+# endpoints, and per user for each endpoint's throttle_scope
+REST_FRAMEWORK = {
+    'DEFAULT_THROTTLE_RATES': {
+        'writes': '120/min',
+        'book-writes': '60/min',
+        'author-writes': '60/min',
+    },
+}
+
+# Where the rate limit counters live: 'local' (this process) or 'cache'
+# (the default cache, shared between processes when it is Redis)
+API_THROTTLE_BACKEND = 'cache' if os.environ.get('API_CACHE_URL') else 'local'
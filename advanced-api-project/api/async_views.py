@@ -0,0 +1,116 @@
+"""
+Async-native read endpoints for the catalog, served alongside the DRF views
+under ``async/``.
+
+DRF views are synchronous, so under ASGI every request to them is handed to
+a worker thread. These are plain Django ``async def`` views that query with
+the async ORM (``aiterator``, ``aget``, ``acount``) and return the same JSON
+as the DRF list and detail views for GET requests. ``?fields=``,
+``?expand=`` and ``?books_limit=``, filtering, search and ordering reuse the
+DRF views' logic (it only builds the queryset), and the author list is
+paginated like AuthorPagination.
+"""
+import math
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.views.decorators.http import require_safe
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .models import Author, Book
+from .pagination import AuthorPagination
+from .serializers import author_representation, book_representation
+from .views import AuthorDetailView, AuthorListView, BookDetailView, BookListView
+
+
+def chunk_size():
+    return getattr(settings, 'API_EXPORT_CHUNK_SIZE', 2000)
+
+
+def not_found(model):
+    return JsonResponse({'detail': f'No {model._meta.object_name} matches the given query.'}, status=404)
+
+
+def read_view(view_class, request, **kwargs):
+    """A ``view_class`` instance for ``request``, for its fields and queryset; it does not dispatch."""
+    view = view_class(format_kwarg=None, args=(), kwargs=kwargs)
+    view.request = Request(request)
+    return view
+
+
+@require_safe
+async def book_list(request):
+    view = read_view(BookListView, request)
+    try:
+        # Rows of the requested fields, filtered, searched and ordered
+        books = view.filter_queryset(view.get_queryset())
+    except ValidationError as exc:
+        return JsonResponse(exc.detail, status=400, safe=False)
+    fields = view.get_fields()
+    rows = [book_representation(row, fields) async for row in books.aiterator(chunk_size=chunk_size())]
+    return JsonResponse(rows, safe=False)
+
+
+@require_safe
+async def book_detail(request, pk):
+    try:
+        fields = read_view(BookDetailView, request, pk=pk).get_fields()
+    except ValidationError as exc:
+        return JsonResponse(exc.detail, status=400)
+    try:
+        book = await Book.objects.values(*fields).aget(pk=pk)
+    except Book.DoesNotExist:
+        return not_found(Book)
+    return JsonResponse(book_representation(book, fields))
+
+
+@require_safe
+async def author_list(request):
+    view = read_view(AuthorListView, request)
+    try:
+        authors = view.get_queryset()
+    except ValidationError as exc:
+        return JsonResponse(exc.detail, status=400)
+    fields = view.get_fields()
+    paginator = AuthorPagination()
+    page_size = paginator.get_page_size(view.request)
+    try:
+        page = int(request.GET.get(paginator.page_query_param, 1))
+    except ValueError:
+        page = 0
+    count = await Author.objects.acount()
+    pages = max(math.ceil(count / page_size), 1)
+    if not 1 <= page <= pages:
+        return JsonResponse({'detail': 'Invalid page.'}, status=404)
+
+    start = (page - 1) * page_size
+    authors = authors[start:start + page_size]
+    url = request.build_absolute_uri()
+    previous = None
+    if page > 1:
+        previous = (replace_query_param(url, paginator.page_query_param, page - 1) if page > 2
+                    else remove_query_param(url, paginator.page_query_param))
+    return JsonResponse({
+        'count': count,
+        'next': replace_query_param(url, paginator.page_query_param, page + 1) if page < pages else None,
+        'previous': previous,
+        'results': [
+            author_representation(author, fields) async for author in authors.aiterator(chunk_size=page_size)
+        ],
+    })
+
+
+@require_safe
+async def author_detail(request, pk):
+    view = read_view(AuthorDetailView, request, pk=pk)
+    try:
+        authors = view.get_queryset()
+    except ValidationError as exc:
+        return JsonResponse(exc.detail, status=400)
+    try:
+        author = await authors.aget(pk=pk)
+    except Author.DoesNotExist:
+        return not_found(Author)
+    return JsonResponse(author_representation(author, view.get_fields()))
@@ -0,0 +1,75 @@
+"""
+Micro-benchmark for serializing the catalog list endpoints.
+
+``seed()`` scales up the fixtures of ``api/test_views.py`` (an author with a
+book published in 2020) to many authors with several books each, using bulk
+inserts. ``run()`` compares the ModelSerializers (BookSerializer,
+AuthorSerializer) with the read serializers the list views use for GET
+(BookReadSerializer on ``.values()`` rows, AuthorReadSerializer), both for
+serialization alone (rows loaded beforehand) and end to end (query plus
+serialization). Each measurement is the best of ``repeat`` runs, reported in
+rows per second.
+"""
+import time
+
+from django.conf import settings
+
+from .models import Author, Book
+from .serializers import (
+    BOOK_FIELDS, AuthorReadSerializer, AuthorSerializer, BookReadSerializer, BookSerializer,
+)
+
+
+def seed(authors=1000, books_per_author=10, batch_size=2000):
+    Author.objects.bulk_create(
+        [Author(name=f'Test Author {i:05d}') for i in range(authors)], batch_size=batch_size,
+    )
+    author_ids = Author.objects.values_list('pk', flat=True)
+    Book.objects.bulk_create(
+        [Book(title=f'Test Book {author_id}-{i}', publication_year=2020 - i % 50, author_id=author_id)
+         for author_id in author_ids for i in range(books_per_author)],
+        batch_size=batch_size,
+    )
+
+
+def _best(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def _result(rows, seconds):
+    return {'rows': rows, 'seconds': round(seconds, 4), 'rows_per_second': round(rows / seconds) if seconds else None}
+
+
+def run(repeat=3):
+    """{'<endpoint>.<serialize|end_to_end>.<model|read>': result} plus speedups."""
+    limit = getattr(settings, 'API_AUTHOR_BOOKS_LIMIT', 50)
+    books = Book.objects.order_by('title')
+    authors = Author.objects.order_by('name', 'pk').with_books(limit)
+
+    book_instances, book_rows, author_instances = list(books), list(books.values(*BOOK_FIELDS)), list(authors)
+    book_count = len(book_rows)
+    # Authors are counted with their nested books
+    author_count = len(author_instances) + sum(len(author.listed_books) for author in author_instances)
+
+    cases = {
+        'books.serialize.model': (book_count, lambda: BookSerializer(book_instances, many=True).data),
+        'books.serialize.read': (book_count, lambda: BookReadSerializer(book_rows, many=True).data),
+        'books.end_to_end.model': (book_count, lambda: BookSerializer(books.all(), many=True).data),
+        'books.end_to_end.read': (book_count, lambda: BookReadSerializer(books.values(*BOOK_FIELDS), many=True).data),
+        'authors.serialize.model': (author_count, lambda: AuthorSerializer(author_instances, many=True).data),
+        'authors.serialize.read': (author_count, lambda: AuthorReadSerializer(author_instances, many=True).data),
+        'authors.end_to_end.model': (author_count, lambda: AuthorSerializer(authors.all(), many=True).data),
+        'authors.end_to_end.read': (author_count, lambda: AuthorReadSerializer(authors.all(), many=True).data),
+    }
+    results = {name: _result(rows, _best(function, repeat)) for name, (rows, function) in cases.items()}
+    for name in list(results):
+        if name.endswith('.read'):
+            base = name[:-len('.read')]
+            model, read = results[f'{base}.model']['seconds'], results[name]['seconds']
+            results[f'{base}.speedup'] = round(model / read, 2) if read else None
+    return results
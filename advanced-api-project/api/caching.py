@@ -0,0 +1,97 @@
+"""
+Server-side cache for the list endpoints.
+
+Rendered responses are stored under keys that embed the *generation* of every
+table they read, i.e. the ``TableVersion`` counters, mirrored in the cache so
+a hit does not touch the database. Every ORM write bumps ``TableVersion`` and
+calls ``forget()``, which drops the cached generations; the next request
+reads the new ones and builds new keys, so stale entries are never read again
+and expire on their own.
+
+``forget()`` only reaches the processes that share the cache. With a
+per-process cache (LocMemCache, the default without API_CACHE_URL) other
+workers would keep their cached generations, and with them stale responses
+and ETags, so there generations expire after API_GENERATION_TIMEOUT seconds
+(default 5) and writes show up in other workers after at most that long.
+
+Query parameters are normalized before they become part of a key: sorted,
+empty values and values equal to the view's defaults dropped, so
+``?ordering=title&author_name=orwell`` and ``?author_name=orwell`` share one
+entry.
+"""
+import hashlib
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+
+def timeout():
+    return getattr(settings, 'API_CACHE_TIMEOUT', 300)
+
+
+def is_shared():
+    """Whether every process sees the same default cache (i.e. it is not local memory)."""
+    return not isinstance(caches['default'], LocMemCache)
+
+
+def generation_timeout():
+    """Seconds a cached generation is trusted: until forgotten when the cache is shared."""
+    if is_shared():
+        return None
+    return getattr(settings, 'API_GENERATION_TIMEOUT', 5)
+
+
+def _generation_key(table):
+    return f'api:generation:{table}'
+
+
+def generations(*model_classes):
+    """{table: generation} for the tables of ``model_classes``, from the cache when possible."""
+    tables = {model._meta.db_table: model for model in model_classes}
+    keys = {_generation_key(table): table for table in tables}
+    found = {keys[key]: version for key, version in cache.get_many(keys).items()}
+    missing = [model for table, model in tables.items() if table not in found]
+    if missing:
+        TableVersion = apps.get_model('api', 'TableVersion')
+        versions = TableVersion.objects.tokens(*missing)
+        cache.set_many(
+            {_generation_key(table): version for table, version in versions.items()}, timeout=generation_timeout()
+        )
+        found.update(versions)
+    return {table: found[table] for table in tables}
+
+
+def forget(*model_classes):
+    """
+    Drop the cached generations of ``model_classes``. Done again after the
+    commit, so a request that read the old generation in the meantime does
+    not keep it cached.
+    """
+    keys = [_generation_key(model._meta.db_table) for model in model_classes]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def normalize(query_params, defaults=None):
+    """
+    A canonical query string: parameters sorted, repeated values sorted,
+    and empty values or values equal to ``defaults`` ({name: value}) dropped.
+    """
+    defaults = defaults or {}
+    items = []
+    for name in sorted(query_params):
+        values = sorted(value for value in query_params.getlist(name) if value != '')
+        if not values or values == [defaults.get(name)]:
+            continue
+        items.extend((name, value) for value in values)
+    return '&'.join(f'{name}={value}' for name, value in items)
+
+
+def response_key(path, query, media_type, generations):
+    digest = hashlib.md5(
+        repr((path, query, media_type, sorted(generations.items()))).encode(), usedforsecurity=False
+    ).hexdigest()
+    return f'api:response:{digest}'
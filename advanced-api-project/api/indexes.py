@@ -0,0 +1,70 @@
+"""
+Indexes for the case-insensitive title and author name lookups, which plain
+b-tree indexes cannot serve.
+
+* SQLite: ``COLLATE NOCASE`` indexes. SQLite's LIKE is case-insensitive and
+  uses them for prefix patterns (``istartswith``, ``^`` search fields).
+  ``icontains`` ('%term%') still scans on SQLite.
+* PostgreSQL: pg_trgm GIN indexes on ``UPPER(column)``, the expression Django
+  uses for ``icontains``/``istartswith``, so both are index lookups.
+
+Other backends get a plain index on the column. TextSearchIndex is declared
+in the models' ``Meta.indexes``, so it is part of the model state and SQLite
+re-creates it whenever a migration rebuilds ``api_book`` or ``api_author``.
+
+``create_text_indexes``/``drop_text_indexes`` are the raw SQL indexes that
+migrations 0003 and 0004 created before, which 0005 replaces.
+"""
+from django.db import models
+from django.db.models.functions import Collate, Upper
+
+COLUMNS = [
+    ('api_book', 'title', 'api_book_title'),
+    ('api_author', 'name', 'api_author_name'),
+]
+
+
+class TextSearchIndex(models.Index):
+    """Index for case-insensitive lookups on one text field (``fields=[name]``), per backend as above."""
+
+    def create_sql(self, model, schema_editor, using='', **kwargs):
+        field_name = self.fields[0]
+        vendor = schema_editor.connection.vendor
+        if vendor == 'sqlite':
+            index = models.Index(Collate(field_name, 'NOCASE'), name=self.name)
+        elif vendor == 'postgresql':
+            # Needs psycopg, so only imported on PostgreSQL
+            from django.contrib.postgres.indexes import GinIndex, OpClass
+
+            index = GinIndex(OpClass(Upper(field_name), name='gin_trgm_ops'), name=self.name)
+        else:
+            return super().create_sql(model, schema_editor, using=using, **kwargs)
+        return index.create_sql(model, schema_editor, **kwargs)
+
+
+def create_text_indexes(schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for table, column, prefix in COLUMNS:
+            schema_editor.execute(
+                f'CREATE INDEX IF NOT EXISTS {prefix}_nocase_idx ON {table} ("{column}" COLLATE NOCASE)'
+            )
+    elif vendor == 'postgresql':
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for table, column, prefix in COLUMNS:
+            schema_editor.execute(
+                f'CREATE INDEX IF NOT EXISTS {prefix}_trgm_idx ON {table} '
+                f'USING gin (UPPER("{column}"::text) gin_trgm_ops)'
+            )
+
+
+def drop_text_indexes(schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        suffix = 'nocase_idx'
+    elif vendor == 'postgresql':
+        suffix = 'trgm_idx'
+    else:
+        return
+    for table, column, prefix in COLUMNS:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {prefix}_{suffix}')
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from api import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a separate test database and compare the serialization throughput of the '
+        'ModelSerializers with the read serializers used by the list endpoints.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--authors', type=int, default=1_000)
+        parser.add_argument('--books-per-author', type=int, default=10)
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement; the best one counts')
+        parser.add_argument('--keepdb', action='store_true',
+                            help='Keep the seeded test database and reuse it on the next run')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=not options['keepdb'], serialize=False, keepdb=options['keepdb'],
+        )
+        try:
+            with override_settings(INSTRUMENTATION_ENABLED=False):
+                if not benchmark.Book.objects.exists():
+                    self.stdout.write(
+                        f"Seeding {options['authors']} authors with {options['books_per_author']} books each..."
+                    )
+                    benchmark.seed(authors=options['authors'], books_per_author=options['books_per_author'])
+                results = benchmark.run(repeat=options['repeat'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        self.stdout.write(f"{'measurement':<28} {'rows':>8} {'seconds':>9} {'rows/s':>10}")
+        for name, result in results.items():
+            if name.endswith('.speedup'):
+                self.stdout.write(self.style.SUCCESS(f'{name:<28} {result}x'))
+            else:
+                self.stdout.write(
+                    f"{name:<28} {result['rows']:>8} {result['seconds']:>9.4f} {result['rows_per_second']:>10}"
+                )
@@ -0,0 +1,108 @@
+import http.client
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import Author, Book
+
+# endpoint: (sync path, async path)
+ENDPOINTS = {
+    'book-list': ('/api/books/', '/api/async/books/'),
+    'book-detail': ('/api/books/{book}/', '/api/async/books/{book}/'),
+    'author-list': ('/api/authors/', '/api/async/authors/'),
+    'author-detail': ('/api/authors/{author}/', '/api/async/authors/{author}/'),
+}
+
+
+def percentile(values, fraction):
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+class Client(threading.local):
+    """One keep-alive connection per worker thread."""
+
+    def __init__(self, host, port):
+        self.connection = http.client.HTTPConnection(host, port, timeout=30)
+
+    def get(self, path):
+        started = time.perf_counter()
+        try:
+            self.connection.request('GET', path)
+            response = self.connection.getresponse()
+            response.read()
+            ok = response.status == 200
+        except (OSError, http.client.HTTPException):
+            self.connection.close()
+            ok = False
+        return time.perf_counter() - started, ok
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the throughput of the sync (DRF) and async catalog endpoints under concurrent '
+        'clients. Start the server first, e.g. '
+        '`API_CACHE_TIMEOUT=0 uvicorn advanced_api_project.asgi:application --workers 1`; '
+        'the cache timeout of 0 keeps the sync list responses from being served from the cache.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 10, 50],
+                            help='Numbers of concurrent clients to measure')
+        parser.add_argument('--requests', type=int, default=1000, help='Requests per measurement')
+        parser.add_argument('--endpoint', choices=sorted(ENDPOINTS), nargs='+', default=sorted(ENDPOINTS))
+        parser.add_argument('--output', help='Also write the results as JSON to this file')
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['base_url'])
+        book = Book.objects.values_list('pk', flat=True).first()
+        author = Author.objects.values_list('pk', flat=True).first()
+        if book is None or author is None:
+            raise CommandError('The database needs at least one author and one book.')
+
+        results = []
+        self.stdout.write(
+            f"{'endpoint':<14} {'clients':>7} {'mode':<5} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'errors':>6}"
+        )
+        for endpoint in options['endpoint']:
+            for concurrency in options['concurrency']:
+                for mode, path in zip(('sync', 'async'), ENDPOINTS[endpoint]):
+                    path = url.path.rstrip('/') + path.format(book=book, author=author)
+                    result = self.measure(url.hostname, url.port or 80, path, concurrency, options['requests'])
+                    result.update(endpoint=endpoint, mode=mode, concurrency=concurrency)
+                    results.append(result)
+                    self.stdout.write(
+                        f"{endpoint:<14} {concurrency:>7} {mode:<5} {result['requests_per_second']:>9.1f} "
+                        f"{result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} {result['errors']:>6}"
+                    )
+                sync, async_ = results[-2:]
+                if sync['requests_per_second']:
+                    ratio = async_['requests_per_second'] / sync['requests_per_second']
+                    self.stdout.write(self.style.SUCCESS(f'{"":<14} {"":>7} async/sync {ratio:.2f}x'))
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(results, output, indent=2)
+                output.write('\n')
+
+    def measure(self, host, port, path, concurrency, requests):
+        client = Client(host, port)
+        # Warm up every connection before timing
+        with ThreadPoolExecutor(concurrency) as pool:
+            list(pool.map(lambda _: client.get(path), range(concurrency)))
+            started = time.perf_counter()
+            samples = list(pool.map(lambda _: client.get(path), range(requests)))
+            elapsed = time.perf_counter() - started
+        durations = sorted(duration * 1000 for duration, ok in samples)
+        return {
+            'requests': requests,
+            'requests_per_second': round(requests / elapsed, 1),
+            'p50_ms': round(statistics.median(durations), 2),
+            'p95_ms': round(percentile(durations, 0.95), 2),
+            'errors': sum(1 for duration, ok in samples if not ok),
+        }
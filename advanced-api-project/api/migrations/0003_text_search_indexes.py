@@ -0,0 +1,57 @@
+"""
+Indexes for the case-insensitive title and author name lookups, which plain
+b-tree indexes cannot serve.
+
+* SQLite: ``COLLATE NOCASE`` indexes. SQLite's LIKE is case-insensitive and
+  uses them for prefix patterns (``istartswith``, ``^`` search fields).
+  ``icontains`` ('%term%') still scans on SQLite.
+* PostgreSQL: pg_trgm GIN indexes on ``UPPER(column)``, the expression Django
+  uses for ``icontains``/``istartswith``, so both are index lookups.
+
+Other backends are left unchanged.
+"""
+from django.db import migrations
+
+COLUMNS = [
+    ('api_book', 'title', 'api_book_title'),
+    ('api_author', 'name', 'api_author_name'),
+]
+
+
+def create_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for table, column, prefix in COLUMNS:
+            schema_editor.execute(
+                f'CREATE INDEX IF NOT EXISTS {prefix}_nocase_idx ON {table} ("{column}" COLLATE NOCASE)'
+            )
+    elif vendor == 'postgresql':
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for table, column, prefix in COLUMNS:
+            schema_editor.execute(
+                f'CREATE INDEX IF NOT EXISTS {prefix}_trgm_idx ON {table} '
+                f'USING gin (UPPER("{column}"::text) gin_trgm_ops)'
+            )
+
+
+def drop_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        suffix = 'nocase_idx'
+    elif vendor == 'postgresql':
+        suffix = 'trgm_idx'
+    else:
+        return
+    for table, column, prefix in COLUMNS:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {prefix}_{suffix}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_book_author_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
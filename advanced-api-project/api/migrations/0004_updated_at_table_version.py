@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:56
+
+from django.db import migrations, models
+
+from api import indexes
+
+
+def create_table_versions(apps, schema_editor):
+    TableVersion = apps.get_model('api', 'TableVersion')
+    for model_name in ('Author', 'Book'):
+        TableVersion.objects.using(schema_editor.connection.alias).get_or_create(
+            table=apps.get_model('api', model_name)._meta.db_table
+        )
+
+
+def recreate_text_indexes(apps, schema_editor):
+    # Adding updated_at rebuilds the tables on SQLite, dropping these indexes
+    indexes.create_text_indexes(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_text_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TableVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('table', models.CharField(max_length=100, unique=True)),
+                ('version', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='author',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, help_text='Last change, used for ETags'),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, help_text='Last change, used for ETags'),
+        ),
+        migrations.RunPython(create_table_versions, migrations.RunPython.noop),
+        migrations.RunPython(recreate_text_indexes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:47
+
+import api.indexes
+from django.db import migrations
+
+from api import indexes
+
+
+def drop_raw_text_indexes(apps, schema_editor):
+    # Replaced by the TextSearchIndexes below, which are part of the model state
+    indexes.drop_text_indexes(schema_editor)
+
+
+def create_raw_text_indexes(apps, schema_editor):
+    indexes.create_text_indexes(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_updated_at_table_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_raw_text_indexes, create_raw_text_indexes),
+        migrations.AddIndex(
+            model_name='author',
+            index=api.indexes.TextSearchIndex(fields=['name'], name='api_author_name_text_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=api.indexes.TextSearchIndex(fields=['title'], name='api_book_title_text_idx'),
+        ),
+    ]
@@ -1,17 +1,107 @@
+from django.apps import apps
 from django.db import models
+from django.utils import timezone
 
-class Author(models.Model):
+from . import caching
+from .indexes import TextSearchIndex
+
+
+def bump_deleted(result):
+    # Model.delete() and QuerySet.delete() return (count, {model label: count}),
+    # covering cascaded rows too
+    deleted, per_model = result
+    TableVersion.objects.bump(*(apps.get_model(label) for label, count in per_model.items() if count))
+
+
+class VersionedQuerySet(models.QuerySet):
+    """
+    Bump the table version (see TableVersion) on the bulk writes that skip
+    save(), and stamp updated_at on the rows they change.
+    """
+    
+    def update(self, **kwargs):
+        kwargs.setdefault('updated_at', timezone.now())
+        rows = super().update(**kwargs)
+        if rows:
+            TableVersion.objects.bump(self.model)
+        return rows
+    
+    def delete(self):
+        result = super().delete()
+        bump_deleted(result)
+        return result
+    
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        if objs:
+            TableVersion.objects.bump(self.model)
+        return objs
+    
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        now = timezone.now()
+        for obj in objs:
+            obj.updated_at = now
+        rows = super().bulk_update(objs, [*fields, 'updated_at'], *args, **kwargs)
+        if rows:
+            TableVersion.objects.bump(self.model)
+        return rows
+
+class VersionedModel(models.Model):
+    """Bump the table version on every save() and delete()."""
+    
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        TableVersion.objects.bump(type(self))
+    
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        bump_deleted(result)
+        return result
+    
+    class Meta:
+        abstract = True
+
+class AuthorQuerySet(VersionedQuerySet):
+    def with_books(self, limit=None):
+        """
+        Prefetch each author's books in one query into ``prefetched_books``,
+        keeping at most ``limit`` books per author (newest first) when a
+        limit is given.
+        """
+        books = Book.objects.order_by('-publication_year', 'title', 'pk')
+        if limit:
+            books = books[:limit]
+        return self.prefetch_related(models.Prefetch('books', queryset=books, to_attr='prefetched_books'))
+
+class Author(VersionedModel):
     
     name = models.CharField(max_length=100, help_text="Full name of the author")
+    updated_at = models.DateTimeField(auto_now=True, help_text="Last change, used for ETags")
+    
+    objects = AuthorQuerySet.as_manager()
     
     def __str__(self):
         return self.name
     
+    @property
+    def listed_books(self):
+        # Prefer the books loaded by AuthorQuerySet.with_books()
+        if hasattr(self, 'prefetched_books'):
+            return self.prefetched_books
+        return self.books.all()
+    
     class Meta:
         verbose_name = "Author"
         verbose_name_plural = "Authors"
+        indexes = [
+            # Ordering authors and books by author name
+            models.Index(fields=['name'], name='api_author_name_idx'),
+            # Case-insensitive name lookups
+            TextSearchIndex(fields=['name'], name='api_author_name_text_idx'),
+        ]
 
-class Book(models.Model):
+class Book(VersionedModel):
     
     title = models.CharField(max_length=200, help_text="Title of the book")
     publication_year = models.IntegerField(help_text="Year the book was published")
@@ -21,6 +111,9 @@ class Book(models.Model):
         related_name='books',
         help_text="Author of the book"
     )
+    updated_at = models.DateTimeField(auto_now=True, help_text="Last change, used for ETags")
+    
+    objects = VersionedQuerySet.as_manager()
     
     def __str__(self):
         return f"{self.title} by {self.author.name}"
@@ -28,4 +121,45 @@ class Book(models.Model):
     class Meta:
         verbose_name = "Book"
         verbose_name_plural = "Books"
-        ordering = ['-publication_year', 'title']
\ No newline at end of file
+        ordering = ['-publication_year', 'title']
+        indexes = [
+            # Year filters and ranges, in the model's default order
+            models.Index(fields=['-publication_year', 'title'], name='api_book_year_title_idx'),
+            # An author's books newest first (with_books prefetch, author filters)
+            models.Index(fields=['author', '-publication_year', 'title'], name='api_book_author_year_idx'),
+            # The list endpoint's default ordering
+            models.Index(fields=['title'], name='api_book_title_idx'),
+            # Case-insensitive title lookups and search
+            TextSearchIndex(fields=['title'], name='api_book_title_text_idx'),
+        ]
+
+
+class TableVersionManager(models.Manager):
+    def bump(self, *model_classes):
+        """Record a change to the tables of ``model_classes`` (one UPDATE per table)."""
+        for model in model_classes:
+            table = model._meta.db_table
+            if not self.filter(table=table).update(version=models.F('version') + 1):
+                self.get_or_create(table=table, defaults={'version': 1})
+        caching.forget(*model_classes)
+    
+    def tokens(self, *model_classes):
+        """{table: version} for the tables of ``model_classes``, in one query."""
+        tables = [model._meta.db_table for model in model_classes]
+        versions = dict(self.filter(table__in=tables).values_list('table', 'version'))
+        return {table: versions.get(table, 0) for table in tables}
+
+class TableVersion(models.Model):
+    """
+    A counter per table, bumped on every write to it through VersionedModel
+    and VersionedQuerySet, so list endpoints can build an ETag without
+    reading the rows. Raw SQL writes must call ``TableVersion.objects.bump()``.
+    """
+    table = models.CharField(max_length=100, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+    
+    objects = TableVersionManager()
+    
+    def __str__(self):
+        return f"{self.table} v{self.version}"
+
@@ -0,0 +1,8 @@
+from rest_framework.pagination import PageNumberPagination
+
+
+class AuthorPagination(PageNumberPagination):
+    """Page number pagination for the author endpoints; clients may ask for up to 100 per page."""
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
@@ -0,0 +1,54 @@
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import BaseRenderer
+
+
+class StreamingRenderer(BaseRenderer):
+    """
+    Renderer that can also write rows one at a time. ``stream(rows, fields)``
+    yields encoded chunks for an iterable of dicts (e.g. ``.values()``), so a
+    view can wrap it in a StreamingHttpResponse; ``render()`` handles the
+    regular, already materialized responses such as errors.
+    """
+    charset = 'utf-8'
+
+    def stream(self, rows, fields):
+        raise NotImplementedError
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows = data if isinstance(data, list) else [data]
+        fields = list(rows[0]) if rows and isinstance(rows[0], dict) else []
+        return b''.join(self.stream(rows, fields))
+
+
+class NDJSONRenderer(StreamingRenderer):
+    """One JSON object per line."""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def stream(self, rows, fields):
+        encoder = DjangoJSONEncoder(ensure_ascii=False)
+        for row in rows:
+            yield (encoder.encode(row) + '\n').encode(self.charset)
+
+
+class _Line:
+    # csv.writer target that hands back the written line instead of buffering it
+    def write(self, value):
+        return value
+
+
+class CSVRenderer(StreamingRenderer):
+    """A header row with ``fields``, then one row per item."""
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def stream(self, rows, fields):
+        writer = csv.writer(_Line())
+        yield writer.writerow(fields).encode(self.charset)
+        for row in rows:
+            values = [row.get(field) for field in fields]
+            yield writer.writerow(['' if value is None else value for value in values]).encode(self.charset)
@@ -1,4 +1,6 @@
 from rest_framework import serializers
+from rest_framework.settings import api_settings
+from django.conf import settings
 from .models import Author, Book
 from datetime import datetime
 
@@ -21,9 +23,190 @@ class BookSerializer(serializers.ModelSerializer):
 
 class AuthorSerializer(serializers.ModelSerializer):
    
-    books = BookSerializer(many=True, read_only=True)
+    books = BookSerializer(many=True, read_only=True, source='listed_books')
     
     class Meta:
         model = Author
         fields = ['id', 'name', 'books']
-        read_only_fields = ['id']
\ No newline at end of file
+        read_only_fields = ['id']
+
+BOOK_FIELDS = ['id', 'title', 'publication_year', 'author']
+AUTHOR_FIELDS = ['id', 'name', 'books']
+
+def book_representation(book, fields=BOOK_FIELDS):
+    if isinstance(book, dict):
+        return {field: book[field] for field in fields}
+    return {field: book.author_id if field == 'author' else getattr(book, field) for field in fields}
+
+class BookReadSerializer(serializers.BaseSerializer):
+    """
+    Read-only equivalent of BookSerializer for the read endpoints: no field
+    introspection, just a dict per row. Accepts ``.values(*BOOK_FIELDS)``
+    rows (``author`` holding the id) as well as Book instances, and renders
+    the ``fields`` given in the context (default: all of them).
+    """
+    
+    def to_representation(self, book):
+        return book_representation(book, self.context.get('fields') or BOOK_FIELDS)
+
+def author_representation(author, fields=AUTHOR_FIELDS):
+    return {
+        field: [book_representation(book) for book in author.listed_books] if field == 'books'
+        else getattr(author, field)
+        for field in fields
+    }
+
+class AuthorReadSerializer(serializers.BaseSerializer):
+    """
+    Read-only equivalent of AuthorSerializer, with the books from
+    Author.listed_books, rendering the ``fields`` given in the context.
+    """
+    
+    def to_representation(self, author):
+        return author_representation(author, self.context.get('fields') or AUTHOR_FIELDS)
+
+class BulkListSerializer(serializers.ListSerializer):
+    """
+    Validate a batch of items without stopping at the first invalid one.
+    
+    Valid items end up in ``validated_data``, with their positions in the
+    request in ``item_indices``; invalid ones in ``item_errors``
+    ({position: errors}). Batch-wide checks that need the database run once
+    per batch in ``validate()`` instead of once per item.
+    """
+    
+    def to_internal_value(self, data):
+        if not isinstance(data, list):
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: ['Expected a list of items.']
+            }, code='not_a_list')
+        if not data:
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: ['Expected at least one item.']
+            }, code='empty')
+        max_items = getattr(settings, 'API_BULK_MAX_ITEMS', 10000)
+        if len(data) > max_items:
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [f'A batch can hold at most {max_items} items.']
+            }, code='max_length')
+        
+        self.item_errors = {}
+        self.item_indices = []
+        valid = []
+        for index, item in enumerate(data):
+            try:
+                valid.append(self.child.run_validation(item))
+            except serializers.ValidationError as exc:
+                self.item_errors[index] = exc.detail
+            else:
+                self.item_indices.append(index)
+        return valid
+    
+    def validate(self, items):
+        # Creates must not pick their ids; updates need the id of an existing
+        # row (self.instance is {id: instance}), at most once per batch
+        rejected, first = {}, {}
+        for position, item in enumerate(items):
+            if self.instance is None:
+                if 'id' in item:
+                    rejected[position] = {'id': ['This field is not allowed when creating.']}
+            elif 'id' not in item:
+                rejected[position] = {'id': ['This field is required.']}
+            elif item['id'] not in self.instance:
+                rejected[position] = {'id': [f"Invalid pk \"{item['id']}\" - object does not exist."]}
+            elif item['id'] in first:
+                rejected[position] = {'id': [f"Duplicate pk \"{item['id']}\" - already updated by item {first[item['id']]}."]}
+            else:
+                first[item['id']] = self.item_indices[position]
+        return self.reject(items, rejected)
+    
+    def reject(self, items, rejected):
+        """Drop the items at ``rejected`` ({position in items: errors}) and record their errors."""
+        kept, indices = [], []
+        for position, (index, item) in enumerate(zip(self.item_indices, items)):
+            if position in rejected:
+                self.item_errors[index] = rejected[position]
+            else:
+                kept.append(item)
+                indices.append(index)
+        self.item_indices = indices
+        return kept
+
+
+def bulk_update(instances, validated_data):
+    """
+    Apply ``validated_data`` items (each with an ``id``) to ``instances``
+    ({id: instance}) and write them with one bulk_update.
+    """
+    changed, fields = [], set()
+    for item in validated_data:
+        item = dict(item)
+        instance = instances[item.pop('id')]
+        for field, value in item.items():
+            setattr(instance, field, value)
+        fields.update(item)
+        changed.append(instance)
+    if changed and fields:
+        type(changed[0]).objects.bulk_update(changed, sorted(fields))
+    return changed
+
+
+class BookBulkListSerializer(BulkListSerializer):
+    
+    def validate(self, items):
+        items = super().validate(items)
+        # Publication years are checked against one current year, and all
+        # authors with a single query instead of one lookup per item
+        current_year = datetime.now().year
+        author_ids = {item['author_id'] for item in items if 'author_id' in item}
+        existing = set(Author.objects.filter(pk__in=author_ids).values_list('pk', flat=True))
+        rejected = {}
+        for position, item in enumerate(items):
+            errors = {}
+            if item.get('publication_year', current_year) > current_year:
+                errors['publication_year'] = [
+                    f"Publication year cannot be in the future. Current year is {current_year}."
+                ]
+            if 'author_id' in item and item['author_id'] not in existing:
+                errors['author'] = [f"Invalid pk \"{item['author_id']}\" - object does not exist."]
+            if errors:
+                rejected[position] = errors
+        return self.reject(items, rejected)
+    
+    def create(self, validated_data):
+        return Book.objects.bulk_create([Book(**item) for item in validated_data])
+    
+    def update(self, instances, validated_data):
+        return bulk_update(instances, validated_data)
+
+
+class AuthorBulkListSerializer(BulkListSerializer):
+    
+    def create(self, validated_data):
+        return Author.objects.bulk_create([Author(**item) for item in validated_data])
+    
+    def update(self, instances, validated_data):
+        return bulk_update(instances, validated_data)
+
+
+class BookBulkSerializer(serializers.ModelSerializer):
+    """
+    Book fields for the bulk endpoints. The author is given by id and checked
+    for the whole batch by BookBulkListSerializer.
+    """
+    id = serializers.IntegerField(required=False)
+    author = serializers.IntegerField(source='author_id')
+    
+    class Meta:
+        model = Book
+        fields = ['id', 'title', 'publication_year', 'author']
+        list_serializer_class = BookBulkListSerializer
+
+
+class AuthorBulkSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(required=False)
+    
+    class Meta:
+        model = Author
+        fields = ['id', 'name']
+        list_serializer_class = AuthorBulkListSerializer
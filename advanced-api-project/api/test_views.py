@@ -1,13 +1,33 @@
-from django.test import TestCase
+import base64
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from unittest import mock, skipUnless
+
+from asgiref.sync import async_to_sync
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import LiveServerTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
-from rest_framework.test import APITestCase, APIClient
+from rest_framework.request import Request
+from rest_framework.test import APITestCase, APIClient, APIRequestFactory
 from django.contrib.auth.models import User
+from . import benchmark, caching, throttling
 from .models import Author, Book
-
+from .serializers import (
+    BOOK_FIELDS, AuthorReadSerializer, AuthorSerializer, BookReadSerializer, BookSerializer,
+)
+from .views import BookListView
 
 class BookAPITests(APITestCase):
     def setUp(self):
+        throttling.reset()
+        cache.clear()
         self.client = APIClient()
         self.user = User.objects.create_user(
             username='testuser',
@@ -150,6 +170,7 @@ class TestDatabaseConfiguration(APITestCase):
     """
     
     def setUp(self):
+        throttling.reset()
         self.client = APIClient()
         self.user = User.objects.create_user(
             username='dbtestuser',
@@ -216,6 +237,7 @@ class AuthenticationTests(APITestCase):
     """
     
     def setUp(self):
+        throttling.reset()
         self.client = APIClient()
         self.user = User.objects.create_user(
             username='authtestuser',
@@ -253,4 +275,610 @@ class AuthenticationTests(APITestCase):
         # Should not be able to access protected endpoint
         data = {'title': 'Should Fail Book', 'publication_year': 2023, 'author': self.author.id}
         response = self.client.post(reverse('api:book-create'), data)
-        self.assertIn(response.status_code, [status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN])
\ No newline at end of file
+        self.assertIn(response.status_code, [status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN])
+
+class AuthorListQueryTests(APITestCase):
+    """
+    The author endpoints must not issue one books query per author.
+    """
+    
+    def setUp(self):
+        cache.clear()
+    
+    def create_authors(self, count, books_each=3):
+        for i in range(count):
+            author = Author.objects.create(name=f'Author {i:03d}')
+            for year in range(books_each):
+                Book.objects.create(title=f'Book {year}', publication_year=2000 + year, author=author)
+    
+    def test_list_query_count_is_constant(self):
+        self.create_authors(2)
+        with self.assertNumQueries(4):  # table versions (ETag), count, authors page, books of the page
+            response = self.client.get(reverse('api:author-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        self.create_authors(15, books_each=5)
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('api:author-list'))
+        self.assertEqual(response.data['count'], 17)
+        self.assertEqual(len(response.data['results']), 17)
+    
+    def test_list_is_paginated(self):
+        self.create_authors(25, books_each=1)
+        response = self.client.get(reverse('api:author-list'))
+        self.assertEqual(response.data['count'], 25)
+        self.assertEqual(len(response.data['results']), 20)
+        self.assertIsNotNone(response.data['next'])
+        
+        response = self.client.get(reverse('api:author-list'), {'page_size': 5, 'page': 2})
+        self.assertEqual([author['name'] for author in response.data['results']],
+                         [f'Author {i:03d}' for i in range(5, 10)])
+    
+    @override_settings(API_AUTHOR_BOOKS_LIMIT=2)
+    def test_books_per_author_are_limited(self):
+        self.create_authors(2, books_each=4)
+        response = self.client.get(reverse('api:author-list'))
+        for author in response.data['results']:
+            self.assertEqual([book['publication_year'] for book in author['books']], [2003, 2002])
+        
+        author = Author.objects.first()
+        with self.assertNumQueries(3):  # ETag, author, books
+            response = self.client.get(reverse('api:author-detail', args=[author.pk]))
+        self.assertEqual(len(response.data['books']), 2)
+
+class BulkEndpointTests(APITestCase):
+    """
+    Batch create/update/delete: per-item errors, atomic mode and a query
+    count that does not grow with the batch.
+    """
+    
+    def setUp(self):
+        throttling.reset()
+        self.user = User.objects.create_user(username='bulkuser', password='bulkpass123')
+        self.client.force_authenticate(user=self.user)
+        self.author = Author.objects.create(name='Bulk Author')
+        self.url = reverse('api:book-bulk')
+    
+    def books(self, count, **overrides):
+        return [dict({'title': f'Book {i}', 'publication_year': 2000, 'author': self.author.pk}, **overrides)
+                for i in range(count)]
+    
+    def test_requires_authentication(self):
+        self.client.force_authenticate(user=None)
+        response = self.client.post(self.url, self.books(1), format='json')
+        self.assertIn(response.status_code, [status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN])
+    
+    def test_create_reports_invalid_items(self):
+        data = self.books(3)
+        data[1]['publication_year'] = 9999
+        data[2]['author'] = 0
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual((response.data['succeeded'], response.data['failed']), (1, 2))
+        self.assertEqual([error['index'] for error in response.data['errors']], [1, 2])
+        self.assertIn('publication_year', response.data['errors'][0]['errors'])
+        self.assertIn('author', response.data['errors'][1]['errors'])
+        self.assertEqual(list(Book.objects.values_list('title', flat=True)), ['Book 0'])
+    
+    def test_atomic_batch_writes_nothing_on_error(self):
+        data = self.books(3)
+        data[2]['publication_year'] = 9999
+        response = self.client.post(self.url + '?atomic=true', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['failed'], 1)
+        self.assertFalse(Book.objects.exists())
+    
+    def test_create_from_ndjson(self):
+        body = '\n'.join(json.dumps(item) for item in self.books(3)) + '\n'
+        response = self.client.post(self.url, body, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Book.objects.count(), 3)
+        
+        response = self.client.post(self.url, '{"title": "x"}\nnot json\n', content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('line 2', str(response.data['detail']))
+    
+    def test_query_count_does_not_grow_with_batch(self):
+        # author check + savepoint + insert + table version + release
+        with self.assertNumQueries(5):
+            self.client.post(self.url, self.books(5), format='json')
+        with self.assertNumQueries(5):
+            self.client.post(self.url, self.books(200), format='json')
+        self.assertEqual(Book.objects.count(), 205)
+    
+    def test_update_and_delete(self):
+        self.client.post(self.url, self.books(3), format='json')
+        ids = list(Book.objects.order_by('pk').values_list('pk', flat=True))
+        response = self.client.patch(
+            self.url, [{'id': ids[0], 'title': 'Renamed'}, {'id': 0, 'title': 'Missing'}], format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(response.data['results'], [{'index': 0, 'id': ids[0]}])
+        self.assertEqual(Book.objects.get(pk=ids[0]).title, 'Renamed')
+        
+        response = self.client.delete(self.url, [ids[0], {'id': ids[1]}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(Book.objects.values_list('pk', flat=True)), [ids[2]])
+    
+    def test_update_rejects_duplicate_and_boolean_ids(self):
+        self.client.post(self.url, self.books(2), format='json')
+        ids = list(Book.objects.order_by('pk').values_list('pk', flat=True))
+        response = self.client.patch(self.url, [
+            {'id': ids[0], 'title': 'First'},
+            {'id': ids[0], 'title': 'Second'},
+            {'id': True, 'title': 'Boolean'},
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(response.data['results'], [{'index': 0, 'id': ids[0]}])
+        self.assertEqual([error['index'] for error in response.data['errors']], [1, 2])
+        self.assertIn('Duplicate', str(response.data['errors'][0]['errors']['id']))
+        self.assertEqual(list(Book.objects.order_by('pk').values_list('title', flat=True)), ['First', 'Book 1'])
+    
+    def test_author_bulk_create(self):
+        response = self.client.post(reverse('api:author-bulk'), [{'name': 'A'}, {'name': 'B'}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Author.objects.count(), 3)
+
+class BookExportTests(APITestCase):
+    """
+    ?format=ndjson and ?format=csv stream the filtered book list.
+    """
+    
+    def setUp(self):
+        cache.clear()
+        tolkien = Author.objects.create(name='J.R.R. Tolkien')
+        lewis = Author.objects.create(name='C.S. Lewis')
+        Book.objects.create(title='The Hobbit', publication_year=1937, author=tolkien)
+        Book.objects.create(title='The Silmarillion', publication_year=1977, author=tolkien)
+        Book.objects.create(title='Narnia, "The Lion"', publication_year=1950, author=lewis)
+        self.url = reverse('api:book-list')
+    
+    def export(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode('utf-8'), response
+    
+    def test_ndjson_honours_filters_and_ordering(self):
+        body, response = self.export(format='ndjson', author_name='tolkien', ordering='-publication_year')
+        self.assertTrue(response['Content-Type'].startswith('application/x-ndjson'))
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([row['title'] for row in rows], ['The Silmarillion', 'The Hobbit'])
+        self.assertEqual(set(rows[0]), {'id', 'title', 'publication_year', 'author'})
+    
+    def test_csv_with_search(self):
+        body, response = self.export(format='csv', search='narnia')
+        self.assertIn('books.csv', response['Content-Disposition'])
+        self.assertEqual(body.splitlines(), [
+            'id,title,publication_year,author',
+            f'{Book.objects.get(publication_year=1950).pk},"Narnia, ""The Lion""",1950,'
+            f'{Author.objects.get(name="C.S. Lewis").pk}',
+        ])
+    
+    def test_json_is_unchanged(self):
+        response = self.client.get(self.url)
+        self.assertFalse(response.streaming)
+        self.assertEqual(len(response.data), 3)
+
+@skipUnless(connection.vendor == 'sqlite', 'Query plans and index names are SQLite specific')
+class BookListIndexTests(TestCase):
+    """
+    The book list's common filters and orderings must be index lookups
+    (checked with EXPLAIN QUERY PLAN), not table scans.
+    """
+    
+    def plan(self, **params):
+        view = BookListView()
+        view.request = Request(APIRequestFactory().get('/', params))
+        view.format_kwarg, view.args, view.kwargs = None, (), {}
+        return view.filter_queryset(view.get_queryset()).explain()
+    
+    def assertUsesIndex(self, index, **params):
+        plan = self.plan(**params)
+        self.assertRegex(plan, rf'USING (COVERING )?INDEX {index}\b', plan)
+        self.assertNotRegex(plan, r'(?m)SCAN api_book\s*$', plan)
+    
+    def test_year_filters(self):
+        self.assertUsesIndex('api_book_year_title_idx', publication_year=2000)
+        self.assertUsesIndex('api_book_year_title_idx', publication_year_min=1990, publication_year_max=2000)
+    
+    def test_prefix_filters(self):
+        self.assertUsesIndex('api_book_title_text_idx', title_prefix='hob')
+        self.assertUsesIndex('api_author_name_text_idx', author_name_prefix='tol')
+    
+    def test_orderings(self):
+        self.assertUsesIndex('api_book_title_idx')
+        self.assertUsesIndex('api_book_year_title_idx', ordering='-publication_year')
+        self.assertUsesIndex('api_author_name_idx', ordering='author__name')
+
+class ConditionalGetTests(APITestCase):
+    """
+    The read endpoints send an ETag and answer a matching If-None-Match with
+    304, without serializing, until the data changes.
+    """
+    
+    def setUp(self):
+        cache.clear()
+        self.author = Author.objects.create(name='ETag Author')
+        self.book = Book.objects.create(title='ETag Book', publication_year=2001, author=self.author)
+    
+    def assertNotModified(self, url, etag, queries=1, **params):
+        with self.assertNumQueries(queries):
+            response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+    
+    def test_book_detail(self):
+        url = reverse('api:book-detail', args=[self.book.pk])
+        etag = self.client.get(url)['ETag']
+        self.assertNotModified(url, etag)
+        
+        self.book.title = 'Renamed'
+        self.book.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+    
+    def test_book_list_changes_with_params_and_bulk_writes(self):
+        url = reverse('api:book-list')
+        etag = self.client.get(url)['ETag']
+        self.assertNotModified(url, etag, queries=0)
+        self.assertNotEqual(self.client.get(url, {'ordering': 'publication_year'})['ETag'], etag)
+        
+        Book.objects.bulk_create([Book(title='Bulk', publication_year=2002, author=self.author)])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+    
+    def test_author_endpoints_follow_their_books(self):
+        detail = reverse('api:author-detail', args=[self.author.pk])
+        listing = reverse('api:author-list')
+        detail_etag, list_etag = self.client.get(detail)['ETag'], self.client.get(listing)['ETag']
+        self.assertNotModified(detail, detail_etag)
+        self.assertNotModified(listing, list_etag, queries=0)
+        
+        Book.objects.filter(pk=self.book.pk).update(title='Changed')
+        self.assertEqual(self.client.get(detail, HTTP_IF_NONE_MATCH=detail_etag).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get(listing, HTTP_IF_NONE_MATCH=list_etag).status_code, status.HTTP_200_OK)
+    
+    def test_missing_book_has_no_etag(self):
+        response = self.client.get(reverse('api:book-detail', args=[0]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(response.has_header('ETag'))
+
+class ListResponseCacheTests(APITestCase):
+    """
+    Equivalent list requests are served from the cache without queries
+    until a Book or Author write bumps the table generation.
+    """
+    
+    def setUp(self):
+        cache.clear()
+        self.author = Author.objects.create(name='George Orwell')
+        Book.objects.create(title='Animal Farm', publication_year=1945, author=self.author)
+        self.url = reverse('api:book-list')
+    
+    def test_normalized_params_share_an_entry(self):
+        first = self.client.get(self.url, {'author_name': 'orwell', 'ordering': 'title', 'search': ''})
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url, {'author_name': 'orwell'})
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(second.content), first.data)
+        self.assertEqual(second['ETag'], first['ETag'])
+        
+        with self.assertNumQueries(1):
+            self.client.get(self.url, {'author_name': 'orwell', 'ordering': '-title'})
+    
+    def test_writes_invalidate(self):
+        self.client.get(self.url)
+        Book.objects.create(title='1984', publication_year=1949, author=self.author)
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.data), 2)
+        
+        Author.objects.filter(pk=self.author.pk).delete()
+        self.assertEqual(json.loads(self.client.get(self.url).content), [])
+    
+    def test_local_cache_generations_expire(self):
+        first = self.client.get(self.url)
+        # A write in another worker: its forget() does not reach this process's cache
+        with mock.patch.object(caching, 'forget'):
+            Book.objects.create(title='1984', publication_year=1949, author=self.author)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+        later = time.time() + caching.generation_timeout() + 1
+        with mock.patch('time.time', return_value=later):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 2)
+    
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+                                           'LOCATION': 'api_cache'}})
+    def test_shared_cache_generations_are_kept_until_forgotten(self):
+        self.assertIsNone(caching.generation_timeout())
+    
+    def test_browsable_api_is_not_cached(self):
+        self.client.get(self.url, HTTP_ACCEPT='text/html')
+        with self.assertNumQueries(1):  # the books again; the generations are cached
+            self.client.get(self.url, HTTP_ACCEPT='text/html')
+
+class ReadSerializerTests(TestCase):
+    """
+    The read serializers used for GET must render exactly what the
+    ModelSerializers render.
+    """
+    
+    def setUp(self):
+        benchmark.seed(authors=3, books_per_author=4)
+    
+    def test_same_representation(self):
+        books = Book.objects.order_by('title')
+        self.assertEqual(BookReadSerializer(books.values(*BOOK_FIELDS), many=True).data,
+                         BookSerializer(books, many=True).data)
+        self.assertEqual(BookReadSerializer(books, many=True).data, BookSerializer(books, many=True).data)
+        
+        authors = Author.objects.order_by('name', 'pk').with_books(2)
+        self.assertEqual(AuthorReadSerializer(authors, many=True).data, AuthorSerializer(authors, many=True).data)
+    
+    def test_benchmark_reports_throughput(self):
+        results = benchmark.run(repeat=1)
+        self.assertEqual(results['books.serialize.read']['rows'], 12)
+        self.assertEqual(results['authors.serialize.model']['rows'], 15)
+        self.assertGreater(results['books.serialize.speedup'], 0)
+
+class AsyncEndpointTests(TestCase):
+    """
+    The async endpoints return the same JSON as the DRF list and detail views.
+    """
+    
+    def setUp(self):
+        cache.clear()
+        benchmark.seed(authors=3, books_per_author=4)
+    
+    def assertSameResponse(self, name, sync_name, *args, **params):
+        expected = self.client.get(reverse(f'api:{sync_name}', args=args), params)
+        response = async_to_sync(self.async_client.get)(reverse(f'api:{name}', args=args), params)
+        self.assertEqual(response.status_code, expected.status_code)
+        # Pagination links differ only in the path
+        self.assertEqual(json.loads(response.content.decode().replace('/async/', '/')), json.loads(expected.content))
+        return response
+    
+    def test_books(self):
+        self.assertSameResponse('async-book-list', 'book-list')
+        self.assertSameResponse('async-book-list', 'book-list',
+                                publication_year_min=2018, search='Test', ordering='-publication_year')
+        book = Book.objects.first()
+        self.assertSameResponse('async-book-detail', 'book-detail', book.pk)
+        self.assertSameResponse('async-book-detail', 'book-detail', 0)
+    
+    def test_authors(self):
+        self.assertSameResponse('async-author-list', 'author-list')
+        self.assertSameResponse('async-author-list', 'author-list', page_size=2, page=2)
+        self.assertSameResponse('async-author-list', 'author-list', page_size=2, page=9)
+        self.assertSameResponse('async-author-detail', 'author-detail', Author.objects.first().pk)
+    
+    def test_fields(self):
+        response = self.assertSameResponse('async-book-list', 'book-list', fields='title')
+        self.assertEqual(set(json.loads(response.content)[0]), {'title'})
+        self.assertSameResponse('async-book-list', 'book-list', fields='nope')
+        book = Book.objects.first()
+        self.assertSameResponse('async-book-detail', 'book-detail', book.pk, fields='title,publication_year')
+        self.assertSameResponse('async-book-detail', 'book-detail', book.pk, fields='nope')
+        
+        author = Author.objects.first()
+        self.assertSameResponse('async-author-list', 'author-list', fields='name')
+        self.assertSameResponse('async-author-list', 'author-list', fields='name', expand='books', books_limit=1)
+        self.assertSameResponse('async-author-list', 'author-list', expand='nope')
+        self.assertSameResponse('async-author-detail', 'author-detail', author.pk, books_limit=2)
+        self.assertSameResponse('async-author-detail', 'author-detail', author.pk, books_limit=0)
+    
+    def test_read_only(self):
+        response = async_to_sync(self.async_client.post)(reverse('api:async-book-list'), {})
+        self.assertEqual(response.status_code, 405)
+
+THROTTLE_RATES = {'DEFAULT_THROTTLE_RATES': {'writes': '4/min', 'book-writes': '3/min', 'author-writes': '3/min'}}
+
+@override_settings(REST_FRAMEWORK=THROTTLE_RATES)
+class WriteThrottleTests(APITestCase):
+    """
+    Writes are limited per user and per endpoint; reads never are.
+    """
+    
+    def setUp(self):
+        cache.clear()
+        throttling.reset()
+        self.user = User.objects.create_user(username='writer', password='writerpass123')
+        self.client.force_authenticate(user=self.user)
+        self.author = Author.objects.create(name='Throttled Author')
+    
+    def create_book(self):
+        return self.client.post(reverse('api:book-create'),
+                                {'title': 'Book', 'publication_year': 2000, 'author': self.author.pk})
+    
+    def check_budgets(self):
+        remaining = [self.create_book()['X-RateLimit-Remaining'] for _ in range(3)]
+        self.assertEqual(remaining, ['2', '1', '0'])
+        
+        with self.assertNumQueries(0):
+            response = self.create_book()
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertEqual(response['X-RateLimit-Remaining'], '0')
+        self.assertEqual(Book.objects.count(), 3)
+        
+        # Another endpoint has its own budget, but the user's total is shared
+        response = self.client.post(reverse('api:author-create'), {'name': 'New'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.client.post(reverse('api:author-create'), {'name': 'Newer'})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        
+        self.assertEqual(self.client.get(reverse('api:book-list')).status_code, status.HTTP_200_OK)
+        
+        # Other users are not affected
+        self.client.force_authenticate(user=User.objects.create_user(username='other', password='otherpass123'))
+        self.assertEqual(self.create_book().status_code, status.HTTP_201_CREATED)
+    
+    @override_settings(API_THROTTLE_BACKEND='local')
+    def test_local_backend(self):
+        self.check_budgets()
+    
+    @override_settings(API_THROTTLE_BACKEND='cache')
+    def test_cache_backend(self):
+        self.check_budgets()
+    
+    @override_settings(API_THROTTLE_BACKEND='local')
+    def test_previous_window_is_weighted(self):
+        throttle = throttling.UserWriteThrottle()
+        request = Request(APIRequestFactory().post('/'))
+        request.user = self.user
+        now = 600.0  # start of a minute window
+        throttle.timer = lambda: now
+        self.assertEqual([throttle.allow_request(request, None) for _ in range(5)], [True] * 4 + [False])
+        # The next window, once 3 of the 4 requests still count: 60 s + 15 s
+        self.assertEqual(throttle.wait(), 75)
+        
+        # Half way through the next window, half of the previous window counts
+        now = 690.0
+        self.assertEqual([throttle.allow_request(request, None) for _ in range(3)], [True, True, False])
+        self.assertAlmostEqual(throttle.wait(), 15)
+    
+    @override_settings(API_THROTTLE_BACKEND='local',
+                       REST_FRAMEWORK={'DEFAULT_THROTTLE_RATES': {'writes': '0/min'}})
+    def test_zero_rate_rejects_without_retry_after(self):
+        response = self.create_book()
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertNotIn('Retry-After', response)
+
+@override_settings(
+    REST_FRAMEWORK={'DEFAULT_THROTTLE_RATES': {'writes': '5/h', 'book-writes': '5/h', 'author-writes': '5/h'}},
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+    API_THROTTLE_BACKEND='local',
+)
+class WriteThrottleStressTests(LiveServerTestCase):
+    """
+    A client hammering a write endpoint is rejected before it touches the
+    database, while concurrent reads keep being served.
+    """
+    
+    def setUp(self):
+        cache.clear()
+        throttling.reset()
+        User.objects.create_user(username='hammer', password='hammerpass123')
+        self.author = Author.objects.create(name='Stress Author')
+        self.book = Book.objects.create(title='Stress Book', publication_year=2000, author=self.author)
+    
+    def request(self, path, data=None):
+        """(status, headers) of a GET, or of an authenticated POST of ``data``."""
+        request = urllib.request.Request(self.live_server_url + path)
+        if data is not None:
+            request.data = json.dumps(data).encode()
+            request.add_header('Content-Type', 'application/json')
+            request.add_header('Authorization', 'Basic ' + base64.b64encode(b'hammer:hammerpass123').decode())
+        try:
+            with urllib.request.urlopen(request, timeout=10) as response:
+                return response.status, response.headers
+        except urllib.error.HTTPError as error:
+            return error.code, error.headers
+    
+    def read_latencies(self, count):
+        """Seconds taken by each of ``count`` book detail reads, which must all succeed."""
+        latencies = []
+        for _ in range(count):
+            started = time.perf_counter()
+            self.assertEqual(self.request(reverse('api:book-detail', args=[self.book.pk]))[0], 200)
+            latencies.append(time.perf_counter() - started)
+        return latencies
+    
+    def test_reads_are_served_while_writer_is_throttled(self):
+        baseline = p95(self.read_latencies(20))
+        responses = []
+        
+        def hammer():
+            data = {'title': 'Spam', 'publication_year': 2000, 'author': self.author.pk}
+            for _ in range(150):
+                responses.append(self.request(reverse('api:book-create'), data))
+        
+        writer = threading.Thread(target=hammer)
+        writer.start()
+        latencies = []
+        while writer.is_alive() or len(latencies) < 20:
+            latencies.extend(self.read_latencies(1))
+        writer.join()
+        
+        statuses = [code for code, headers in responses]
+        self.assertLessEqual(statuses.count(201), 10)
+        self.assertEqual(statuses.count(201) + statuses.count(429), 150)
+        # Rejected writes never reach the database
+        self.assertEqual(Book.objects.count(), 1 + statuses.count(201))
+        for code, headers in responses:
+            if code == 429:
+                self.assertGreater(int(headers['Retry-After']), 0)
+                self.assertEqual(headers['X-RateLimit-Remaining'], '0')
+        # Read latency stays bounded: generously, relative to the same reads
+        # without write pressure on this machine
+        loaded = p95(latencies)
+        self.assertLess(loaded, max(20 * baseline, 1.0),
+                        f'read p95 {loaded * 1000:.0f} ms under write pressure, {baseline * 1000:.0f} ms without')
+
+
+def p95(values):
+    values = sorted(values)
+    return values[min(int(len(values) * 0.95), len(values) - 1)]
+
+
+class SparseFieldsTests(APITestCase):
+    """
+    ?fields= narrows the representation and the query; author books can be
+    left out or limited with ?expand= and ?books_limit=.
+    """
+    
+    def setUp(self):
+        cache.clear()
+        benchmark.seed(authors=3, books_per_author=4)
+        self.author = Author.objects.order_by('name', 'pk').first()
+        self.book = Book.objects.order_by('pk').first()
+    
+    def test_book_fields(self):
+        response = self.client.get(reverse('api:book-list'), {'fields': 'title,id'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(response.data[0]), ['id', 'title'])
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('api:book-detail', args=[self.book.pk]), {'fields': 'title'})
+        self.assertEqual(response.data, {'title': self.book.title})
+        book_query = queries.captured_queries[-1]['sql']
+        self.assertNotIn('publication_year', book_query)
+        self.assertNotIn('author_id', book_query)
+    
+    def test_author_fields_skip_books(self):
+        with self.assertNumQueries(3):  # ETag, count, authors page
+            response = self.client.get(reverse('api:author-list'), {'fields': 'id,name'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(response.data['results'][0]), ['id', 'name'])
+        
+        response = self.client.get(reverse('api:author-detail', args=[self.author.pk]), {'fields': 'name'})
+        self.assertEqual(response.data, {'name': self.author.name})
+    
+    def test_books_embedded_by_default(self):
+        response = self.client.get(reverse('api:author-detail', args=[self.author.pk]))
+        self.assertEqual(len(response.data['books']), 4)
+        
+        with override_settings(API_EMBED_BOOKS_BY_DEFAULT=False):
+            response = self.client.get(reverse('api:author-detail', args=[self.author.pk]))
+            self.assertNotIn('books', response.data)
+            response = self.client.get(reverse('api:author-detail', args=[self.author.pk]), {'expand': 'books'})
+            self.assertEqual(len(response.data['books']), 4)
+    
+    def test_expand_books_with_limit(self):
+        response = self.client.get(reverse('api:author-list'),
+                                   {'fields': 'name', 'expand': 'books', 'books_limit': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        for author in response.data['results']:
+            self.assertEqual(list(author), ['name', 'books'])
+            self.assertEqual(len(author['books']), 2)
+    
+    def test_invalid_parameters(self):
+        for name, params in [('api:book-list', {'fields': 'title,isbn'}),
+                             ('api:author-list', {'fields': 'id,age'}),
+                             ('api:author-list', {'expand': 'publisher'}),
+                             ('api:author-list', {'books_limit': '0'}),
+                             ('api:author-list', {'books_limit': 'all'})]:
+            with self.subTest(params=params):
+                response = self.client.get(reverse(name), params)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -1,13 +1,17 @@
 from django.test import TestCase
+from django.core.cache import cache
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase, APIClient
 from django.contrib.auth.models import User
+from . import throttling
 from .models import Author, Book
 
 
 class BookAPITests(APITestCase):
     def setUp(self):
+        throttling.reset()
+        cache.clear()
         self.client = APIClient()
         self.user = User.objects.create_user(
             username='testuser',
@@ -0,0 +1,190 @@
+"""
+Sliding-window rate limits for the write endpoints.
+
+DRF's SimpleRateThrottle keeps a list of request timestamps per client and
+rewrites it on every request. Here a sliding window is approximated with two
+fixed windows instead: the count of the current window plus the previous
+window's count, weighted by how much of it the sliding window still covers.
+That is two integer counters per client and O(1) work per request.
+
+The counters live in process memory (``API_THROTTLE_BACKEND = 'local'``,
+enough for a single process) or in the Django cache (``'cache'``, shared by
+all processes when CACHES points at Redis). Rates come from
+``REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']``:
+
+* ``writes`` - all write requests of one user (or address), any endpoint
+* the view's ``throttle_scope`` - write requests of one user to that endpoint
+
+Each throttle leaves its budget on ``request.rate_limits`` so
+WriteThrottleMixin can report the tightest one in ``X-RateLimit-*`` headers.
+"""
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class LocalCounter:
+    """Window counters in this process's memory."""
+
+    # Expired windows are dropped once this many counters are kept
+    MAX_KEYS = 10000
+
+    def __init__(self):
+        self.counts = {}
+        self.lock = threading.Lock()
+
+    def get(self, keys):
+        now = time.monotonic()
+        with self.lock:
+            counts = [self.counts.get(key, (0, 0)) for key in keys]
+        return [count if expires > now else 0 for count, expires in counts]
+
+    def incr(self, key, timeout):
+        now = time.monotonic()
+        with self.lock:
+            count, expires = self.counts.get(key, (0, 0))
+            if expires <= now:
+                count, expires = 0, now + timeout
+            self.counts[key] = (count + 1, expires)
+            if len(self.counts) > self.MAX_KEYS:
+                self.counts = {key: value for key, value in self.counts.items() if value[1] > now}
+
+    def decr(self, key):
+        with self.lock:
+            count, expires = self.counts.get(key, (0, 0))
+            if count:
+                self.counts[key] = (count - 1, expires)
+
+    def clear(self):
+        with self.lock:
+            self.counts.clear()
+
+
+class CacheCounter:
+    """Window counters in the default cache, shared by every process using it."""
+
+    def get(self, keys):
+        counts = cache.get_many(keys)
+        return [counts.get(key, 0) for key in keys]
+
+    def incr(self, key, timeout):
+        if cache.add(key, 1, timeout):
+            return
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Expired between add() and incr()
+            cache.set(key, 1, timeout)
+
+    def decr(self, key):
+        try:
+            cache.decr(key)
+        except ValueError:
+            pass
+
+
+_local = LocalCounter()
+_cache = CacheCounter()
+
+
+def counter():
+    return _local if getattr(settings, 'API_THROTTLE_BACKEND', 'cache') == 'local' else _cache
+
+
+def reset():
+    """Forget the in-process counters (the cache ones go with cache.clear())."""
+    _local.clear()
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    """
+    Throttle unsafe requests with a two-window sliding counter; safe methods
+    are never throttled.
+    """
+    cache_format = 'api:throttle:%(scope)s:%(ident)s'
+    # The counter key of the request allow_request() counted, for refund()
+    counted = None
+
+    def get_rate(self):
+        # Read the rates on every request, so overridden settings apply
+        rates = api_settings.DEFAULT_THROTTLE_RATES
+        return rates.get(self.scope) if self.scope else None
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+    def allow_request(self, request, view):
+        if request.method in SAFE_METHODS or self.rate is None:
+            return True
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+
+        now = self.timer()
+        window = int(now // self.duration)
+        self.elapsed = now / self.duration - window
+        self.current, self.previous = counter().get([f'{key}:{window}', f'{key}:{window - 1}'])
+        estimate = self.previous * (1 - self.elapsed) + self.current
+        allowed = estimate + 1 <= self.num_requests
+        self.counted = None
+        if allowed:
+            self.counted = f'{key}:{window}'
+            counter().incr(self.counted, timeout=2 * self.duration)
+        self.remaining = max(int(self.num_requests - estimate - 1), 0) if allowed else 0
+        self.reset_in = math.ceil((1 - self.elapsed) * self.duration)
+        if not hasattr(request, 'rate_limits'):
+            request.rate_limits = []
+        request.rate_limits.append(self)
+        return allowed
+
+    def refund(self):
+        """Give back the request counted by allow_request(), when another throttle rejected it."""
+        if self.counted:
+            counter().decr(self.counted)
+            self.counted = None
+            self.remaining += 1
+
+    def wait(self):
+        """Seconds until the sliding estimate leaves room for one more request."""
+        if self.num_requests < 1:
+            # A 0/<period> rate never allows a request
+            return None
+        room = self.num_requests - 1
+        if self.current <= room:
+            # The previous window's weight fades enough within this window
+            needed = 1 - (room - self.current) / self.previous
+            return max((needed - self.elapsed) * self.duration, 0)
+        # Wait for the next window, until this window's weight has faded enough
+        needed = 1 - room / self.current
+        return (1 - self.elapsed + needed) * self.duration
+
+
+class UserWriteThrottle(SlidingWindowThrottle):
+    """All write requests of a user, across the write endpoints."""
+    scope = 'writes'
+
+
+class EndpointWriteThrottle(SlidingWindowThrottle):
+    """Write requests of a user to the view's ``throttle_scope``."""
+
+    def __init__(self):
+        # The rate depends on the view; see allow_request()
+        pass
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, 'throttle_scope', None)
+        if not self.scope:
+            return True
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        return super().allow_request(request, view)
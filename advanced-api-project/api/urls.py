@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import async_views, views
 
 app_name = 'api'
 
@@ -7,6 +7,7 @@ urlpatterns = [
     # Book URLs
     path('books/', views.BookListView.as_view(), name='book-list'),
     path('books/create/', views.BookCreateView.as_view(), name='book-create'),
+    path('books/bulk/', views.BookBulkView.as_view(), name='book-bulk'),
     path('books/<int:pk>/', views.BookDetailView.as_view(), name='book-detail'),
     path('books/update/<int:pk>/', views.BookUpdateView.as_view(), name='book-update'),
     path('books/delete/<int:pk>/', views.BookDeleteView.as_view(), name='book-delete'),
@@ -14,7 +15,14 @@ urlpatterns = [
     # Author URLs
     path('authors/', views.AuthorListView.as_view(), name='author-list'),
     path('authors/create/', views.AuthorCreateView.as_view(), name='author-create'),
+    path('authors/bulk/', views.AuthorBulkView.as_view(), name='author-bulk'),
     path('authors/<int:pk>/', views.AuthorDetailView.as_view(), name='author-detail'),
     path('authors/update/<int:pk>/', views.AuthorUpdateView.as_view(), name='author-update'),
     path('authors/delete/<int:pk>/', views.AuthorDeleteView.as_view(), name='author-delete'),
-]
\ No newline at end of file
+    
+    # Async (ASGI) read endpoints, same responses as the list/detail views above
+    path('async/books/', async_views.book_list, name='async-book-list'),
+    path('async/books/<int:pk>/', async_views.book_detail, name='async-book-detail'),
+    path('async/authors/', async_views.author_list, name='async-author-list'),
+    path('async/authors/<int:pk>/', async_views.author_detail, name='async-author-detail'),
+]
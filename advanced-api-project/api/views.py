@@ -1,14 +1,37 @@
+import hashlib
+
 from rest_framework import generics, status, filters
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated
 from django_filters import rest_framework
 from django_filters import FilterSet, CharFilter, NumberFilter
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from . import caching
 from .models import Author, Book
-from .serializers import AuthorSerializer, BookSerializer
+from .pagination import AuthorPagination
+from .parsers import NDJSONParser
+from .renderers import CSVRenderer, NDJSONRenderer, StreamingRenderer
+from .throttling import EndpointWriteThrottle, UserWriteThrottle
+from .serializers import (
+    AUTHOR_FIELDS, BOOK_FIELDS, AuthorSerializer, BookSerializer, AuthorBulkSerializer, BookBulkSerializer,
+    AuthorReadSerializer, BookReadSerializer,
+)
 
 class BookFilter(FilterSet):
     title = CharFilter(field_name='title', lookup_expr='icontains')
     author_name = CharFilter(field_name='author__name', lookup_expr='icontains')
+    # Prefix matches can use the title/name indexes on every backend
+    title_prefix = CharFilter(field_name='title', lookup_expr='istartswith')
+    author_name_prefix = CharFilter(field_name='author__name', lookup_expr='istartswith')
     publication_year = NumberFilter(field_name='publication_year')
     publication_year_min = NumberFilter(field_name='publication_year', lookup_expr='gte')
     publication_year_max = NumberFilter(field_name='publication_year', lookup_expr='lte')
@@ -17,63 +40,404 @@ class BookFilter(FilterSet):
         model = Book
         fields = ['title', 'author__name', 'publication_year']
 
-class BookListView(generics.ListAPIView):
+class ConditionalGetMixin:
+    """
+    ETag support for read endpoints. ``get_etag_source()`` returns a cheap
+    version of the resource (a row's updated_at, table versions) or None;
+    a matching If-None-Match is answered with 304 before the view queries
+    and serializes anything.
+    """
+    
+    def get_etag_source(self):
+        raise NotImplementedError
+    
+    def get_default_query_params(self):
+        """Query parameters that select what the view does without them anyway."""
+        defaults = {}
+        if isinstance(getattr(self, 'ordering', None), (list, tuple)):
+            defaults['ordering'] = ','.join(self.ordering)
+        paginator = self.paginator if hasattr(self, 'pagination_class') else None
+        if paginator is not None:
+            defaults[paginator.page_query_param] = '1'
+            if paginator.page_size_query_param:
+                defaults[paginator.page_size_query_param] = str(paginator.page_size)
+        return defaults
+    
+    def get_normalized_query(self):
+        return caching.normalize(self.request.query_params, self.get_default_query_params())
+    
+    def get_etag(self):
+        source = self.get_etag_source()
+        if source is None:
+            return None
+        # The same version renders differently per query string and format
+        key = repr((source, self.request.path, self.get_normalized_query(), self.request.accepted_media_type))
+        return '"%s"' % hashlib.md5(key.encode(), usedforsecurity=False).hexdigest()
+    
+    def get(self, request, *args, **kwargs):
+        etag = self.get_etag()
+        response = get_conditional_response(request, etag=etag) if etag else None
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        if etag and response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = etag
+            patch_vary_headers(response, ['Accept'])
+        return response
+
+class CachedListMixin(ConditionalGetMixin):
+    """
+    Serve list responses from the cache (see api/caching.py). Entries are
+    keyed on the path, normalized query parameters, media type and the
+    generations of ``cache_models``, which also make the ETag, so a hit
+    does not query the database at all. Only JSON responses are cached.
+    """
+    cache_models = ()
+    
+    def get_etag_source(self):
+        if not hasattr(self, '_generations'):
+            self._generations = caching.generations(*self.cache_models)
+        return self._generations
+    
+    def get_cache_key(self):
+        request = self.request
+        if not isinstance(request.accepted_renderer, JSONRenderer):
+            return None
+        return caching.response_key(
+            request.path, self.get_normalized_query(), request.accepted_media_type, self.get_etag_source(),
+        )
+    
+    def list(self, request, *args, **kwargs):
+        self.cache_key = self.get_cache_key()
+        cached = cache.get(self.cache_key) if self.cache_key else None
+        if cached is not None:
+            content, content_type = cached
+            return HttpResponse(content, content_type=content_type)
+        return super().list(request, *args, **kwargs)
+    
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        key = getattr(self, 'cache_key', None)
+        if key and isinstance(response, Response) and response.status_code == status.HTTP_200_OK:
+            response.render()
+            cache.set(key, (response.content, response['Content-Type']), caching.timeout())
+        return response
+
+def split_param(value):
+    return {item.strip() for item in (value or '').split(',') if item.strip()}
+
+class ReadSerializerMixin:
+    """
+    Serialize GET responses with ``read_serializer_class``, a plain read-only
+    serializer, instead of the ModelSerializer used for writes and the schema.
+    
+    Clients can ask for a subset of ``read_fields`` with ``?fields=a,b``;
+    views narrow their queryset to ``get_fields()``.
+    """
+    read_serializer_class = None
+    read_fields = ()
+    
+    def is_read(self):
+        return self.request is not None and self.request.method in ('GET', 'HEAD')
+    
+    def get_serializer_class(self):
+        if self.read_serializer_class is not None and self.is_read():
+            return self.read_serializer_class
+        return super().get_serializer_class()
+    
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.is_read():
+            context['fields'] = self.get_fields()
+        return context
+    
+    def get_fields(self):
+        if not hasattr(self, '_fields'):
+            self._fields = self.parse_fields()
+        return self._fields
+    
+    def parse_fields(self):
+        """The fields named by ?fields=, in read_fields order; all of them by default."""
+        requested = split_param(self.request.query_params.get('fields'))
+        if not requested:
+            return list(self.read_fields)
+        unknown = requested - set(self.read_fields)
+        if unknown:
+            raise ValidationError({'fields': [f"Unknown field(s): {', '.join(sorted(unknown))}."]})
+        return [field for field in self.read_fields if field in requested]
+
+class WriteThrottleMixin:
+    """
+    Rate limit writes per user (``writes`` rate) and per user and endpoint
+    (``throttle_scope`` rate), see api/throttling.py, and report the
+    tightest remaining budget in X-RateLimit-* headers.
+    """
+    throttle_classes = [UserWriteThrottle, EndpointWriteThrottle]
+    
+    def check_throttles(self, request):
+        # Like APIView.check_throttles(), but a rejected request does not use
+        # up the budgets of the throttles that would have allowed it
+        allowed, durations = [], []
+        for throttle in self.get_throttles():
+            if throttle.allow_request(request, self):
+                allowed.append(throttle)
+            else:
+                durations.append(throttle.wait())
+        if durations:
+            for throttle in allowed:
+                throttle.refund()
+            self.throttled(request, max((duration for duration in durations if duration is not None), default=None))
+    
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        limits = getattr(request, 'rate_limits', None)
+        if limits:
+            tightest = min(limits, key=lambda throttle: (throttle.remaining, throttle.num_requests))
+            response['X-RateLimit-Limit'] = tightest.num_requests
+            response['X-RateLimit-Remaining'] = tightest.remaining
+            response['X-RateLimit-Reset'] = tightest.reset_in
+        return response
+
+class BookListView(ReadSerializerMixin, CachedListMixin, generics.ListAPIView):
     queryset = Book.objects.all()
     serializer_class = BookSerializer
+    read_serializer_class = BookReadSerializer
+    read_fields = BOOK_FIELDS
     permission_classes = [IsAuthenticatedOrReadOnly]
     filter_backends = [rest_framework.DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_class = BookFilter
     search_fields = ['title', 'author__name']
     ordering_fields = ['title', 'publication_year', 'author__name']
     ordering = ['title']
+    # Books are filtered, searched and ordered by author name too
+    cache_models = (Book, Author)
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, NDJSONRenderer, CSVRenderer]
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        # Reads only need the requested columns: skip building Book instances
+        return queryset.values(*self.get_fields()) if self.is_read() else queryset
+    
+    def list(self, request, *args, **kwargs):
+        # ?format=ndjson / ?format=csv stream the whole filtered, searched and
+        # ordered result as plain rows, API_EXPORT_CHUNK_SIZE at a time,
+        # without building model instances or serializer dicts
+        renderer = request.accepted_renderer
+        if not isinstance(renderer, StreamingRenderer):
+            return super().list(request, *args, **kwargs)
+        fields = self.get_fields()
+        rows = self.filter_queryset(self.get_queryset()).iterator(
+            chunk_size=getattr(settings, 'API_EXPORT_CHUNK_SIZE', 2000)
+        )
+        response = StreamingHttpResponse(
+            renderer.stream(rows, fields),
+            content_type=f'{renderer.media_type}; charset={renderer.charset}',
+        )
+        response['Content-Disposition'] = f'attachment; filename="books.{renderer.format}"'
+        return response
 
-class BookDetailView(generics.RetrieveAPIView):
+class BookDetailView(ReadSerializerMixin, ConditionalGetMixin, generics.RetrieveAPIView):
     queryset = Book.objects.all()
     serializer_class = BookSerializer
+    read_serializer_class = BookReadSerializer
+    read_fields = BOOK_FIELDS
     permission_classes = [IsAuthenticatedOrReadOnly]
     lookup_field = 'pk'
+    
+    def get_queryset(self):
+        return Book.objects.only(*self.get_fields())
+    
+    def get_etag_source(self):
+        return Book.objects.filter(pk=self.kwargs['pk']).values_list('updated_at', flat=True).first()
 
-class BookCreateView(generics.CreateAPIView):
+class BookCreateView(WriteThrottleMixin, generics.CreateAPIView):
     queryset = Book.objects.all()
     serializer_class = BookSerializer
     permission_classes = [IsAuthenticated]
+    throttle_scope = 'book-writes'
 
-class BookUpdateView(generics.UpdateAPIView):
+class BookUpdateView(WriteThrottleMixin, generics.UpdateAPIView):
     queryset = Book.objects.all()
     serializer_class = BookSerializer
     permission_classes = [IsAuthenticated]
+    throttle_scope = 'book-writes'
     lookup_field = 'pk'
 
-class BookDeleteView(generics.DestroyAPIView):
+class BookDeleteView(WriteThrottleMixin, generics.DestroyAPIView):
     queryset = Book.objects.all()
     serializer_class = BookSerializer
     permission_classes = [IsAuthenticated]
+    throttle_scope = 'book-writes'
     lookup_field = 'pk'
 
-class AuthorListView(generics.ListAPIView):
+class AuthorBooksMixin:
+    """
+    Authors with their books, loaded with a single prefetch query and capped
+    at API_AUTHOR_BOOKS_LIMIT books per author (None for no cap), or at
+    ``?books_limit=`` when that is lower.
+    
+    Books are embedded by default (API_EMBED_BOOKS_BY_DEFAULT), when
+    ``books`` is in ``?fields=`` or with ``?expand=books``. Otherwise the
+    prefetch is skipped entirely.
+    """
+    read_fields = AUTHOR_FIELDS
+    expandable = {'books'}
+    
+    def parse_fields(self):
+        fields = super().parse_fields()
+        expand = split_param(self.request.query_params.get('expand'))
+        if expand - self.expandable:
+            raise ValidationError({'expand': [f"Unknown expansion(s): {', '.join(sorted(expand - self.expandable))}."]})
+        explicit = split_param(self.request.query_params.get('fields'))
+        if 'books' in expand:
+            if 'books' not in fields:
+                fields.append('books')
+        elif not explicit and not getattr(settings, 'API_EMBED_BOOKS_BY_DEFAULT', True):
+            fields.remove('books')
+        return fields
+    
+    def get_books_limit(self):
+        limit = getattr(settings, 'API_AUTHOR_BOOKS_LIMIT', 50)
+        requested = self.request.query_params.get('books_limit')
+        if requested:
+            try:
+                requested = int(requested)
+                if requested < 1:
+                    raise ValueError
+            except ValueError:
+                raise ValidationError({'books_limit': ['A positive integer is required.']})
+            limit = min(requested, limit) if limit else requested
+        return limit
+    
+    def get_queryset(self):
+        fields = self.get_fields()
+        queryset = Author.objects.order_by('name', 'pk').only(*[field for field in fields if field != 'books'] or ['id'])
+        if 'books' in fields:
+            queryset = queryset.with_books(self.get_books_limit())
+        return queryset
+
+class AuthorListView(AuthorBooksMixin, ReadSerializerMixin, CachedListMixin, generics.ListAPIView):
     queryset = Author.objects.all()
     serializer_class = AuthorSerializer
+    read_serializer_class = AuthorReadSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = AuthorPagination
+    cache_models = (Author, Book)
 
-class AuthorDetailView(generics.RetrieveAPIView):
+class AuthorDetailView(AuthorBooksMixin, ReadSerializerMixin, ConditionalGetMixin, generics.RetrieveAPIView):
     queryset = Author.objects.all()
     serializer_class = AuthorSerializer
+    read_serializer_class = AuthorReadSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
     lookup_field = 'pk'
+    
+    def get_etag_source(self):
+        # The author row plus its nested books, in one indexed aggregate
+        return Author.objects.filter(pk=self.kwargs['pk']).annotate(
+            books_updated_at=Max('books__updated_at'), book_count=Count('books'),
+        ).values_list('updated_at', 'books_updated_at', 'book_count').first()
 
-class AuthorCreateView(generics.CreateAPIView):
+class AuthorCreateView(WriteThrottleMixin, generics.CreateAPIView):
     queryset = Author.objects.all()
     serializer_class = AuthorSerializer
     permission_classes = [IsAuthenticated]
+    throttle_scope = 'author-writes'
 
-class AuthorUpdateView(generics.UpdateAPIView):
+class AuthorUpdateView(WriteThrottleMixin, generics.UpdateAPIView):
     queryset = Author.objects.all()
     serializer_class = AuthorSerializer
     permission_classes = [IsAuthenticated]
+    throttle_scope = 'author-writes'
     lookup_field = 'pk'
 
-class AuthorDeleteView(generics.DestroyAPIView):
+class AuthorDeleteView(WriteThrottleMixin, generics.DestroyAPIView):
     queryset = Author.objects.all()
     serializer_class = AuthorSerializer
     permission_classes = [IsAuthenticated]
-    lookup_field = 'pk'
\ No newline at end of file
+    throttle_scope = 'author-writes'
+    lookup_field = 'pk'
+
+class BulkWriteMixin:
+    """
+    Batch endpoints: POST a list of objects to create them, PATCH (or PUT) a
+    list of objects with ``id`` to update them and DELETE a list of ids to
+    delete them. The body is a JSON array or NDJSON (one object per line).
+    
+    Each batch is validated with one query per related table and written
+    with bulk_create/bulk_update/delete in a single transaction. Invalid
+    items are reported by position and the valid ones are still written
+    (207 Multi-Status), unless ``?atomic=true`` is given, in which case any
+    invalid item rejects the whole batch (400).
+    """
+    parser_classes = [JSONParser, NDJSONParser]
+    permission_classes = [IsAuthenticated]
+    
+    def is_atomic(self):
+        return self.request.query_params.get('atomic', '').lower() in ('1', 'true', 'yes')
+    
+    def bulk_response(self, results, errors, success_status):
+        if errors:
+            success_status = status.HTTP_207_MULTI_STATUS if results else status.HTTP_400_BAD_REQUEST
+        return Response({
+            'succeeded': len(results),
+            'failed': len(errors),
+            'results': results,
+            'errors': [{'index': index, 'errors': errors[index]} for index in sorted(errors)],
+        }, status=success_status)
+    
+    def save_batch(self, serializer, success_status):
+        serializer.is_valid(raise_exception=True)
+        errors = serializer.item_errors
+        if errors and self.is_atomic():
+            return self.bulk_response([], errors, success_status)
+        with transaction.atomic():
+            objects = serializer.save()
+        results = [{'index': index, 'id': obj.pk} for index, obj in zip(serializer.item_indices, objects)]
+        return self.bulk_response(results, errors, success_status)
+    
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data, many=True)
+        return self.save_batch(serializer, status.HTTP_201_CREATED)
+    
+    def patch(self, request, *args, **kwargs):
+        return self.update_batch(request, partial=True)
+    
+    def put(self, request, *args, **kwargs):
+        return self.update_batch(request, partial=False)
+    
+    def update_batch(self, request, partial):
+        serializer = self.get_serializer(data=request.data, many=True, partial=partial)
+        ids = [item.get('id') for item in request.data if isinstance(item, dict)] if isinstance(request.data, list) else []
+        serializer.instance = self.get_queryset().in_bulk([pk for pk in ids if isinstance(pk, int) and not isinstance(pk, bool)])
+        return self.save_batch(serializer, status.HTTP_200_OK)
+    
+    def delete(self, request, *args, **kwargs):
+        data = request.data
+        if not isinstance(data, list) or not data:
+            raise ValidationError({'non_field_errors': ['Expected a non-empty list of ids.']})
+        ids, errors = {}, {}
+        for index, item in enumerate(data):
+            pk = item.get('id') if isinstance(item, dict) else item
+            if isinstance(pk, int) and not isinstance(pk, bool):
+                ids[index] = pk
+            else:
+                errors[index] = {'id': ['A valid integer is required.']}
+        existing = set(self.get_queryset().filter(pk__in=set(ids.values())).values_list('pk', flat=True))
+        for index, pk in ids.items():
+            if pk not in existing:
+                errors[index] = {'id': [f'Invalid pk "{pk}" - object does not exist.']}
+        if errors and self.is_atomic():
+            return self.bulk_response([], errors, status.HTTP_200_OK)
+        with transaction.atomic():
+            self.get_queryset().filter(pk__in=existing).delete()
+        results = [{'index': index, 'id': pk} for index, pk in ids.items() if index not in errors]
+        return self.bulk_response(results, errors, status.HTTP_200_OK)
+
+class BookBulkView(WriteThrottleMixin, BulkWriteMixin, generics.GenericAPIView):
+    queryset = Book.objects.all()
+    throttle_scope = 'book-writes'
+    serializer_class = BookBulkSerializer
+
+class AuthorBulkView(WriteThrottleMixin, BulkWriteMixin, generics.GenericAPIView):
+    queryset = Author.objects.all()
+    throttle_scope = 'author-writes'
+    serializer_class = AuthorBulkSerializer
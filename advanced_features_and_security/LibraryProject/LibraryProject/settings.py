@@ -6,6 +6,7 @@ This file has been updated to enforce HTTPS and add secure headers.
 """
 
 import os
+from importlib.util import find_spec
 from pathlib import Path
 
 # Build paths inside the project
@@ -25,7 +26,9 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "accounts",
     "bookshelf",
+    "relationship_app",
 ]
 
 MIDDLEWARE = [
@@ -69,6 +72,35 @@ DATABASES = {
 }
 
 
+# Cache, shared by every worker: cached permissions and roles (see
+# bookshelf/backends.py and relationship_app/models.py) must not outlive a
+# revocation in another process. Redis when CACHE_URL is set (e.g.
+# redis://127.0.0.1:6379/1), else the database (run createcachetable once).
+if os.environ.get("CACHE_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["CACHE_URL"],
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+            "LOCATION": "django_cache",
+        }
+    }
+
+
+# Authentication
+AUTH_USER_MODEL = "accounts.CustomUser"
+
+# Permission checks are served from the cache (see bookshelf/backends.py)
+AUTHENTICATION_BACKENDS = [
+    "bookshelf.backends.CachedPermissionBackend",
+]
+
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
@@ -112,3 +144,11 @@ X_FRAME_OPTIONS = "DENY"
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
+
+# Per-request query/latency log (see instrumentation/metrics.py), when the
+# shared django-instrumentation package is installed (see its README)
+if find_spec("instrumentation"):
+    INSTALLED_APPS.append("instrumentation")
+    # First, so the other middleware is included in the request time
+    MIDDLEWARE.insert(0, "instrumentation.middleware.InstrumentationMiddleware")
+INSTRUMENTATION_LOG_FILE = BASE_DIR / "logs" / "instrumentation.log"
@@ -0,0 +1,75 @@
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts import provisioning
+
+
+class Command(BaseCommand):
+    help = "Create users, with their profile roles, groups and permissions, from CSV or JSON Lines"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Input file, or - for stdin")
+        parser.add_argument("--format", choices=["csv", "jsonl"],
+                            help="Input format; by default from the file extension (jsonl for stdin)")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Users created per transaction")
+        parser.add_argument("--workers", type=int,
+                            help="Password hashing processes (default: one per CPU; 0 hashes in this process)")
+        parser.add_argument("--max-errors", type=int, default=100, help="Failed rows reported individually")
+        parser.add_argument("--failures", help="Also write every failed row as JSON Lines to this file")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        if options["workers"] is not None and options["workers"] < 0:
+            raise CommandError("--workers can't be negative.")
+        path = options["path"]
+        format = options["format"] or ("csv" if path.lower().endswith(".csv") else "jsonl")
+        self.failed = 0
+        self.max_errors = options["max_errors"]
+
+        try:
+            source = sys.stdin if path == "-" else open(path, encoding="utf-8", newline="")
+        except OSError as error:
+            raise CommandError(error)
+        # Failed rows are written as they fail, so they are kept if the run stops early
+        try:
+            self.failures = open(options["failures"], "w", encoding="utf-8") if options["failures"] else None
+        except OSError as error:
+            if source is not sys.stdin:
+                source.close()
+            raise CommandError(error)
+
+        started = time.perf_counter()
+        created = 0
+        try:
+            if format == "csv":
+                records = provisioning.read_csv(source)
+            else:
+                records = provisioning.read_jsonl(source, on_error=self.fail)
+            provisioner = provisioning.Provisioner(
+                batch_size=options["batch_size"], workers=options["workers"], on_error=self.fail,
+            )
+            for count in provisioner.provision(records):
+                created += count
+                if options["verbosity"] > 1:
+                    self.stdout.write(f"Created {provisioning.throughput(created, started)}")
+        finally:
+            if source is not sys.stdin:
+                source.close()
+            if self.failures:
+                self.failures.close()
+
+        self.stdout.write(self.style.SUCCESS(f"Created {provisioning.throughput(created, started)}"))
+        if self.failed:
+            self.stdout.write(self.style.WARNING(f"Failed {self.failed} row(s)."))
+
+    def fail(self, number, error):
+        self.failed += 1
+        if self.failed <= self.max_errors:
+            self.stderr.write(f"Line {number}: {error}")
+        if self.failures:
+            self.failures.write(json.dumps({"line": number, "error": str(error)}) + "\n")
+            self.failures.flush()
@@ -2,7 +2,11 @@ from django.db import models
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.conf import settings
 from django.db.models.signals import post_save
-from django.dispatch import receiver
+from django.dispatch import Signal, receiver
+
+# Sent by CustomUserManager.bulk_create(), which skips post_save, with the
+# created users; receivers create whatever post_save would have
+users_bulk_created = Signal()
 
 
 # ----------------------------
@@ -29,6 +33,11 @@ class CustomUserManager(BaseUserManager):
 
         return self.create_user(username, email, password, **extra_fields)
 
+    def bulk_create(self, objs, *args, **kwargs):
+        users = super().bulk_create(objs, *args, **kwargs)
+        users_bulk_created.send(sender=self.model, users=[user for user in users if user.pk is not None])
+        return users
+
 
 # ----------------------------
 # Custom User Model
@@ -45,10 +54,76 @@ class CustomUser(AbstractUser):
         return self.username
 
 
+# ----------------------------
+# Dirty tracking for profiles
+# ----------------------------
+class DirtyFieldsMixin:
+    """
+    Remember the concrete field values loaded from (or last saved to) the
+    database, so ``changed_fields()`` can tell which ones were modified since.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot()
+        return instance
+
+    def _snapshot(self):
+        # Deferred fields are left out: reading them would load them
+        deferred = self.get_deferred_fields()
+        self._saved_values = {
+            field.attname: getattr(self, field.attname)
+            for field in self._meta.concrete_fields
+            if field.attname not in deferred
+        }
+
+    def changed_fields(self):
+        """Names of the modified fields; None when unknown (never loaded or saved)."""
+        saved = getattr(self, "_saved_values", None)
+        if saved is None:
+            return None
+        # Fields deferred at load time count as changed once assigned
+        deferred = self.get_deferred_fields()
+        return [
+            field.attname
+            for field in self._meta.concrete_fields
+            if field.attname not in deferred
+            and (field.attname not in saved or getattr(self, field.attname) != saved[field.attname])
+        ]
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None:
+            self._snapshot()
+        elif getattr(self, "_saved_values", None) is not None:
+            # Only the fields written are clean; other changes are still pending
+            for name in update_fields:
+                attname = self._meta.get_field(name).attname
+                self._saved_values[attname] = getattr(self, attname)
+
+    def save_if_changed(self):
+        changed = self.changed_fields()
+        if changed is None:
+            self.save()
+        elif changed:
+            self.save(update_fields=changed)
+
+
+class ProfileManager(models.Manager):
+    def create_missing(self, users, **defaults):
+        """Create the profiles of ``users`` that have none, in one query."""
+        existing = set(self.filter(user__in=users).values_list("user_id", flat=True))
+        return self.bulk_create(
+            [self.model(user=user, **defaults) for user in users if user.pk not in existing]
+        )
+
+
 # ----------------------------
 # User Profile (Role management)
 # ----------------------------
-class UserProfile(models.Model):
+class UserProfile(DirtyFieldsMixin, models.Model):
     ROLE_CHOICES = [
         ("Admin", "Admin"),
         ("Librarian", "Librarian"),
@@ -62,6 +137,8 @@ class UserProfile(models.Model):
     )
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default="Member")
 
+    objects = ProfileManager()
+
     def __str__(self):
         return f"{self.user.username} - {self.role}"
 
@@ -110,7 +187,19 @@ def create_user_profile(sender, instance, created, **kwargs):
         UserProfile.objects.create(user=instance, role="Member")
 
 
+@receiver(users_bulk_created)
+def create_user_profiles(sender, users, **kwargs):
+    UserProfile.objects.create_missing(users, role="Member")
+
+
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
-def save_user_profile(sender, instance, **kwargs):
-    if hasattr(instance, "profile"):
-        instance.profile.save()
+def save_user_profile(sender, instance, created, **kwargs):
+    # Only a profile already loaded on the user can have pending changes;
+    # don't load it (e.g. on every login's last_login update) to find out
+    if created or not sender.profile.is_cached(instance):
+        return
+    try:
+        profile = instance.profile
+    except UserProfile.DoesNotExist:
+        return
+    profile.save_if_changed()
@@ -0,0 +1,244 @@
+"""
+Bulk creation of users, with their profile roles, groups and permissions.
+
+Records come from CSV (with a header row) or JSON Lines, one user each::
+
+    {"username": "alice", "email": "alice@example.com", "password": "...",
+     "first_name": "Alice", "last_name": "Smith", "role": "Librarian",
+     "groups": ["Librarians"], "permissions": ["bookshelf.can_view"]}
+
+In CSV, ``groups`` and ``permissions`` are ``;``-separated. Only
+``username`` is required; users without a password get an unusable one.
+
+Passwords are hashed in a process pool, since the hasher is deliberately
+slow and dominates the cost of creating a user. Users are written with
+``bulk_create`` per batch, which sends ``users_bulk_created`` so the profiles
+are created in bulk too; roles, groups and permissions are then set with one
+query per role and one ``bulk_create`` per relation. Invalid records, and
+records whose username is taken, are passed to ``on_error`` and skipped.
+"""
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import django
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, Permission
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .models import UserProfile
+
+USER_FIELDS = ("username", "email", "first_name", "last_name")
+ROLES = {value for value, label in UserProfile.ROLE_CHOICES}
+DEFAULT_ROLE = "Member"
+
+
+class InvalidRecord(ValueError):
+    pass
+
+
+def read_csv(lines):
+    """Yield (line number, record) for each row of CSV ``lines``."""
+    reader = csv.DictReader(lines)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def read_jsonl(lines, on_error=None):
+    """Yield (line number, record) for each JSON object line; others go to ``on_error``."""
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise InvalidRecord("expected a JSON object")
+        except ValueError as error:
+            if on_error:
+                on_error(number, error)
+            continue
+        yield number, record
+
+
+def throughput(count, started):
+    """'<count> user(s) in <seconds>s (<rate> users/s).' since ``started`` (a perf_counter value)."""
+    elapsed = time.perf_counter() - started
+    return f"{count} user(s) in {elapsed:.1f}s ({count / max(elapsed, 1e-9):.0f} users/s)."
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _names(value):
+    if value is None or value == "":
+        return []
+    if isinstance(value, str):
+        value = value.split(";")
+    if not isinstance(value, list) or not all(isinstance(name, str) for name in value):
+        raise InvalidRecord("groups and permissions must be lists of names")
+    return list(dict.fromkeys(name.strip() for name in value if name.strip()))
+
+
+def _parse(record):
+    """The user fields, password, role, group names and permission names of a record, as a dict."""
+    User = get_user_model()
+    fields = {}
+    for name in USER_FIELDS:
+        value = record.get(name) or ""
+        if not isinstance(value, str):
+            raise InvalidRecord(f"{name} must be a string")
+        value = value.strip()
+        # As create_user() stores them
+        if name == "username":
+            value = User.normalize_username(value)
+        elif name == "email":
+            value = User.objects.normalize_email(value)
+        try:
+            # Empty values skip the validators; username is checked below
+            User._meta.get_field(name).run_validators(value)
+        except ValidationError as error:
+            raise InvalidRecord(f"{name}: {' '.join(error.messages)}")
+        fields[name] = value
+    if not fields["username"]:
+        raise InvalidRecord("username is required")
+    password = record.get("password") or None
+    if password is not None and not isinstance(password, str):
+        raise InvalidRecord("password must be a string")
+    role = record.get("role") or DEFAULT_ROLE
+    if not isinstance(role, str):
+        raise InvalidRecord("role must be a string")
+    role = role.strip()
+    if role not in ROLES:
+        raise InvalidRecord(f"unknown role {role!r}")
+    return {
+        "fields": fields,
+        "password": password,
+        "role": role,
+        "groups": _names(record.get("groups")),
+        "permissions": _names(record.get("permissions")),
+    }
+
+
+class Provisioner:
+    """
+    Create users from (line number, record) pairs in batches; see the module
+    docstring. ``workers`` is the size of the hashing pool (0 hashes in this
+    process). Failures go to ``on_error(line number, error)``.
+    """
+
+    def __init__(self, batch_size=1000, workers=None, on_error=None):
+        self.batch_size = batch_size
+        self.workers = os.cpu_count() if workers is None else workers
+        self.on_error = on_error
+        self.groups = {}
+        self.permissions = {}
+        self.seen = set()
+
+    def fail(self, number, error):
+        if self.on_error:
+            self.on_error(number, error)
+
+    def provision(self, records):
+        """Yield the number of users created by each batch."""
+        if self.workers == 0:
+            for batch in batched(records, self.batch_size):
+                yield self._provision_batch(batch, lambda passwords: list(map(make_password, passwords)))
+            return
+        with ProcessPoolExecutor(self.workers, initializer=django.setup) as pool:
+            def hash_passwords(passwords):
+                chunksize = max(len(passwords) // (4 * self.workers), 1)
+                return list(pool.map(make_password, passwords, chunksize=chunksize))
+
+            for batch in batched(records, self.batch_size):
+                yield self._provision_batch(batch, hash_passwords)
+
+    def _load(self, group_names, permission_names):
+        missing = group_names - self.groups.keys()
+        if missing:
+            self.groups.update(Group.objects.filter(name__in=missing).values_list("name", "pk"))
+        missing = permission_names - self.permissions.keys()
+        if missing:
+            codenames = {name.partition(".")[2] for name in missing}
+            perms = Permission.objects.filter(codename__in=codenames).values_list(
+                "content_type__app_label", "codename", "pk"
+            )
+            self.permissions.update((f"{app_label}.{codename}", pk) for app_label, codename, pk in perms)
+
+    def _provision_batch(self, batch, hash_passwords):
+        User = get_user_model()
+        rows = []
+        for number, record in batch:
+            try:
+                rows.append((number, _parse(record)))
+            except InvalidRecord as error:
+                self.fail(number, error)
+
+        self._load(
+            {name for _, row in rows for name in row["groups"]},
+            {name for _, row in rows for name in row["permissions"]},
+        )
+        usernames = [row["fields"]["username"] for _, row in rows]
+        taken = set(User.objects.filter(username__in=usernames).values_list("username", flat=True))
+        valid = []
+        for number, row in rows:
+            username = row["fields"]["username"]
+            unknown = [name for name in row["groups"] if name not in self.groups]
+            unknown += [name for name in row["permissions"] if name not in self.permissions]
+            if username in taken or username in self.seen:
+                self.fail(number, InvalidRecord(f"username {username!r} already exists"))
+            elif unknown:
+                self.fail(number, InvalidRecord(f"unknown group or permission {unknown[0]!r}"))
+            else:
+                self.seen.add(username)
+                valid.append(row)
+        if not valid:
+            return 0
+
+        passwords = hash_passwords([row["password"] for row in valid])
+        users = [User(**row["fields"], password=password) for row, password in zip(valid, passwords)]
+        with transaction.atomic():
+            User.objects.bulk_create(users)
+            self._set_roles(users, [row["role"] for row in valid])
+            _link(User.groups, users, [[self.groups[name] for name in row["groups"]] for row in valid])
+            _link(User.user_permissions, users,
+                  [[self.permissions[name] for name in row["permissions"]] for row in valid])
+        return len(users)
+
+    def _set_roles(self, users, roles):
+        # users_bulk_created gave every user profiles with the default role
+        by_role = {}
+        for user, role in zip(users, roles):
+            if role != DEFAULT_ROLE:
+                by_role.setdefault(role, []).append(user.pk)
+        for profile_model in _profile_models():
+            for role, user_ids in by_role.items():
+                profile_model.objects.filter(user__in=user_ids).update(role=role)
+
+
+def _profile_models():
+    """The models with a role and a one-to-one link to the user model."""
+    return [
+        relation.related_model
+        for relation in get_user_model()._meta.related_objects
+        if relation.one_to_one and any(field.name == "role" for field in relation.related_model._meta.fields)
+    ]
+
+
+def _link(descriptor, users, target_ids):
+    """Bulk-create the m2m rows of ``descriptor`` (e.g. User.groups) linking each user to its targets."""
+    through = descriptor.through
+    user_field = descriptor.field.m2m_field_name()
+    target_field = descriptor.field.m2m_reverse_field_name()
+    through.objects.bulk_create([
+        through(**{f"{user_field}_id": user.pk, f"{target_field}_id": target_id})
+        for user, ids in zip(users, target_ids)
+        for target_id in ids
+    ])
@@ -1,3 +1,173 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.management import call_command
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+
+from relationship_app.models import UserProfile as RelationshipProfile
+
+from .models import UserProfile
+
+
+class ProfileSyncTests(TestCase):
+    """
+    Saving a user writes its profiles only when they were changed, and
+    bulk-created users get their profiles too.
+    """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("member", password="pass")
+
+    def profile_queries(self, queries):
+        return [q["sql"] for q in queries.captured_queries if "userprofile" in q["sql"]]
+
+    def test_login_does_not_touch_profiles(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(self.client.login(username="member", password="pass"))
+        self.assertEqual(self.profile_queries(queries), [])
+        # The user is read once and its last_login updated, nothing else
+        user_queries = [q["sql"] for q in queries.captured_queries if "accounts_customuser" in q["sql"]]
+        self.assertEqual(len(user_queries), 2)
+
+    def test_unchanged_profile_is_not_saved(self):
+        user = get_user_model().objects.get(pk=self.user.pk)
+        self.assertEqual(user.profile.role, "Member")
+        with CaptureQueriesContext(connection) as queries:
+            user.save()
+        self.assertEqual(self.profile_queries(queries), [])
+
+    def test_changed_profile_is_saved(self):
+        user = get_user_model().objects.get(pk=self.user.pk)
+        user.profile.role = "Librarian"
+        with CaptureQueriesContext(connection) as queries:
+            user.save()
+        self.assertEqual(len(self.profile_queries(queries)), 1)
+        self.assertEqual(UserProfile.objects.get(user=user).role, "Librarian")
+
+    def test_changed_relationship_profile_is_saved(self):
+        user = get_user_model().objects.get(pk=self.user.pk)
+        user.relationship_profile.role = "Admin"
+        with CaptureQueriesContext(connection) as queries:
+            user.save()
+        # Only the relationship_app profile was loaded and changed
+        self.assertEqual(len(self.profile_queries(queries)), 1)
+        self.assertEqual(RelationshipProfile.objects.get(user=user).role, "Admin")
+
+    def test_fields_left_out_of_update_fields_stay_changed(self):
+        profile = UserProfile.objects.get(user=self.user)
+        profile.role = "Librarian"
+        profile.save(update_fields=["user"])
+        self.assertEqual(profile.changed_fields(), ["role"])
+        profile.save_if_changed()
+        self.assertEqual(profile.changed_fields(), [])
+        self.assertEqual(UserProfile.objects.get(user=self.user).role, "Librarian")
+
+    def test_missing_profile(self):
+        UserProfile.objects.filter(user=self.user).delete()
+        user = get_user_model().objects.get(pk=self.user.pk)
+        with self.assertRaises(UserProfile.DoesNotExist):
+            user.profile
+        user.save()
+
+    def test_bulk_created_users_get_profiles(self):
+        User = get_user_model()
+        users = User.objects.bulk_create([User(username=f"bulk{i}") for i in range(3)])
+        self.assertEqual(UserProfile.objects.filter(user__in=users, role="Member").count(), 3)
+        self.assertEqual(users[0].relationship_profile.role, "Member")
+
+
+class ProvisionUsersTests(TestCase):
+    """
+    provision_users creates users with hashed passwords, profile roles,
+    groups and permissions, and reports the rows it could not create.
+    """
+
+    def setUp(self):
+        self.group = Group.objects.create(name="Librarians")
+        get_user_model().objects.create_user("taken")
+
+    def provision(self, content, suffix, *args):
+        with tempfile.NamedTemporaryFile("w", suffix=suffix, delete=False) as source:
+            source.write(content)
+        self.addCleanup(os.remove, source.name)
+        stdout, stderr = StringIO(), StringIO()
+        call_command("provision_users", source.name, *args, stdout=stdout, stderr=stderr)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_csv(self):
+        stdout, stderr = self.provision(
+            "username,email,password,role,groups,permissions\n"
+            "alice,alice@example.com,s3cret-pass,Librarian,Librarians,auth.view_group;auth.add_group\n"
+            "bob,,,,,\n"
+            "taken,,,,,\n"
+            "carol,,,Owner,,\n",
+            ".csv", "--workers", "1",
+        )
+        self.assertIn("Created 2 user(s)", stdout)
+        self.assertIn("Failed 2 row(s)", stdout)
+        self.assertIn("Line 4: username 'taken' already exists", stderr)
+        self.assertIn("Line 5: unknown role 'Owner'", stderr)
+
+        alice = get_user_model().objects.get(username="alice")
+        self.assertTrue(alice.check_password("s3cret-pass"))
+        self.assertEqual(alice.profile.role, "Librarian")
+        self.assertEqual(alice.relationship_profile.role, "Librarian")
+        self.assertEqual(list(alice.groups.all()), [self.group])
+        self.assertTrue(alice.has_perm("auth.add_group"))
+        bob = get_user_model().objects.get(username="bob")
+        self.assertFalse(bob.has_usable_password())
+        self.assertEqual(bob.profile.role, "Member")
+
+    def test_jsonl_in_batches(self):
+        lines = [json.dumps({"username": f"user{i}", "password": "pass", "groups": ["Librarians"]}) for i in range(5)]
+        lines += ["not json", json.dumps({"username": "user0"}), json.dumps({"username": "dave", "groups": ["Nope"]})]
+        with tempfile.NamedTemporaryFile("r", suffix=".jsonl", delete=False) as failures:
+            pass
+        self.addCleanup(os.remove, failures.name)
+        stdout, stderr = self.provision(
+            "\n".join(lines) + "\n", ".jsonl", "--workers", "0", "--batch-size", "2", "--failures", failures.name,
+        )
+        self.assertIn("Created 5 user(s)", stdout)
+        self.assertEqual(self.group.user_set.count(), 5)
+        with open(failures.name, encoding="utf-8") as output:
+            self.assertEqual([json.loads(line)["line"] for line in output], [6, 7, 8])
+
+    def test_invalid_fields(self):
+        lines = [
+            json.dumps({"username": "bad name!"}),
+            json.dumps({"username": "erin", "email": "not-an-email"}),
+            json.dumps({"username": "x" * 151}),
+            json.dumps({"username": "frank", "role": 5}),
+            json.dumps({"username": "grace", "email": "grace@example.com"}),
+        ]
+        stdout, stderr = self.provision("\n".join(lines) + "\n", ".jsonl", "--workers", "0")
+        self.assertIn("Created 1 user(s)", stdout)
+        self.assertIn("Line 1: username: Enter a valid username.", stderr)
+        self.assertIn("Line 2: email: Enter a valid email address.", stderr)
+        self.assertIn("Line 3: username: Ensure this value has at most 150 characters", stderr)
+        self.assertIn("Line 4: role must be a string", stderr)
+
+    def test_fields_are_normalized(self):
+        # A fullwidth "ｉ" and a mixed-case email domain
+        self.provision(json.dumps({"username": "\uff49van", "email": "Ivan@Example.COM"}) + "\n", ".jsonl",
+                       "--workers", "0")
+        user = get_user_model().objects.get(username="ivan")
+        self.assertEqual(user.email, "Ivan@example.com")
 
-# Create your tests here.
+    def test_failures_are_kept_when_the_run_stops(self):
+        lines = [json.dumps({"username": "bad name!"}), json.dumps({"username": "henry", "password": "pass"})]
+        with tempfile.NamedTemporaryFile("r", suffix=".jsonl", delete=False) as failures:
+            pass
+        self.addCleanup(os.remove, failures.name)
+        with mock.patch("accounts.provisioning.make_password", side_effect=RuntimeError("hashing failed")):
+            with self.assertRaises(RuntimeError):
+                self.provision("\n".join(lines) + "\n", ".jsonl", "--workers", "0", "--failures", failures.name)
+        with open(failures.name, encoding="utf-8") as output:
+            self.assertEqual([json.loads(line)["line"] for line in output], [1])
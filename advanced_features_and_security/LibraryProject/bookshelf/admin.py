@@ -1,24 +1,9 @@
 from django.contrib import admin
-from django.contrib.auth.admin import UserAdmin
-from .models import CustomUser, Book
-
-
-# ----------------------------
-# Custom User Admin
-# ----------------------------
-class CustomUserAdmin(UserAdmin):
-    model = CustomUser
-    list_display = ["username", "email", "date_of_birth", "is_staff", "is_superuser"]
-    fieldsets = UserAdmin.fieldsets + (
-        (None, {"fields": ("date_of_birth", "profile_photo")}),
-    )
-    add_fieldsets = UserAdmin.add_fieldsets + (
-        (None, {"fields": ("date_of_birth", "profile_photo")}),
-    )
+from .models import Book
 
 
 # ----------------------------
 # Register Models
 # ----------------------------
-admin.site.register(CustomUser, CustomUserAdmin)
+# CustomUser is registered by accounts/admin.py
 admin.site.register(Book)
@@ -0,0 +1,160 @@
+"""
+Authentication backend that keeps permission sets in the cache.
+
+ModelBackend loads a user's permissions with two joined queries the first
+time a request checks one. CachedPermissionBackend keeps them in the default
+cache instead: per user, the user's own permissions and group ids; per group,
+the group's permissions. A warm permission check issues no queries.
+
+m2m_changed on User.user_permissions, User.groups and Group.permissions
+drops the affected entries. When the affected users or groups are unknown
+(e.g. ``group.user_set.clear()``) or a permission is deleted, a generation
+that is part of every key is bumped instead, so all entries go at once.
+The signals only reach the cache, so it has to be shared by all workers
+(CACHES in settings): with a per-process cache, other workers would keep
+revoked permissions for up to PERMISSION_CACHE_TIMEOUT.
+
+django-models/LibraryProject carries the same backend in
+relationship_app/backends.py. The copy is deliberate: each project is a
+standalone Django project with its own settings and user model, so keep
+the two in sync rather than importing one from the other.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete
+from django.dispatch import receiver
+
+GENERATION_KEY = "auth:perms:generation"
+
+
+def timeout():
+    return getattr(settings, "PERMISSION_CACHE_TIMEOUT", 300)
+
+
+def generation():
+    value = cache.get(GENERATION_KEY)
+    if value is None:
+        cache.add(GENERATION_KEY, 1, timeout=None)
+        value = cache.get(GENERATION_KEY, 1)
+    return value
+
+
+def user_key(user_id, gen):
+    return f"auth:perms:{gen}:user:{user_id}"
+
+
+def group_key(group_id, gen):
+    return f"auth:perms:{gen}:group:{group_id}"
+
+
+def bump_generation():
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.add(GENERATION_KEY, 2, timeout=None)
+
+
+def _delete(keys):
+    # Again after the commit, so a request that read the old permissions in
+    # the meantime does not keep them cached
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def forget_users(user_ids):
+    gen = generation()
+    _delete([user_key(user_id, gen) for user_id in user_ids])
+
+
+def forget_groups(group_ids):
+    gen = generation()
+    _delete([group_key(group_id, gen) for group_id in group_ids])
+
+
+class CachedPermissionBackend(ModelBackend):
+    """ModelBackend with the permission sets of users and groups cached."""
+
+    def _user_entry(self, user_obj):
+        """(user permissions, group ids) of ``user_obj``, kept on it for the request."""
+        if not hasattr(user_obj, "_perm_entry"):
+            user_obj._perm_generation = generation()
+            key = user_key(user_obj.pk, user_obj._perm_generation)
+            entry = cache.get(key)
+            if entry is None:
+                perms = user_obj.user_permissions.values_list("content_type__app_label", "codename")
+                entry = (
+                    {f"{app_label}.{codename}" for app_label, codename in perms},
+                    list(user_obj.groups.values_list("pk", flat=True)),
+                )
+                cache.set(key, entry, timeout())
+            user_obj._perm_entry = entry
+        return user_obj._perm_entry
+
+    def _cacheable(self, user_obj, obj):
+        # Superusers have every permission; leave them to ModelBackend
+        return user_obj.is_active and not user_obj.is_anonymous and obj is None and not user_obj.is_superuser
+
+    def get_user_permissions(self, user_obj, obj=None):
+        if not self._cacheable(user_obj, obj):
+            return super().get_user_permissions(user_obj, obj)
+        if not hasattr(user_obj, "_user_perm_cache"):
+            user_obj._user_perm_cache = self._user_entry(user_obj)[0]
+        return user_obj._user_perm_cache
+
+    def get_group_permissions(self, user_obj, obj=None):
+        if not self._cacheable(user_obj, obj):
+            return super().get_group_permissions(user_obj, obj)
+        if not hasattr(user_obj, "_group_perm_cache"):
+            group_ids = self._user_entry(user_obj)[1]
+            gen = user_obj._perm_generation
+            keys = {group_key(group_id, gen): group_id for group_id in group_ids}
+            found = {keys[key]: perms for key, perms in cache.get_many(keys).items()}
+            missing = [group_id for group_id in group_ids if group_id not in found]
+            if missing:
+                loaded = {group_id: set() for group_id in missing}
+                perms = Permission.objects.filter(group__in=missing).values_list(
+                    "group", "content_type__app_label", "codename"
+                )
+                for group_id, app_label, codename in perms:
+                    loaded[group_id].add(f"{app_label}.{codename}")
+                cache.set_many({group_key(group_id, gen): perms for group_id, perms in loaded.items()}, timeout())
+                found.update(loaded)
+            user_obj._group_perm_cache = set().union(*found.values())
+        return user_obj._group_perm_cache
+
+
+# ----------------------------
+# Signals: Forget cached permissions when they change
+# ----------------------------
+@receiver(m2m_changed)
+def permissions_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    User = get_user_model()
+    if sender in (User.user_permissions.through, User.groups.through):
+        forget = forget_users
+    elif sender is Group.permissions.through:
+        forget = forget_groups
+    else:
+        return
+    if not reverse:
+        forget([instance.pk])
+    elif pk_set is None:
+        # A reverse clear(): the affected rows are gone
+        bump_generation()
+    else:
+        forget(pk_set)
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    forget_groups([instance.pk])
+
+
+@receiver(post_delete, sender=Permission)
+def permission_deleted(sender, instance, **kwargs):
+    bump_generation()
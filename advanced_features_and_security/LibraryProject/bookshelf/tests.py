@@ -1,3 +1,80 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import SimpleTestCase, TestCase, override_settings
 
-# Create your tests here.
+from .backends import CachedPermissionBackend
+
+# For tests counting the app's own queries, which a database cache's
+# lookups would add to
+LOCAL_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+class CacheSettingsTests(SimpleTestCase):
+    def test_cache_is_shared_between_workers(self):
+        # A per-process cache would keep revoked permissions and roles in
+        # other workers
+        self.assertNotIsInstance(caches["default"], LocMemCache)
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class PermissionCacheTests(TestCase):
+    """
+    Permission sets come from the cache after the first check and are
+    dropped when user, group or group permission assignments change.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.view = Permission.objects.get(codename="can_view")
+        self.edit = Permission.objects.get(codename="can_edit")
+        self.group = Group.objects.create(name="Editors")
+        self.group.permissions.add(self.edit)
+        self.user = get_user_model().objects.create_user("reader", password="pass")
+        self.user.user_permissions.add(self.view)
+
+    def fresh_user(self):
+        # Permissions are also kept on the user object, as by ModelBackend
+        return get_user_model().objects.get(pk=self.user.pk)
+
+    def test_runs_against_the_custom_user_model(self):
+        self.assertEqual(get_user_model()._meta.label, "accounts.CustomUser")
+        self.assertTrue(self.fresh_user().has_perm("bookshelf.can_view"))
+
+    def test_warm_check_issues_no_queries(self):
+        user = self.fresh_user()
+        with self.assertNumQueries(2):  # user permissions and groups
+            self.assertTrue(user.has_perm("bookshelf.can_view"))
+        user = self.fresh_user()
+        with self.assertNumQueries(0):
+            self.assertTrue(user.has_perm("bookshelf.can_view"))
+            self.assertFalse(user.has_perm("bookshelf.can_edit"))
+
+    def test_user_and_group_changes_are_seen(self):
+        self.assertFalse(self.fresh_user().has_perm("bookshelf.can_edit"))
+
+        self.user.groups.add(self.group)
+        self.assertTrue(self.fresh_user().has_perm("bookshelf.can_edit"))
+
+        self.group.permissions.remove(self.edit)
+        self.assertFalse(self.fresh_user().has_perm("bookshelf.can_edit"))
+
+        self.edit.group_set.add(self.group)
+        self.assertTrue(self.fresh_user().has_perm("bookshelf.can_edit"))
+
+        self.group.user_set.clear()
+        self.assertFalse(self.fresh_user().has_perm("bookshelf.can_edit"))
+
+        self.user.user_permissions.remove(self.view)
+        self.assertFalse(self.fresh_user().has_perm("bookshelf.can_view"))
+
+    def test_same_permissions_as_model_backend(self):
+        self.user.groups.add(self.group)
+        user = self.fresh_user()
+        self.assertEqual(
+            CachedPermissionBackend().get_all_permissions(user),
+            {"bookshelf.can_view", "bookshelf.can_edit"},
+        )
+        user.is_active = False
+        self.assertEqual(CachedPermissionBackend().get_all_permissions(user), set())
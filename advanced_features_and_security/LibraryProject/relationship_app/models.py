@@ -1,12 +1,45 @@
 from django.db import models
 from django.conf import settings
-from django.db.models.signals import post_save
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
+# Needs accounts installed: its CustomUser is AUTH_USER_MODEL and sends users_bulk_created
+from accounts.models import DirtyFieldsMixin, ProfileManager, users_bulk_created
+
+
+def role_cache_key(user_id):
+    return f"relationship_app:role:{user_id}"
+
+
+def book_count_cache_key(library_id):
+    return f"relationship_app:library:{library_id}:book_count"
+
+
+class UserProfileManager(ProfileManager):
+    def role_for(self, user):
+        """
+        The role of ``user`` (None without a profile), looked up once per
+        request: it is kept on the user object and, across requests, in the
+        cache shared by the workers (CACHES) until the profile changes.
+        """
+        if not user.is_authenticated:
+            return None
+        if not hasattr(user, "_role"):
+            key = role_cache_key(user.pk)
+            role = cache.get(key)
+            if role is None:
+                # "" caches "no profile"
+                role = self.filter(user=user).values_list("role", flat=True).first() or ""
+                cache.set(key, role, getattr(settings, "ROLE_CACHE_TIMEOUT", 300))
+            user._role = role or None
+        return user._role
+
+
 # ----------------------------
 # User Profile (Role management)
 # ----------------------------
-class UserProfile(models.Model):
+class UserProfile(DirtyFieldsMixin, models.Model):
     ROLE_CHOICES = [
         ("Admin", "Admin"),
         ("Librarian", "Librarian"),
@@ -20,6 +53,8 @@ class UserProfile(models.Model):
     )
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default="Member")
 
+    objects = UserProfileManager()
+
     def __str__(self):
         return f"{self.user.username} - {self.role}"
 
@@ -34,11 +69,19 @@ class Library(models.Model):
     def __str__(self):
         return self.name
 
+    def cached_book_count(self):
+        """The number of books in the library, cached until one is added, moved or deleted."""
+        return cache.get_or_set(
+            book_count_cache_key(self.pk),
+            lambda: Book.objects.filter(library=self).count(),
+            getattr(settings, "BOOK_COUNT_CACHE_TIMEOUT", 300),
+        )
+
 
 # ----------------------------
 # Book Model with Permissions
 # ----------------------------
-class Book(models.Model):
+class Book(DirtyFieldsMixin, models.Model):
     title = models.CharField(max_length=200)
     author = models.CharField(max_length=100)
     library = models.ForeignKey(
@@ -57,6 +100,11 @@ class Book(models.Model):
             ("can_change_book", "Can change a book"),
             ("can_delete_book", "Can delete a book"),
         ]
+        indexes = [
+            # Keyset pagination of the book listings (see pagination.py)
+            models.Index(fields=["title", "id"], name="rel_book_title_idx"),
+            models.Index(fields=["library", "title", "id"], name="rel_book_library_title_idx"),
+        ]
 
 
 # ----------------------------
@@ -68,7 +116,43 @@ def create_relationship_profile(sender, instance, created, **kwargs):
         UserProfile.objects.create(user=instance, role="Member")
 
 
+@receiver(users_bulk_created)
+def create_relationship_profiles(sender, users, **kwargs):
+    UserProfile.objects.create_missing(users, role="Member")
+
+
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
-def save_relationship_profile(sender, instance, **kwargs):
-    if hasattr(instance, "relationship_profile"):
-        instance.relationship_profile.save()
+def save_relationship_profile(sender, instance, created, **kwargs):
+    # Only a profile already loaded on the user can have pending changes
+    if created or not sender.relationship_profile.is_cached(instance):
+        return
+    try:
+        profile = instance.relationship_profile
+    except UserProfile.DoesNotExist:
+        return
+    profile.save_if_changed()
+
+
+# ----------------------------
+# Signals: Forget cached roles when a profile changes
+# (queryset.update() bypasses these; call cache.delete(role_cache_key(...)))
+# ----------------------------
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def forget_role(sender, instance, **kwargs):
+    cache.delete(role_cache_key(instance.user_id))
+    if UserProfile.user.is_cached(instance):
+        instance.user.__dict__.pop("_role", None)
+
+
+# ----------------------------
+# Signals: Forget cached book counts when books come, go or move
+# (queryset.update() and bulk_create() bypass these; the counts expire)
+# ----------------------------
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+def forget_book_counts(sender, instance, **kwargs):
+    # The snapshot still holds the library the book was in before this save
+    previous = getattr(instance, "_saved_values", {}).get("library_id")
+    library_ids = {instance.library_id, previous} - {None}
+    cache.delete_many([book_count_cache_key(library_id) for library_id in library_ids])
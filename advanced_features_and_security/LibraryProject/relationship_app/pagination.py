@@ -0,0 +1,97 @@
+"""
+Cursor (keyset) pagination for the book listings.
+
+A page is requested relative to a cursor, the ``(title, id)`` of the last
+book shown (``?after=``) or of the first one (``?before=``), and fetched
+with an indexed range query, so every page costs the same however deep it
+is. There are no page numbers; the total is only counted when a template
+asks for ``paginator.count``, and views can supply a cached one.
+
+django-models/LibraryProject has the same module and templates in
+its relationship_app. Each project is standalone, so the copy is
+deliberate; keep the two in sync.
+"""
+import base64
+import json
+
+from django.db.models import Q
+from django.http import Http404
+from django.utils.functional import cached_property
+
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        title, pk = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return str(title), int(pk)
+    except (TypeError, ValueError):
+        raise Http404("Invalid page cursor.")
+
+
+class CursorPage:
+    def __init__(self, object_list, paginator, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """Paginate a Book queryset by title, keyed on (title, id)."""
+
+    def __init__(self, queryset, per_page, count=None):
+        self.queryset = queryset
+        self.per_page = per_page
+        self._count = count
+
+    @cached_property
+    def count(self):
+        count = self._count() if callable(self._count) else self._count
+        return self.queryset.count() if count is None else count
+
+    def _cursor(self, book):
+        return encode_cursor([book.title, book.pk])
+
+    def page(self, after=None, before=None):
+        queryset = self.queryset
+        if before:
+            title, pk = decode_cursor(before)
+            rows = list(queryset.filter(
+                Q(title__lt=title) | Q(title=title, pk__lt=pk)
+            ).order_by("-title", "-pk")[:self.per_page + 1])
+            has_more = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            has_next, has_previous = True, has_more
+        else:
+            if after:
+                title, pk = decode_cursor(after)
+                queryset = queryset.filter(Q(title__gt=title) | Q(title=title, pk__gt=pk))
+            rows = list(queryset.order_by("title", "pk")[:self.per_page + 1])
+            has_next, has_previous = len(rows) > self.per_page, bool(after)
+            rows = rows[:self.per_page]
+        if not rows:
+            return CursorPage([], self)
+        return CursorPage(
+            rows,
+            self,
+            next_cursor=self._cursor(rows[-1]) if has_next else None,
+            previous_cursor=self._cursor(rows[0]) if has_previous else None,
+        )
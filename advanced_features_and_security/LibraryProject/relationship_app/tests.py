@@ -1,3 +1,123 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.urls import reverse
 
-# Create your tests here.
+from .models import Book, Library, UserProfile
+from .views import BOOKS_PER_PAGE
+
+# For tests counting the app's own queries, which a database cache's
+# lookups would add to
+LOCAL_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class RoleCacheTests(TestCase):
+    """
+    Role checks look the profile up once, then serve the role from the
+    cache until the profile changes.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user("member", password="pass")
+        self.client.force_login(self.user)
+
+    def get(self, name):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(name), secure=True)
+        profile_queries = [q for q in queries.captured_queries if "relationship_app_userprofile" in q["sql"]]
+        return response, len(profile_queries)
+
+    def test_warm_role_check_adds_no_queries(self):
+        response, profile_queries = self.get("member_view")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(profile_queries, 1)
+
+        response, profile_queries = self.get("member_view")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(profile_queries, 0)
+
+    def test_role_change_is_seen(self):
+        self.assertEqual(self.get("admin_view")[0].status_code, 302)
+
+        profile = UserProfile.objects.get(user=self.user)
+        profile.role = "Admin"
+        profile.save()
+
+        self.assertEqual(self.get("admin_view")[0].status_code, 200)
+        self.assertEqual(self.get("member_view")[0].status_code, 302)
+
+    def test_role_is_kept_on_the_user(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(UserProfile.objects.role_for(self.user), "Member")
+            cache.clear()
+            self.assertEqual(UserProfile.objects.role_for(self.user), "Member")
+
+    def test_missing_profile(self):
+        UserProfile.objects.filter(user=self.user).delete()
+        cache.clear()
+        self.assertEqual(self.get("member_view")[0].status_code, 302)
+        self.assertEqual(self.get("member_view")[1], 0)
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class BookListingTests(TestCase):
+    """
+    The library detail and book list pages show one page of books with a
+    constant number of queries, however many books there are.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.library = Library.objects.create(name="Central", location="Main St")
+        self.other = Library.objects.create(name="Branch", location="High St")
+        Book.objects.bulk_create(
+            [Book(title=f"Book {i:03}", author=f"Author {i}", library=self.library) for i in range(BOOKS_PER_PAGE + 20)]
+            + [Book(title="Elsewhere", author="Someone", library=self.other)]
+        )
+
+    def get(self, url, **params):
+        response = self.client.get(url, params, secure=True)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_library_detail_pages(self):
+        url = reverse("library_detail", args=[self.library.pk])
+        with self.assertNumQueries(3):  # library, page of books, count
+            response = self.get(url)
+        self.assertContains(response, f"({BOOKS_PER_PAGE + 20})")
+        self.assertEqual(len(response.context["books"]), BOOKS_PER_PAGE)
+        with self.assertNumQueries(2):  # the count is cached
+            self.get(url)
+
+        next_page = self.get(url, after=response.context["page_obj"].next_cursor)
+        titles = [book.title for book in next_page.context["books"]]
+        self.assertEqual(titles, [f"Book {i:03}" for i in range(BOOKS_PER_PAGE, BOOKS_PER_PAGE + 20)])
+        self.assertFalse(next_page.context["page_obj"].has_next())
+
+        previous_page = self.get(url, before=next_page.context["page_obj"].previous_cursor)
+        self.assertEqual(list(previous_page.context["books"]), list(response.context["books"]))
+
+    def test_book_count_follows_changes(self):
+        url = reverse("library_detail", args=[self.library.pk])
+        self.assertContains(self.get(url), f"({BOOKS_PER_PAGE + 20})")
+        book = Book.objects.create(title="New", author="Someone", library=self.library)
+        self.assertContains(self.get(url), f"({BOOKS_PER_PAGE + 21})")
+        book = Book.objects.get(pk=book.pk)
+        book.library = self.other
+        book.save()
+        self.assertContains(self.get(url), f"({BOOKS_PER_PAGE + 20})")
+        self.assertContains(self.get(reverse("library_detail", args=[self.other.pk])), "(2)")
+
+    def test_list_books(self):
+        with self.assertNumQueries(1):
+            response = self.get(reverse("list_books"))
+        self.assertContains(response, "Book 000 by Author 0 (Central)")
+        self.assertTrue(response.context["page_obj"].has_next())
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse("list_books"), {"after": "nonsense"}, secure=True)
+        self.assertEqual(response.status_code, 404)
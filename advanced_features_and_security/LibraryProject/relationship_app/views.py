@@ -3,20 +3,23 @@ from django.contrib.auth.decorators import user_passes_test, permission_required
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib import messages
 from django.views.generic.detail import DetailView
-from .models import Book, Library
+from .models import Book, Library, UserProfile
 from .forms import BookForm
+from .pagination import KeysetPaginator
+
+BOOKS_PER_PAGE = 50
 
 # ----------------------------
-# Role helpers
+# Role helpers (cached, see UserProfileManager.role_for)
 # ----------------------------
 def is_admin(user):
-    return hasattr(user, "relationship_profile") and user.relationship_profile.role == "Admin"
+    return UserProfile.objects.role_for(user) == "Admin"
 
 def is_librarian(user):
-    return hasattr(user, "relationship_profile") and user.relationship_profile.role == "Librarian"
+    return UserProfile.objects.role_for(user) == "Librarian"
 
 def is_member(user):
-    return hasattr(user, "relationship_profile") and user.relationship_profile.role == "Member"
+    return UserProfile.objects.role_for(user) == "Member"
 
 # ----------------------------
 # Role-based views
@@ -85,16 +88,36 @@ def register_view(request):
     return render(request, "relationship_app/register.html", {"form": form})
 
 # ----------------------------
-# List all books
+# List all books (a page at a time, see pagination.py)
 # ----------------------------
 def list_books(request):
-    books = Book.objects.all()
-    return render(request, "relationship_app/list_books.html", {"books": books})
+    books = Book.objects.select_related("library").only("title", "author", "library__name")
+    page = KeysetPaginator(books, BOOKS_PER_PAGE).page(
+        after=request.GET.get("after"), before=request.GET.get("before")
+    )
+    return render(request, "relationship_app/list_books.html", {
+        "books": page,
+        "page_obj": page,
+        "is_paginated": page.has_other_pages(),
+    })
 
 # ----------------------------
-# Library Detail View
+# Library Detail View (books a page at a time, with a cached total)
 # ----------------------------
 class LibraryDetailView(DetailView):
     model = Library
     template_name = "relationship_app/library_detail.html"
     context_object_name = "library"
+
+    def get_queryset(self):
+        return Library.objects.only("name", "location")
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        library = self.object
+        books = Book.objects.filter(library=library).only("title", "author")
+        page = KeysetPaginator(books, BOOKS_PER_PAGE, count=library.cached_book_count).page(
+            after=self.request.GET.get("after"), before=self.request.GET.get("before")
+        )
+        context.update(books=page, page_obj=page, is_paginated=page.has_other_pages())
+        return context
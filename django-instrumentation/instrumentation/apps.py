@@ -0,0 +1,14 @@
+from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+
+class InstrumentationConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'instrumentation'
+
+    def ready(self):
+        from . import metrics
+        if metrics.enabled():
+            metrics.instrument_templates()
+            # Connections are per thread: instrument each one as it connects
+            connection_created.connect(metrics.instrument_connection, dispatch_uid='instrumentation')
@@ -0,0 +1,71 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+from instrumentation import metrics
+
+SORT_KEYS = {
+    'total': lambda row: row['total_ms'],
+    'p95': lambda row: row['p95_ms'],
+    'queries': lambda row: row['avg_queries'],
+    'duplicates': lambda row: row['duplicate_requests'],
+    'count': lambda row: row['count'],
+}
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def summarize(records):
+    """Aggregate request records into one row per (method, view)."""
+    groups = defaultdict(list)
+    for record in records:
+        groups[(record.get('method'), record.get('view') or record.get('path'))].append(record)
+    rows = []
+    for (method, view), group in groups.items():
+        times = [record['total_ms'] for record in group]
+        rows.append({
+            'endpoint': f'{method} {view}',
+            'count': len(group),
+            'total_ms': sum(times),
+            'p50_ms': percentile(times, 0.5),
+            'p95_ms': percentile(times, 0.95),
+            'avg_sql_ms': sum(record['sql_ms'] for record in group) / len(group),
+            'avg_template_ms': sum(record['template_ms'] for record in group) / len(group),
+            'avg_queries': sum(record['queries'] for record in group) / len(group),
+            'max_queries': max(record['queries'] for record in group),
+            'duplicate_requests': sum(1 for record in group if record['duplicates']),
+        })
+    return rows
+
+
+class Command(BaseCommand):
+    help = 'Rank endpoints by the time and queries recorded by InstrumentationMiddleware'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', help='Log file to read (default: INSTRUMENTATION_LOG_FILE)')
+        parser.add_argument('--sort', choices=sorted(SORT_KEYS), default='total',
+                            help='Ranking: total time (default), p95 latency, queries, duplicates or count')
+        parser.add_argument('--top', type=int, default=20, help='Number of endpoints to show')
+
+    def handle(self, *args, **options):
+        path = options['file'] or metrics.log_file()
+        rows = summarize(metrics.read_records(path))
+        if not rows:
+            raise CommandError(f'No requests recorded in {path}.')
+        rows.sort(key=SORT_KEYS[options['sort']], reverse=True)
+
+        self.stdout.write(
+            f"{'endpoint':<50} {'count':>7} {'total s':>9} {'p50 ms':>8} {'p95 ms':>8} "
+            f"{'sql ms':>8} {'tpl ms':>8} {'queries':>8} {'max q':>6} {'dup':>5}"
+        )
+        for row in rows[:options['top']]:
+            self.stdout.write(
+                f"{row['endpoint'][:50]:<50} {row['count']:>7} {row['total_ms'] / 1000:>9.2f} "
+                f"{row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['avg_sql_ms']:>8.1f} "
+                f"{row['avg_template_ms']:>8.1f} {row['avg_queries']:>8.1f} {row['max_queries']:>6} "
+                f"{row['duplicate_requests']:>5}"
+            )
+        self.stdout.write('dup = requests that ran the same query shape more than once (possible N+1).')
@@ -0,0 +1,202 @@
+"""
+Per-request performance metrics.
+
+``InstrumentationMiddleware`` collects a ``RequestMetrics`` for every request:
+the number and total time of SQL queries (all database aliases), queries
+repeated with the same shape (the usual sign of an N+1 loop), template
+render time and the resolved view name. Each request is written as one JSON
+line to a rotating log, which ``python manage.py instrumentation_summary``
+aggregates into a ranking of the hottest endpoints.
+
+Settings (all optional):
+
+* ``INSTRUMENTATION_ENABLED`` - default ``True``
+* ``INSTRUMENTATION_LOG_FILE`` - default ``BASE_DIR / 'logs' / 'instrumentation.log'``
+* ``INSTRUMENTATION_LOG_MAX_BYTES`` / ``INSTRUMENTATION_LOG_BACKUPS`` - rotation,
+  default 5 MB and 5 backups
+* ``INSTRUMENTATION_SERVER_TIMING`` - add a ``Server-Timing`` header, default ``DEBUG``
+"""
+import contextvars
+import json
+import logging
+import os
+import re
+from collections import Counter
+from functools import wraps
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from time import perf_counter
+
+from django.conf import settings
+from django.template.base import Template
+
+LOGGER_NAME = 'instrumentation.requests'
+
+# Metrics of the request being handled in the current thread/task
+current = contextvars.ContextVar('instrumentation_metrics', default=None)
+
+_handler = None
+
+_IN_LIST_RE = re.compile(r'\bIN\s*\((?:\s*%s\s*,?)+\)', re.IGNORECASE)
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SPACE_RE = re.compile(r'\s+')
+
+
+def enabled():
+    return getattr(settings, 'INSTRUMENTATION_ENABLED', True)
+
+
+def server_timing_enabled():
+    return getattr(settings, 'INSTRUMENTATION_SERVER_TIMING', settings.DEBUG)
+
+
+def log_file():
+    path = getattr(settings, 'INSTRUMENTATION_LOG_FILE', None)
+    if path is None:
+        path = Path(settings.BASE_DIR) / 'logs' / 'instrumentation.log'
+    return Path(path)
+
+
+def fingerprint(sql):
+    """The shape of a query: literals and IN lists collapsed, so N+1 lookups compare equal."""
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    sql = _LITERAL_RE.sub('?', sql)
+    return _SPACE_RE.sub(' ', sql).strip()
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = perf_counter()
+        self.total_time = 0.0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.fingerprints = Counter()
+        self.rendering = False
+
+    @property
+    def query_count(self):
+        return sum(self.fingerprints.values())
+
+    def duplicates(self, limit=5):
+        """[(fingerprint, count)] for query shapes run more than once, most repeated first."""
+        return [(sql, count) for sql, count in self.fingerprints.most_common(limit) if count > 1]
+
+    def __call__(self, execute, sql, params, many, context):
+        # Installed with connection.execute_wrapper()
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += perf_counter() - started
+            self.fingerprints[fingerprint(sql)] += 1
+
+    def finish(self):
+        self.total_time = perf_counter() - self.started
+
+    def server_timing(self):
+        return ', '.join([
+            f'sql;dur={self.sql_time * 1000:.1f};desc="{self.query_count} queries"',
+            f'template;dur={self.template_time * 1000:.1f}',
+            f'total;dur={self.total_time * 1000:.1f}',
+        ])
+
+    def as_record(self, request, response):
+        match = getattr(request, 'resolver_match', None)
+        return {
+            'method': request.method,
+            'path': request.path,
+            'view': (match.view_name or match._func_path) if match else None,
+            'status': response.status_code,
+            'total_ms': round(self.total_time * 1000, 2),
+            'sql_ms': round(self.sql_time * 1000, 2),
+            'template_ms': round(self.template_time * 1000, 2),
+            'queries': self.query_count,
+            'duplicates': [{'sql': sql[:300], 'count': count} for sql, count in self.duplicates()],
+        }
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Execute wrapper on every connection: count the query for the request in
+    the current context. sync_to_async() carries the context to the thread
+    that runs the query, so async views' queries count too.
+    """
+    metrics = current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics(execute, sql, params, many, context)
+
+
+def instrument_connection(connection, **kwargs):
+    """Add ``record_query`` to ``connection`` once; also a ``connection_created`` receiver."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def instrument_templates():
+    """
+    Time the outermost ``Template.render`` of each instrumented request.
+    Included and extended templates are rendered inside it and not counted twice.
+    """
+    original = Template.render
+    if getattr(original, 'instrumented', False):
+        return
+
+    @wraps(original)
+    def render(self, context):
+        metrics = current.get()
+        if metrics is None or metrics.rendering:
+            return original(self, context)
+        metrics.rendering = True
+        started = perf_counter()
+        try:
+            return original(self, context)
+        finally:
+            metrics.template_time += perf_counter() - started
+            metrics.rendering = False
+
+    render.instrumented = True
+    Template.render = render
+
+
+def get_logger():
+    """The request logger, (re)attached to a rotating handler for the current log file."""
+    global _handler
+    logger = logging.getLogger(LOGGER_NAME)
+    path = log_file()
+    if _handler is None or _handler.baseFilename != os.path.abspath(path):
+        if _handler is not None:
+            logger.removeHandler(_handler)
+            _handler.close()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _handler = RotatingFileHandler(
+            path,
+            maxBytes=getattr(settings, 'INSTRUMENTATION_LOG_MAX_BYTES', 5 * 1024 * 1024),
+            backupCount=getattr(settings, 'INSTRUMENTATION_LOG_BACKUPS', 5),
+            encoding='utf-8',
+        )
+        _handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(_handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+
+def write(record):
+    get_logger().info(json.dumps(record))
+
+
+def read_records(path=None):
+    """Yield the logged request records, oldest rotated file first."""
+    path = Path(path) if path else log_file()
+    backups = [backup for backup in path.parent.glob(path.name + '.*') if backup.suffix[1:].isdigit()]
+    backups.sort(key=lambda backup: int(backup.suffix[1:]), reverse=True)
+    for file in [*backups, path]:
+        if not file.exists():
+            continue
+        with open(file, encoding='utf-8') as lines:
+            for line in lines:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
@@ -0,0 +1,60 @@
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from . import metrics
+
+
+class InstrumentationMiddleware:
+    """
+    Record query count, SQL time, duplicate queries, template time and view
+    name for every request (see instrumentation/metrics.py). Put it first in
+    MIDDLEWARE so the other middleware is included in the total time.
+
+    Works in both sync and async stacks, so under ASGI it does not force
+    async views through a thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not metrics.enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    @contextmanager
+    def instrument(self):
+        # Connections of other threads get metrics.record_query when they
+        # connect; this thread's may have connected before the app was ready
+        for connection in connections.all():
+            metrics.instrument_connection(connection)
+        request_metrics = metrics.RequestMetrics()
+        token = metrics.current.set(request_metrics)
+        try:
+            yield request_metrics
+        finally:
+            metrics.current.reset(token)
+        request_metrics.finish()
+
+    def record(self, request, request_metrics, response):
+        if metrics.server_timing_enabled():
+            response['Server-Timing'] = request_metrics.server_timing()
+        metrics.write(request_metrics.as_record(request, response))
+        return response
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        with self.instrument() as request_metrics:
+            response = self.get_response(request)
+        return self.record(request, request_metrics, response)
+
+    async def __acall__(self, request):
+        with self.instrument() as request_metrics:
+            response = await self.get_response(request)
+        return self.record(request, request_metrics, response)
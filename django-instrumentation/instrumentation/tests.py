@@ -0,0 +1,96 @@
+import io
+import json
+import os
+import tempfile
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import Group
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.template import engines
+from django.test import RequestFactory, TestCase, override_settings
+
+from . import metrics
+from .middleware import InstrumentationMiddleware
+
+
+def n_plus_one_view(request):
+    # One query for the groups, then one per group
+    for group in Group.objects.all():
+        list(group.permissions.all())
+    template = engines['django'].from_string('{% for i in items %}{{ i }}{% endfor %}')
+    return HttpResponse(template.render({'items': range(3)}))
+
+
+class InstrumentationTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.log_file = os.path.join(directory.name, 'requests.log')
+        override = override_settings(INSTRUMENTATION_LOG_FILE=self.log_file, INSTRUMENTATION_SERVER_TIMING=True)
+        override.enable()
+        self.addCleanup(override.disable)
+        for name in ('readers', 'writers', 'editors'):
+            Group.objects.create(name=name)
+
+    def get(self, path='/instrumented/'):
+        return InstrumentationMiddleware(n_plus_one_view)(RequestFactory().get(path))
+
+    def test_records_queries_duplicates_and_templates(self):
+        response = self.get()
+        self.assertIn('sql;dur=', response['Server-Timing'])
+        self.assertIn('desc="4 queries"', response['Server-Timing'])
+
+        record, = metrics.read_records(self.log_file)
+        self.assertEqual((record['method'], record['path'], record['status']), ('GET', '/instrumented/', 200))
+        self.assertEqual(record['queries'], 4)
+        self.assertEqual(record['duplicates'][0]['count'], 3)
+        self.assertGreater(record['template_ms'], 0)
+
+    def test_fingerprint_ignores_literals_and_in_lists(self):
+        self.assertEqual(
+            metrics.fingerprint('SELECT * FROM t WHERE id IN (%s, %s, %s) AND  name = \'x\' LIMIT 21'),
+            metrics.fingerprint('SELECT * FROM t WHERE id IN (%s) AND name = \'y\' LIMIT 5'),
+        )
+
+    async def test_async_stack(self):
+        async def view(request):
+            return HttpResponse('ok')
+
+        middleware = InstrumentationMiddleware(view)
+        response = await middleware(RequestFactory().get('/async/'))
+        self.assertIn('Server-Timing', response)
+        record, = metrics.read_records(self.log_file)
+        self.assertEqual((record['path'], record['queries']), ('/async/', 0))
+
+    async def test_async_view_queries_in_another_thread(self):
+        # As under ASGI, the ORM runs in a worker thread with its own connection
+        count_content_types = sync_to_async(lambda: ContentType.objects.count(), thread_sensitive=False)
+
+        async def view(request):
+            await count_content_types()
+            await count_content_types()
+            return HttpResponse('ok')
+
+        await InstrumentationMiddleware(view)(RequestFactory().get('/async-queries/'))
+        record, = metrics.read_records(self.log_file)
+        self.assertEqual((record['path'], record['queries']), ('/async-queries/', 2))
+        self.assertEqual(record['duplicates'][0]['count'], 2)
+
+    @override_settings(INSTRUMENTATION_SERVER_TIMING=False)
+    def test_server_timing_header_is_optional(self):
+        self.assertNotIn('Server-Timing', self.get())
+
+    def test_summary_ranks_endpoints(self):
+        with open(self.log_file, 'w', encoding='utf-8') as log:
+            for view, total in [('slow', 90.0), ('slow', 110.0), ('fast', 5.0)]:
+                log.write(json.dumps({
+                    'method': 'GET', 'path': f'/{view}/', 'view': view, 'status': 200, 'total_ms': total,
+                    'sql_ms': 1.0, 'template_ms': 1.0, 'queries': 2, 'duplicates': [],
+                }) + '\n')
+        stdout = io.StringIO()
+        call_command('instrumentation_summary', file=self.log_file, stdout=stdout)
+        lines = stdout.getvalue().splitlines()
+        self.assertTrue(lines[1].startswith('GET slow'))
+        self.assertTrue(lines[2].startswith('GET fast'))
@@ -0,0 +1,19 @@
+#!/usr/bin/env python
+"""Run the instrumentation tests without a host project: python runtests.py"""
+import sys
+
+import django
+from django.conf import settings
+from django.test.utils import get_runner
+
+if __name__ == "__main__":
+    settings.configure(
+        DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}},
+        INSTALLED_APPS=["django.contrib.auth", "django.contrib.contenttypes", "instrumentation"],
+        TEMPLATES=[{"BACKEND": "django.template.backends.django.DjangoTemplates"}],
+        DEFAULT_AUTO_FIELD="django.db.models.BigAutoField",
+        USE_TZ=True,
+    )
+    django.setup()
+    TestRunner = get_runner(settings)
+    sys.exit(bool(TestRunner().run_tests(["instrumentation"])))
@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+from importlib.util import find_spec
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -82,6 +84,33 @@ DATABASES = {
 }
 
 
+# Cache, shared by every worker: cached permissions and roles (see
+# relationship_app/backends.py and models.py) must not outlive a revocation
+# in another process. Redis when CACHE_URL is set (e.g.
+# redis://127.0.0.1:6379/1), else the database (run createcachetable once).
+if os.environ.get('CACHE_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['CACHE_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'django_cache',
+        }
+    }
+
+
+# Permission checks are served from the cache (see relationship_app/backends.py)
+
+AUTHENTICATION_BACKENDS = [
+    'relationship_app.backends.CachedPermissionBackend',
+]
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -122,3 +151,11 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Per-request query/latency log (see instrumentation/metrics.py), when the
+# shared django-instrumentation package is installed (see its README)
+if find_spec('instrumentation'):
+    INSTALLED_APPS.append('instrumentation')
+    # First, so the other middleware is included in the request time
+    MIDDLEWARE.insert(0, 'instrumentation.middleware.InstrumentationMiddleware')
+INSTRUMENTATION_LOG_FILE = BASE_DIR / 'logs' / 'instrumentation.log'
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class RelationshipAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'relationship_app'
+
+    def ready(self):
+        # Connect the permission cache invalidation signals
+        from . import backends  # noqa: F401
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('relationship_app', '0003_alter_book_options'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['title', 'id'], name='rel_book_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['library', 'title', 'id'], name='rel_book_library_title_idx'),
+        ),
+    ]
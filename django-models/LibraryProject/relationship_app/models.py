@@ -1,10 +1,103 @@
+from django.conf import settings
 from django.db import models
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
+
+def role_cache_key(user_id):
+    return f'relationship_app:role:{user_id}'
+
+
+def book_count_cache_key(library_id):
+    return f'relationship_app:library:{library_id}:book_count'
+
+
+class DirtyFieldsMixin:
+    """
+    Remember the concrete field values loaded from (or last saved to) the
+    database, so ``changed_fields()`` can tell which ones were modified since.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot()
+        return instance
+
+    def _snapshot(self):
+        # Deferred fields are left out: reading them would load them
+        deferred = self.get_deferred_fields()
+        self._saved_values = {
+            field.attname: getattr(self, field.attname)
+            for field in self._meta.concrete_fields
+            if field.attname not in deferred
+        }
+
+    def changed_fields(self):
+        """Names of the modified fields; None when unknown (never loaded or saved)."""
+        saved = getattr(self, '_saved_values', None)
+        if saved is None:
+            return None
+        # Fields deferred at load time count as changed once assigned
+        deferred = self.get_deferred_fields()
+        return [
+            field.attname
+            for field in self._meta.concrete_fields
+            if field.attname not in deferred
+            and (field.attname not in saved or getattr(self, field.attname) != saved[field.attname])
+        ]
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            self._snapshot()
+        elif getattr(self, '_saved_values', None) is not None:
+            # Only the fields written are clean; other changes are still pending
+            for name in update_fields:
+                attname = self._meta.get_field(name).attname
+                self._saved_values[attname] = getattr(self, attname)
+
+    def save_if_changed(self):
+        changed = self.changed_fields()
+        if changed is None:
+            self.save()
+        elif changed:
+            self.save(update_fields=changed)
+
+
+class UserProfileManager(models.Manager):
+    def create_missing(self, users, role='Member'):
+        """
+        Create the profiles of ``users`` that have none, in one query; call
+        it after User.objects.bulk_create(), which skips post_save.
+        """
+        existing = set(self.filter(user__in=users).values_list('user_id', flat=True))
+        return self.bulk_create([self.model(user=user, role=role) for user in users if user.pk not in existing])
+
+    def role_for(self, user):
+        """
+        The role of ``user`` (None without a profile), looked up once per
+        request: it is kept on the user object and, across requests, in the
+        cache shared by the workers (CACHES) until the profile changes.
+        """
+        if not user.is_authenticated:
+            return None
+        if not hasattr(user, '_role'):
+            key = role_cache_key(user.pk)
+            role = cache.get(key)
+            if role is None:
+                # '' caches "no profile"
+                role = self.filter(user=user).values_list('role', flat=True).first() or ''
+                cache.set(key, role, getattr(settings, 'ROLE_CACHE_TIMEOUT', 300))
+            user._role = role or None
+        return user._role
+
+
 # UserProfile model for role-based access
-class UserProfile(models.Model):
+class UserProfile(DirtyFieldsMixin, models.Model):
     ROLE_CHOICES = [
         ('Admin', 'Admin'),
         ('Librarian', 'Librarian'),
@@ -14,6 +107,8 @@ class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     role = models.CharField(max_length=20, choices=ROLE_CHOICES)
 
+    objects = UserProfileManager()
+
     def __str__(self):
         return f"{self.user.username} - {self.role}"
 
@@ -26,9 +121,17 @@ class Library(models.Model):
     def __str__(self):
         return self.name
 
+    def cached_book_count(self):
+        """The number of books in the library, cached until one is added, moved or deleted."""
+        return cache.get_or_set(
+            book_count_cache_key(self.pk),
+            lambda: Book.objects.filter(library=self).count(),
+            getattr(settings, 'BOOK_COUNT_CACHE_TIMEOUT', 300),
+        )
+
 
 # Book model with custom permissions
-class Book(models.Model):
+class Book(DirtyFieldsMixin, models.Model):
     title = models.CharField(max_length=200)
     author = models.CharField(max_length=100)
     library = models.ForeignKey(
@@ -47,6 +150,11 @@ class Book(models.Model):
             ("can_change_book", "Can change book"),
             ("can_delete_book", "Can delete book"),
         ]
+        indexes = [
+            # Keyset pagination of the book listings (see pagination.py)
+            models.Index(fields=['title', 'id'], name='rel_book_title_idx'),
+            models.Index(fields=['library', 'title', 'id'], name='rel_book_library_title_idx'),
+        ]
 
 
 # Signal to create UserProfile automatically when a User is created
@@ -57,5 +165,34 @@ def create_user_profile(sender, instance, created, **kwargs):
 
 
 @receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
-    instance.userprofile.save()
+def save_user_profile(sender, instance, created, **kwargs):
+    # Only a profile already loaded on the user can have pending changes;
+    # don't load it (e.g. on every login's last_login update) to find out
+    if created or not User.userprofile.is_cached(instance):
+        return
+    try:
+        profile = instance.userprofile
+    except UserProfile.DoesNotExist:
+        return
+    profile.save_if_changed()
+
+
+# Forget cached roles when a profile changes
+# (queryset.update() bypasses this; call cache.delete(role_cache_key(...)))
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def forget_role(sender, instance, **kwargs):
+    cache.delete(role_cache_key(instance.user_id))
+    if UserProfile.user.is_cached(instance):
+        instance.user.__dict__.pop('_role', None)
+
+
+# Forget cached book counts when books come, go or move
+# (queryset.update() and bulk_create() bypass this; the counts expire)
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+def forget_book_counts(sender, instance, **kwargs):
+    # The snapshot still holds the library the book was in before this save
+    previous = getattr(instance, '_saved_values', {}).get('library_id')
+    library_ids = {instance.library_id, previous} - {None}
+    cache.delete_many([book_count_cache_key(library_id) for library_id in library_ids])
@@ -3,21 +3,26 @@ from django.contrib.auth.decorators import user_passes_test
 from django.contrib.auth.decorators import permission_required  # ✅ include permission_required
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib import messages
+from django.views.generic.detail import DetailView
 from .models import Book
 from .models import Library
+from .models import UserProfile
 from .forms import BookForm  # Make sure this exists
+from .pagination import KeysetPaginator
+
+BOOKS_PER_PAGE = 50
 
 # -----------------------------------------
-# Helper functions to check roles
+# Helper functions to check roles (cached, see UserProfileManager.role_for)
 # -----------------------------------------
 def is_admin(user):
-    return hasattr(user, 'userprofile') and user.userprofile.role == 'Admin'
+    return UserProfile.objects.role_for(user) == 'Admin'
 
 def is_librarian(user):
-    return hasattr(user, 'userprofile') and user.userprofile.role == 'Librarian'
+    return UserProfile.objects.role_for(user) == 'Librarian'
 
 def is_member(user):
-    return hasattr(user, 'userprofile') and user.userprofile.role == 'Member'
+    return UserProfile.objects.role_for(user) == 'Member'
 
 # -----------------------------------------
 # Role-based views
@@ -86,8 +91,36 @@ def register_view(request):
     return render(request, 'relationship_app/register.html', {'form': form})
 
 # -----------------------------------------
-# List all books
+# List all books (a page at a time, see pagination.py)
 # -----------------------------------------
 def list_books(request):
-    books = Book.objects.all()
-    return render(request, 'relationship_app/list_books.html', {'books': books})
+    books = Book.objects.select_related('library').only('title', 'author', 'library__name')
+    page = KeysetPaginator(books, BOOKS_PER_PAGE).page(
+        after=request.GET.get('after'), before=request.GET.get('before')
+    )
+    return render(request, 'relationship_app/list_books.html', {
+        'books': page,
+        'page_obj': page,
+        'is_paginated': page.has_other_pages(),
+    })
+
+# -----------------------------------------
+# Library detail (books a page at a time, with a cached total)
+# -----------------------------------------
+class LibraryDetailView(DetailView):
+    model = Library
+    template_name = 'relationship_app/library_detail.html'
+    context_object_name = 'library'
+
+    def get_queryset(self):
+        return Library.objects.only('name', 'location')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        library = self.object
+        books = Book.objects.filter(library=library).only('title', 'author')
+        page = KeysetPaginator(books, BOOKS_PER_PAGE, count=library.cached_book_count).page(
+            after=self.request.GET.get('after'), before=self.request.GET.get('before')
+        )
+        context.update(books=page, page_obj=page, is_paginated=page.has_other_pages())
+        return context
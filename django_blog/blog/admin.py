@@ -7,8 +7,11 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ['published_date', 'author', 'tags']
     search_fields = ['title', 'content', 'tags__name']
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_listing_data()
+    
     def get_comments_count(self, obj):
-        return obj.comments.count()
+        return obj.get_comments_count()
     get_comments_count.short_description = 'Comments'
     
     def get_tags(self, obj):
@@ -22,8 +25,9 @@ class TagAdmin(admin.ModelAdmin):
     prepopulated_fields = {'slug': ('name',)}
     
     def get_post_count(self, obj):
-        return obj.posts.count()
+        return obj.post_count
     get_post_count.short_description = 'Posts'
+    get_post_count.admin_order_field = 'post_count'
 
 @admin.register(Comment)
 class CommentAdmin(admin.ModelAdmin):
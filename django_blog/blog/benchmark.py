@@ -0,0 +1,203 @@
+"""
+Benchmarks for the blog's hot paths.
+
+``seed()`` fills the database with generated users, tags, posts and comments
+using bulk inserts (posts go through ``blog.bulk.import_records``).
+``run()`` then requests each page with the test client, cold (empty cache)
+and warm (cache primed), and records latency percentiles and query counts.
+The result is a plain dict that ``python manage.py benchmark_blog`` writes
+as JSON. ``compare()`` diffs two such reports.
+
+Cold runs clear the cache, so the command runs them against ``CACHES``, a
+private local-memory cache, rather than the project's configured one.
+"""
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import bulk, related, search
+from .models import Comment, Post, Tag
+
+WORDS = (
+    'django python web framework model view template query cache index search '
+    'database performance request response middleware signal form admin test '
+    'deploy server client api async thread process memory profile benchmark'
+).split()
+
+SEARCH_TERMS = ['django', 'cache query', 'performance', 'template']
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'blog-benchmark',
+    }
+}
+
+# Posts and tags a scenario cycles through, so warm runs hit primed cache entries
+POOL_SIZE = 10
+
+USERNAME_PREFIX = 'bench-user-'
+PASSWORD = 'bench-password'
+
+
+def _text(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+def seed(posts=1000, tags=100, comments=10000, users=100, batch_size=2000, random_seed=1):
+    """Create the benchmark data set. Returns {name: seconds} for each step."""
+    rng = random.Random(random_seed)
+    timings = {}
+
+    started = time.perf_counter()
+    # Hash once: every benchmark user shares the same password
+    password = make_password(PASSWORD)
+    User.objects.bulk_create(
+        [User(username=f'{USERNAME_PREFIX}{i}', password=password) for i in range(users)],
+        batch_size=batch_size,
+    )
+    Tag.objects.bulk_create(
+        [Tag(name=f'{rng.choice(WORDS)}-{i}', slug=f'tag-{i}') for i in range(tags)],
+        batch_size=batch_size,
+    )
+    timings['users_and_tags'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    tag_names = list(Tag.objects.values_list('name', flat=True))
+    usernames = [f'{USERNAME_PREFIX}{i}' for i in range(users)]
+    now = timezone.now()
+    records = (
+        {
+            'title': _text(rng, 6).capitalize(),
+            'content': _text(rng, 120),
+            'author': rng.choice(usernames),
+            'published_date': (now - timedelta(minutes=i)).isoformat(),
+            'tags': rng.sample(tag_names, min(len(tag_names), rng.randint(1, 5))),
+        }
+        for i in range(posts)
+    )
+    for _ in bulk.import_records(records, batch_size=batch_size):
+        pass
+    timings['posts'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    post_ids = list(Post.objects.values_list('pk', flat=True))
+    user_ids = list(User.objects.filter(username__startswith=USERNAME_PREFIX).values_list('pk', flat=True))
+    for batch in bulk.batched(range(comments), batch_size):
+        Comment.objects.bulk_create([
+            Comment(post_id=rng.choice(post_ids), author_id=rng.choice(user_ids), content=_text(rng, 20))
+            for _ in batch
+        ])
+    timings['comments'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    related.refresh_all(batch_size=batch_size)
+    timings['related_posts'] = time.perf_counter() - started
+    return timings
+
+
+def scenarios(rng):
+    """(name, needs_login, requests) triples; each request is a callable taking a client."""
+    post_ids = list(Post.objects.values_list('pk', flat=True))
+    posts = rng.sample(post_ids, min(POOL_SIZE, len(post_ids)))
+    tag_slugs = list(Tag.objects.filter(post_count__gt=0).values_list('slug', flat=True))
+    tags = rng.sample(tag_slugs, min(POOL_SIZE, len(tag_slugs)))
+
+    def get(name, *args, **params):
+        return lambda client: client.get(reverse(name, args=args), params)
+
+    def comment(pk):
+        return lambda client: client.post(reverse('comment_create', args=[pk]), {'content': _text(rng, 12)})
+
+    return [
+        ('post_list', False, [get('post_list')]),
+        ('post_detail', False, [get('post_detail', pk) for pk in posts]),
+        ('search_posts', False, [get('search_posts', q=term) for term in SEARCH_TERMS]),
+        ('advanced_search', False, [get('advanced_search')]),
+        ('posts_by_tag', False, [get('posts_by_tag', slug) for slug in tags]),
+        ('comment_create', True, [comment(pk) for pk in posts]),
+    ]
+
+
+def _measure(client, requests, iterations, clear_cache):
+    durations, queries = [], []
+    for i in range(iterations):
+        if clear_cache:
+            cache.clear()
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = requests[i % len(requests)](client)
+            durations.append((time.perf_counter() - started) * 1000)
+        if response.status_code >= 400:
+            raise RuntimeError(f'Benchmark request failed with status {response.status_code}')
+        queries.append(len(captured))
+    durations.sort()
+    return {
+        'iterations': iterations,
+        'p50_ms': round(statistics.median(durations), 3),
+        'p95_ms': round(durations[min(int(len(durations) * 0.95), len(durations) - 1)], 3),
+        'mean_ms': round(statistics.fmean(durations), 3),
+        'queries': statistics.median_low(queries),
+        'max_queries': max(queries),
+    }
+
+
+def run(iterations=20, warmup=1, random_seed=1):
+    """Measure every scenario. Returns {'<scenario>.<cold|warm>': stats}."""
+    rng = random.Random(random_seed)
+    anonymous, member = Client(), Client()
+    member.login(username=f'{USERNAME_PREFIX}0', password=PASSWORD)
+    results = {}
+    for name, needs_login, requests in scenarios(rng):
+        client = member if needs_login else anonymous
+        # Warm-up passes also prime the cache for the warm measurement
+        for _ in range(warmup):
+            for request in requests:
+                request(client)
+        results[f'{name}.cold'] = _measure(client, requests, iterations, clear_cache=True)
+        if not needs_login:
+            for request in requests:
+                request(client)
+            results[f'{name}.warm'] = _measure(client, requests, iterations, clear_cache=False)
+    return results
+
+
+def dataset():
+    return {
+        'users': User.objects.count(),
+        'tags': Tag.objects.count(),
+        'posts': Post.objects.count(),
+        'comments': Comment.objects.count(),
+        'database': connection.vendor,
+        'search_index': search.is_supported(),
+    }
+
+
+def compare(old, new, threshold=0.2, min_delta_ms=1.0):
+    """
+    Return [(scenario, metric, old, new, regressed)] for p95 latency and
+    query count. A p95 more than ``threshold`` and ``min_delta_ms`` slower,
+    or any extra query, counts as a regression.
+    """
+    rows = []
+    for scenario in sorted(new['scenarios']):
+        before = old.get('scenarios', {}).get(scenario)
+        if before is None:
+            continue
+        after = new['scenarios'][scenario]
+        slower = after['p95_ms'] - before['p95_ms']
+        rows.append((scenario, 'p95_ms', before['p95_ms'], after['p95_ms'],
+                     slower > before['p95_ms'] * threshold and slower > min_delta_ms))
+        rows.append((scenario, 'queries', before['queries'], after['queries'],
+                     after['queries'] > before['queries']))
+    return rows
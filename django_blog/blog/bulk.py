@@ -0,0 +1,161 @@
+"""
+Bulk import and export of blog posts as JSON Lines.
+
+Each line is one post::
+
+    {"title": "...", "content": "...", "author": "alice",
+     "published_date": "2024-01-31T12:00:00+00:00", "tags": ["django", "python"]}
+
+Both directions work on generators, so memory use depends on the batch size
+rather than on the number of posts. Imports write posts, tags and post/tag
+links with ``bulk_create``, which skips the model signals; the denormalized
+tag counts, the search index and the cache versions are updated with each
+batch instead, so a failing batch leaves the committed ones consistent. Related posts are left to ``refresh_related_posts``.
+"""
+import json
+import time
+from itertools import islice
+
+from django.apps import apps
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import caching, search
+
+
+class InvalidRecord(ValueError):
+    pass
+
+
+def export_records(queryset, chunk_size=2000):
+    """Yield one JSON-serializable dict per post of ``queryset``."""
+    posts = queryset.select_related('author').prefetch_related('tags').order_by('pk')
+    for post in posts.iterator(chunk_size=chunk_size):
+        yield {
+            'title': post.title,
+            'content': post.content,
+            'author': post.author.username,
+            'published_date': post.published_date.isoformat(),
+            'tags': [tag.name for tag in post.tags.all()],
+        }
+
+
+def parse_lines(lines, on_error=None):
+    """Yield the JSON object on each non-blank line; other lines go to ``on_error(line, error)``."""
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise InvalidRecord('expected a JSON object')
+        except ValueError as error:
+            if on_error:
+                on_error(line, error)
+            continue
+        yield record
+
+
+def throughput(count, started):
+    """'<count> post(s) in <seconds>s (<rate> posts/s).' since ``started`` (a perf_counter value)."""
+    elapsed = time.perf_counter() - started
+    return f'{count} post(s) in {elapsed:.1f}s ({count / max(elapsed, 1e-9):.0f} posts/s).'
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _build_post(record, authors):
+    """Return an unsaved Post and its tag names for one record."""
+    Post = apps.get_model('blog', 'Post')
+    Tag = apps.get_model('blog', 'Tag')
+    title, content = record.get('title'), record.get('content')
+    if not (title and content and isinstance(title, str) and isinstance(content, str)):
+        raise InvalidRecord('title and content are required')
+    if len(title) > Post._meta.get_field('title').max_length:
+        raise InvalidRecord('title is too long')
+    author = record.get('author')
+    author_id = authors.get(author) if isinstance(author, str) else None
+    if author_id is None:
+        raise InvalidRecord(f'unknown author {author!r}')
+    published = record.get('published_date')
+    if published:
+        try:
+            # None when malformed, ValueError when well formed but out of range
+            published = parse_datetime(published) if isinstance(published, str) else None
+        except ValueError:
+            published = None
+        if published is None:
+            raise InvalidRecord(f"invalid published_date {record['published_date']!r}")
+        if timezone.is_naive(published):
+            published = timezone.make_aware(published)
+    tags = record.get('tags') or []
+    if not isinstance(tags, list) or not all(isinstance(name, str) for name in tags):
+        raise InvalidRecord('tags must be a list of names')
+    tag_names = list(dict.fromkeys(name.strip() for name in tags if name.strip()))
+    if any(len(name) > Tag._meta.get_field('name').max_length for name in tag_names):
+        raise InvalidRecord('tag name is too long')
+    post = Post(
+        title=title,
+        content=content,
+        author_id=author_id,
+        published_date=published or timezone.now(),
+    )
+    return post, tag_names
+
+
+def import_records(records, batch_size=1000, using='default', on_error=None):
+    """
+    Create posts from ``records`` (dicts in the export format) in batches.
+
+    Authors are looked up by username in a map loaded once up front. Invalid
+    records are skipped and passed to ``on_error(record, error)``. Yields the
+    number of posts created by each batch.
+    """
+    Post = apps.get_model('blog', 'Post')
+    Tag = apps.get_model('blog', 'Tag')
+    User = Post._meta.get_field('author').related_model
+    Link = Post.tags.through
+
+    authors = dict(User._default_manager.using(using).values_list(User.USERNAME_FIELD, 'pk'))
+    tag_ids = {}
+
+    for batch in batched(records, batch_size):
+        posts, post_tag_names = [], []
+        for record in batch:
+            try:
+                post, tag_names = _build_post(record, authors)
+            except InvalidRecord as error:
+                if on_error:
+                    on_error(record, error)
+                continue
+            posts.append(post)
+            post_tag_names.append(tag_names)
+        if not posts:
+            continue
+
+        with transaction.atomic(using=using):
+            Post.objects.using(using).bulk_create(posts, batch_size=batch_size)
+            new_names = {name for names in post_tag_names for name in names} - tag_ids.keys()
+            tag_ids.update((tag.name, tag.pk) for tag in Tag.objects.using(using).resolve_names(new_names))
+            links = [
+                Link(post_id=post.pk, tag_id=tag_ids[name])
+                for post, names in zip(posts, post_tag_names)
+                for name in names
+            ]
+            Link.objects.using(using).bulk_create(links, batch_size=batch_size)
+            search.index_posts([post.pk for post in posts], using=using)
+            tag_slugs = []
+            for ids in batched({link.tag_id for link in links}, search.CHUNK_SIZE):
+                tags = Tag.objects.using(using).filter(pk__in=ids)
+                tags.recount()
+                tag_slugs.extend(tags.values_list('slug', flat=True))
+            transaction.on_commit(
+                lambda tag_slugs=tag_slugs: caching.invalidate(tag_slugs=tag_slugs, tag_cloud=bool(tag_slugs)),
+                using=using,
+            )
+        yield len(posts)
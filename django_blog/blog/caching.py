@@ -0,0 +1,146 @@
+"""
+Page and fragment caching for the blog.
+
+Cached pages and fragments are never deleted explicitly. Instead their keys
+embed the current *version* of everything they depend on:
+
+* ``posts``            - anything shown on the post listings
+* ``tags``             - the popular tags cloud
+* ``post:<pk>``        - one post, its tags, comments and related posts box
+* ``tag:<slug>``       - one tag page
+
+The signal handlers in ``blog.models`` bump exactly the versions affected by a
+Post, Comment or Tag change, so stale entries are simply never read again and
+expire on their own. Versions are nanosecond timestamps rather than counters:
+a version key that gets evicted comes back as a new value instead of
+resurrecting entries cached under an old one.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.http import HttpResponse
+
+POSTS = 'posts'
+TAGS = 'tags'
+
+
+def post_key(pk):
+    return f'post:{pk}'
+
+
+def tag_key(slug):
+    return f'tag:{slug}'
+
+
+def timeout():
+    return getattr(settings, 'BLOG_CACHE_TIMEOUT', 300)
+
+
+def _version_key(name):
+    return f'blog:version:{name}'
+
+
+# Versions
+def get_versions(*names):
+    """Return {name: version} for the given names, creating missing versions."""
+    keys = {_version_key(name): name for name in names}
+    found = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        found.update(missing)
+    return {keys[key]: version for key, version in found.items()}
+
+
+def version_stamp(*names):
+    """A single string combining the versions of ``names``, for use in cache keys."""
+    versions = get_versions(*names)
+    return '-'.join(str(versions[name]) for name in names)
+
+
+def bump(*names):
+    if names:
+        now = time.time_ns()
+        cache.set_many({_version_key(name): now for name in names}, timeout=None)
+
+
+def invalidate(post_ids=(), tag_ids=(), tag_slugs=(), listings=True, tag_cloud=False):
+    """Bump the versions of the given posts and tags (tag_ids are resolved to slugs)."""
+    slugs = set(tag_slugs)
+    if tag_ids:
+        Tag = apps.get_model('blog', 'Tag')
+        slugs.update(Tag.objects.filter(pk__in=set(tag_ids)).values_list('slug', flat=True))
+    names = [post_key(pk) for pk in set(post_ids)] + [tag_key(slug) for slug in slugs]
+    if listings:
+        names.append(POSTS)
+    if tag_cloud:
+        names.append(TAGS)
+    bump(*names)
+
+
+def post_dependencies(pk):
+    """
+    Version names a post detail page depends on: the post and each of its tags
+    (related posts are found through the tags). The tag slugs are cached per
+    post version so a warm lookup needs no query.
+    """
+    post_version = get_versions(post_key(pk))[post_key(pk)]
+    slugs_key = f'blog:post-tags:{pk}:{post_version}'
+    slugs = cache.get(slugs_key)
+    if slugs is None:
+        Tag = apps.get_model('blog', 'Tag')
+        slugs = list(Tag.objects.filter(posts=pk).values_list('slug', flat=True))
+        cache.set(slugs_key, slugs, timeout())
+    return [post_key(pk)] + [tag_key(slug) for slug in sorted(slugs)]
+
+
+def cached_count(queryset):
+    """``queryset.count()``, cached until the post listings change."""
+    sql, params = queryset.order_by().query.sql_with_params()
+    digest = hashlib.md5(f'{sql}|{params}'.encode()).hexdigest()
+    key = f'blog:count:{version_stamp(POSTS)}:{digest}'
+    return cache.get_or_set(key, queryset.count, timeout())
+
+
+# Full pages
+def _can_use_page_cache(request):
+    # Pending flash messages are shown once, so such pages must be rendered
+    return (
+        request.method in ('GET', 'HEAD')
+        and not request.user.is_authenticated
+        and not len(get_messages(request))
+    )
+
+
+def cache_anonymous_page(dependencies):
+    """
+    Cache the rendered page for anonymous visitors.
+
+    ``dependencies(request, **kwargs)`` returns the version names the page
+    depends on; the cache key is the full path plus those versions.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if not _can_use_page_cache(request):
+                return view_func(request, *args, **kwargs)
+            stamp = version_stamp(*dependencies(request, **kwargs))
+            digest = hashlib.md5(f'{request.get_full_path()}|{stamp}'.encode()).hexdigest()
+            key = f'blog:page:{digest}'
+            cached = cache.get(key)
+            if cached is not None:
+                content, content_type = cached
+                return HttpResponse(content, content_type=content_type)
+            response = view_func(request, *args, **kwargs)
+            if response.status_code == 200 and not response.streaming:
+                if hasattr(response, 'render') and not response.is_rendered:
+                    response.render()
+                cache.set(key, (response.content, response['Content-Type']), timeout())
+            return response
+        return wrapper
+    return decorator
@@ -2,7 +2,6 @@ from django import forms
 from django.contrib.auth.models import User
 from django.contrib.auth.forms import UserCreationForm
 from django.core.exceptions import ValidationError
-from django.utils.text import slugify
 from .models import Profile, Post, Comment, Tag
 
 # Custom Tag Widget for better tag input
@@ -64,9 +63,9 @@ class PostForm(forms.ModelForm):
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        if self.instance.pk:
-            # Pre-fill tags for existing posts
-            self.fields['tags_input'].initial = ', '.join([tag.name for tag in self.instance.tags.all()])
+        if self.instance.pk and not self.is_bound:
+            # Pre-fill tags for existing posts (submitted forms carry their own)
+            self.fields['tags_input'].initial = ', '.join(self.instance.tags.values_list('name', flat=True))
     
     def clean_title(self):
         title = self.cleaned_data.get('title')
@@ -97,19 +96,9 @@ class PostForm(forms.ModelForm):
         if commit:
             post.save()
             
-            # Handle tags
-            if self.cleaned_data['tags_input']:
-                tag_names = [tag.strip() for tag in self.cleaned_data['tags_input'].split(',') if tag.strip()]
-                tags = []
-                for tag_name in tag_names:
-                    tag, created = Tag.objects.get_or_create(
-                        name=tag_name,
-                        defaults={'slug': slugify(tag_name)}
-                    )
-                    tags.append(tag)
-                post.tags.set(tags)
-            else:
-                post.tags.clear()
+            # Handle tags: resolved in bulk, then linked with a single set()
+            tag_names = (self.cleaned_data['tags_input'] or '').split(',')
+            post.tags.set(Tag.objects.resolve_names(tag_names))
                 
         return post
 
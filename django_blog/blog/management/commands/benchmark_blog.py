@@ -0,0 +1,122 @@
+import json
+import platform
+import time
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from blog import benchmark
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a separate test database and measure latency and query counts of the blog pages. '
+        'Writes a JSON report that can be compared with an earlier run.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=100_000)
+        parser.add_argument('--tags', type=int, default=1_000)
+        parser.add_argument('--comments', type=int, default=1_000_000)
+        parser.add_argument('--users', type=int, default=1_000)
+        parser.add_argument('--batch-size', type=int, default=2_000, help='Rows per bulk insert')
+        parser.add_argument('--iterations', type=int, default=50, help='Measured requests per scenario')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed for data and requests')
+        parser.add_argument('--output', default='benchmark.json', help='Where to write the JSON report')
+        parser.add_argument('--compare', help='Earlier report to compare against')
+        parser.add_argument('--threshold', type=float, default=0.2,
+                            help='p95 slowdown counted as a regression (0.2 = 20%%)')
+        parser.add_argument('--fail-on-regression', action='store_true', help='Exit with an error on regressions')
+        parser.add_argument('--keepdb', action='store_true',
+                            help='Keep the seeded test database and reuse it on the next run')
+
+    def handle(self, *args, **options):
+        previous = None
+        if options['compare']:
+            try:
+                with open(options['compare'], encoding='utf-8') as report:
+                    previous = json.load(report)
+            except (OSError, ValueError) as error:
+                raise CommandError(f'Cannot read {options["compare"]}: {error}')
+
+        if connection.vendor == 'sqlite' and not connection.settings_dict['TEST']['NAME']:
+            # SQLite test databases are in memory unless named; a file is what --keepdb can keep
+            connection.settings_dict['TEST']['NAME'] = str(Path(settings.BASE_DIR) / 'benchmark.sqlite3')
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=not options['keepdb'], serialize=False, keepdb=options['keepdb'],
+        )
+        try:
+            # Measure the views themselves, without per-request instrumentation,
+            # against a private cache that cold runs can clear
+            with override_settings(INSTRUMENTATION_ENABLED=False, CACHES=benchmark.CACHES):
+                report = self.benchmark(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        with open(options['output'], 'w', encoding='utf-8') as output:
+            json.dump(report, output, indent=2, sort_keys=True)
+            output.write('\n')
+        self.stdout.write(self.style.SUCCESS(f'Wrote {options["output"]}.'))
+
+        if previous is not None:
+            self.compare(previous, report, options)
+
+    def benchmark(self, options):
+        if Post.objects.exists():
+            self.stdout.write('Reusing the seeded test database.')
+            seed_timings = {}
+        else:
+            self.stdout.write(
+                f"Seeding {options['posts']} posts, {options['tags']} tags, "
+                f"{options['comments']} comments and {options['users']} users..."
+            )
+            seed_timings = benchmark.seed(
+                posts=options['posts'], tags=options['tags'], comments=options['comments'],
+                users=options['users'], batch_size=options['batch_size'], random_seed=options['seed'],
+            )
+            for step, seconds in seed_timings.items():
+                self.stdout.write(f'  {step}: {seconds:.1f}s')
+
+        started = time.perf_counter()
+        results = benchmark.run(iterations=options['iterations'], random_seed=options['seed'])
+        self.stdout.write(f'Measured {len(results)} scenarios in {time.perf_counter() - started:.1f}s.')
+        self.stdout.write(f"{'scenario':<24} {'p50 ms':>9} {'p95 ms':>9} {'queries':>8}")
+        for scenario, stats in results.items():
+            self.stdout.write(
+                f"{scenario:<24} {stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['queries']:>8}"
+            )
+        return {
+            'created_at': timezone.now().isoformat(),
+            'environment': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'iterations': options['iterations'],
+                'seed': options['seed'],
+            },
+            'dataset': benchmark.dataset(),
+            'seed_seconds': {step: round(seconds, 2) for step, seconds in seed_timings.items()},
+            'scenarios': results,
+        }
+
+    def compare(self, previous, report, options):
+        rows = benchmark.compare(previous, report, threshold=options['threshold'])
+        if previous.get('dataset') != report['dataset']:
+            self.stdout.write(self.style.WARNING('The data sets differ; comparisons may not be meaningful.'))
+        regressions = 0
+        for scenario, metric, before, after, regressed in rows:
+            line = f'{scenario:<24} {metric:<8} {before:>9} -> {after:<9}'
+            if regressed:
+                regressions += 1
+                self.stdout.write(self.style.ERROR(line + ' REGRESSION'))
+            else:
+                self.stdout.write(line)
+        if regressions and options['fail_on_regression']:
+            raise CommandError(f'{regressions} regression(s) against {options["compare"]}.')
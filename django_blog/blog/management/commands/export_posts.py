@@ -0,0 +1,37 @@
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from blog import bulk
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Export blog posts as JSON Lines (one post per line)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default='-', help='Output file, or - for stdout (default)')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Posts fetched per query')
+        parser.add_argument('--author', help='Only export posts by this username')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='Database to export from')
+
+    def handle(self, *args, **options):
+        posts = Post.objects.using(options['database'])
+        if options['author']:
+            posts = posts.filter(author__username=options['author'])
+
+        started = time.perf_counter()
+        output = sys.stdout if options['path'] == '-' else open(options['path'], 'w', encoding='utf-8')
+        count = 0
+        try:
+            for record in bulk.export_records(posts, chunk_size=options['chunk_size']):
+                output.write(json.dumps(record, ensure_ascii=False) + '\n')
+                count += 1
+        finally:
+            if output is not sys.stdout:
+                output.close()
+        # Keep stdout clean for the JSON Lines when exporting to it
+        self.stderr.write(self.style.SUCCESS(f'Exported {bulk.throughput(count, started)}'))
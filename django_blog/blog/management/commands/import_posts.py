@@ -0,0 +1,53 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from blog import bulk
+
+
+class Command(BaseCommand):
+    help = 'Import blog posts from JSON Lines (as written by export_posts)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Input file, or - for stdin')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Posts created per transaction')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='Database to import into')
+        parser.add_argument('--max-errors', type=int, default=100, help='Skipped records reported individually')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1.')
+        self.skipped = 0
+        self.max_errors = options['max_errors']
+
+        try:
+            source = sys.stdin if options['path'] == '-' else open(options['path'], encoding='utf-8')
+        except OSError as error:
+            raise CommandError(error)
+
+        started = time.perf_counter()
+        imported = 0
+        try:
+            records = bulk.parse_lines(source, on_error=self.skip)
+            for created in bulk.import_records(
+                records, batch_size=options['batch_size'], using=options['database'], on_error=self.skip,
+            ):
+                imported += created
+                if options['verbosity'] > 1:
+                    self.stdout.write(f'Imported {bulk.throughput(imported, started)}')
+        finally:
+            if source is not sys.stdin:
+                source.close()
+
+        self.stdout.write(self.style.SUCCESS(f'Imported {bulk.throughput(imported, started)}'))
+        if self.skipped:
+            self.stdout.write(self.style.WARNING(f'Skipped {self.skipped} invalid record(s).'))
+        if imported:
+            self.stdout.write('Run "python manage.py refresh_related_posts" to update related posts.')
+
+    def skip(self, record, error):
+        self.skipped += 1
+        if self.skipped <= self.max_errors:
+            self.stderr.write(f'Skipping record: {error}')
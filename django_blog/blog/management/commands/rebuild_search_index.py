@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from blog import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index for all blog posts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='Database to rebuild the index on')
+
+    def handle(self, *args, **options):
+        using = options['database']
+        if not search.is_supported(using):
+            raise CommandError('Full-text search is only available on SQLite and PostgreSQL.')
+        with transaction.atomic(using=using):
+            count = search.rebuild(using=using)
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} post(s).'))
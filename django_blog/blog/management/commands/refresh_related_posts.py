@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from blog import related
+
+
+class Command(BaseCommand):
+    help = 'Recompute the precomputed related posts of every blog post'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Posts refreshed per transaction')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='Database to refresh')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = related.refresh_all(batch_size=options['batch_size'], using=options['database'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'Refreshed related posts for {count} post(s) in {elapsed:.1f}s.'))
@@ -0,0 +1,23 @@
+from django.db import migrations
+
+from blog import search
+
+
+def create_search_index(apps, schema_editor):
+    search.create_index(schema_editor)
+    search.rebuild(using=schema_editor.connection.alias)
+
+
+def drop_search_index(apps, schema_editor):
+    search.drop_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0004_tag_post_tags'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
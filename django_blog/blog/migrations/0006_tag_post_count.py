@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:30
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def count_tag_posts(apps, schema_editor):
+    Tag = apps.get_model('blog', 'Tag')
+    through = apps.get_model('blog', 'Post').tags.through
+    counts = through.objects.filter(tag_id=models.OuterRef('pk')).values('tag_id').annotate(
+        count=models.Count('*')
+    ).values('count')
+    Tag.objects.update(post_count=Coalesce(models.Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_post_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tag',
+            name='post_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['-post_count', 'name'], name='blog_tag_popular_idx'),
+        ),
+        migrations.RunPython(count_tag_posts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from blog import related
+
+
+def compute_related_posts(apps, schema_editor):
+    related.refresh_all(using=schema_editor.connection.alias)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0006_tag_post_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedPost',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('shared_tags', models.PositiveIntegerField()),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_links', to='blog.post')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_from', to='blog.post')),
+            ],
+            options={
+                'ordering': ['-score'],
+                'indexes': [models.Index(fields=['post', '-score'], name='blog_related_score_idx')],
+                'constraints': [models.UniqueConstraint(fields=('post', 'related'), name='blog_relatedpost_unique')],
+            },
+        ),
+        migrations.RunPython(compute_related_posts, migrations.RunPython.noop),
+    ]
@@ -1,14 +1,78 @@
-from django.db import models
+from collections import Counter, defaultdict
+
+from django.db import IntegrityError, models, transaction
 from django.contrib.auth.models import User
 from django.utils import timezone
 from django.urls import reverse
 from django.utils.text import slugify  
+from django.db.models.functions import Coalesce
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete, m2m_changed
+from django.dispatch import receiver
+from . import caching, related, search
+
+class TagQuerySet(models.QuerySet):
+    def popular(self):
+        """Tags with the most posts first (served by the post_count index)."""
+        return self.order_by('-post_count', 'name')
+    
+    def recount(self):
+        """Recompute post_count from the post/tag through table."""
+        through = Post.tags.through
+        counts = through.objects.filter(tag_id=models.OuterRef('pk')).values('tag_id').annotate(
+            count=models.Count('*')
+        ).values('count')
+        return self.update(post_count=Coalesce(models.Subquery(counts), 0))
+    
+    def resolve_names(self, names):
+        """
+        Return the tags called ``names`` in the given order, creating the missing
+        ones with one lookup and one bulk insert (plus a refetch when anything was
+        created), however many names there are.
+        
+        Bulk-created tags skip Tag.save() and its signals; they have no posts yet,
+        so the post count, search index and caches are updated when they are
+        added to a post.
+        """
+        names = list(dict.fromkeys(name.strip() for name in names if name.strip()))
+        if not names:
+            return []
+        found = {tag.name: tag for tag in self.filter(name__in=names)}
+        missing = [name for name in names if name not in found]
+        if missing:
+            slugs = {name: slugify(name)[:50] for name in missing}
+            self.bulk_create(
+                [self.model(name=name, slug=slug) for name, slug in slugs.items() if slug],
+                ignore_conflicts=True,
+            )
+            found.update((tag.name, tag) for tag in self.filter(name__in=missing))
+            # Names without a usable slug of their own (e.g. "Django" next to "django")
+            for name in missing:
+                if name not in found:
+                    found[name] = self._create_with_free_slug(name)
+        return [found[name] for name in names]
+    
+    def _create_with_free_slug(self, name):
+        base = slugify(name)[:40] or 'tag'
+        slug, suffix = base, 1
+        while self.filter(slug=slug).exists():
+            suffix += 1
+            slug = f'{base}-{suffix}'
+        try:
+            with transaction.atomic(using=self.db):
+                return self.create(name=name, slug=slug)
+        except IntegrityError:
+            # Created concurrently under the same name
+            return self.get(name=name)
 
 # Custom Tag model
 class Tag(models.Model):
     name = models.CharField(max_length=50, unique=True)
     slug = models.SlugField(max_length=50, unique=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Denormalized number of posts with this tag, maintained by the signals below
+    post_count = models.PositiveIntegerField(default=0, editable=False)
+    
+    objects = TagQuerySet.as_manager()
     
     def __str__(self):
         return self.name
@@ -20,6 +84,28 @@ class Tag(models.Model):
     
     class Meta:
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['-post_count', 'name'], name='blog_tag_popular_idx'),
+        ]
+
+class PostQuerySet(models.QuerySet):
+    def with_comment_counts(self):
+        """Annotate comments_count with a correlated subquery (only evaluated for fetched rows)."""
+        counts = Comment.objects.filter(post=models.OuterRef('pk')).values('post').annotate(
+            count=models.Count('*')
+        ).values('count')
+        return self.annotate(comments_count=Coalesce(models.Subquery(counts), 0))
+    
+    def with_listing_data(self):
+        """Everything a post preview renders: author, tags and comment count."""
+        return self.select_related('author').prefetch_related('tags').with_comment_counts()
+    
+    def with_detail_data(self):
+        """Listing data plus the active comments with their authors (as post.active_comments)."""
+        active_comments = Comment.objects.filter(active=True).select_related('author')
+        return self.with_listing_data().prefetch_related(
+            models.Prefetch('comments', queryset=active_comments, to_attr='active_comments')
+        )
 
 class Post(models.Model):
     title = models.CharField(max_length=200)
@@ -29,17 +115,32 @@ class Post(models.Model):
     updated_date = models.DateTimeField(auto_now=True)
     tags = models.ManyToManyField(Tag, blank=True, related_name='posts')  # Custom tags
     
+    objects = PostQuerySet.as_manager()
+    
     def __str__(self):
         return self.title
     
     def get_absolute_url(self):
         return reverse('post_detail', kwargs={'pk': self.pk})
     
+    def get_related_posts(self, limit=5):
+        """Best matching posts from the precomputed RelatedPost table."""
+        return Post.objects.filter(related_from__post=self).order_by(
+            '-related_from__score', '-related_from__related_id'
+        )[:limit]
+    
     def get_comments_count(self):
+        # Prefer the count annotated by PostQuerySet.with_comment_counts()
+        if hasattr(self, 'comments_count'):
+            return self.comments_count
         return self.comments.count()
     
     class Meta:
-        ordering = ['-published_date']
+        ordering = ['-published_date', '-id']
+        indexes = [
+            # Backs the (published_date, id) keyset pagination in blog/pagination.py
+            models.Index(fields=['-published_date', '-id'], name='blog_post_published_idx'),
+        ]
 
 class Comment(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='comments')
@@ -58,10 +159,188 @@ class Comment(models.Model):
     class Meta:
         ordering = ['created_at']
 
+# Precomputed related posts (see blog/related.py)
+class RelatedPost(models.Model):
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='related_links')
+    related = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='related_from')
+    score = models.FloatField()  # Jaccard similarity of the two posts' tags
+    shared_tags = models.PositiveIntegerField()
+    
+    def __str__(self):
+        return f'{self.post} -> {self.related} ({self.score:.2f})'
+    
+    class Meta:
+        ordering = ['-score']
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'related'], name='blog_relatedpost_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['post', '-score'], name='blog_related_score_idx'),
+        ]
+
 class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     image = models.ImageField(default='default.jpg', upload_to='profile_pics')
     bio = models.TextField(max_length=500, blank=True)
     
     def __str__(self):
-        return f'{self.user.username} Profile'
\ No newline at end of file
+        return f'{self.user.username} Profile'
+
+
+# Signals: track post/tag links changed through post.tags or tag.posts
+@receiver(m2m_changed, sender=Post.tags.through)
+def remember_removed_tag_links(sender, instance, action, reverse, pk_set, **kwargs):
+    # Removed links are only known before the through rows are deleted
+    if action not in ('pre_remove', 'pre_clear'):
+        return
+    links = sender.objects.filter(tag_id=instance.pk) if reverse else sender.objects.filter(post_id=instance.pk)
+    if action == 'pre_remove':
+        links = links.filter(**{'post_id__in' if reverse else 'tag_id__in': pk_set})
+    instance._removed_tag_links = list(links.values_list('post_id', 'tag_id'))
+
+def _changed_tag_links(instance, action, reverse, pk_set):
+    """(post_id, tag_id) pairs added or removed by an m2m_changed post_* action."""
+    if action != 'post_add':
+        return getattr(instance, '_removed_tag_links', [])
+    if reverse:
+        return [(post_id, instance.pk) for post_id in pk_set]
+    return [(instance.pk, tag_id) for tag_id in pk_set]
+
+# Signals: keep Tag.post_count up to date
+def _adjust_post_counts(tag_ids, sign, using='default'):
+    # One UPDATE per distinct delta rather than one per tag
+    tags_by_delta = defaultdict(list)
+    for tag_id, count in Counter(tag_ids).items():
+        tags_by_delta[sign * count].append(tag_id)
+    for delta, ids in tags_by_delta.items():
+        Tag.objects.using(using).filter(pk__in=ids).update(post_count=models.F('post_count') + delta)
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def count_retagged_posts(sender, instance, action, reverse, pk_set, using='default', **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        links = _changed_tag_links(instance, action, reverse, pk_set)
+        _adjust_post_counts([tag_id for post_id, tag_id in links], 1 if action == 'post_add' else -1, using)
+
+@receiver(pre_delete, sender=Post)
+def remember_deleted_post_tags(sender, instance, **kwargs):
+    # The through rows are removed by the cascade without an m2m_changed signal
+    instance._deleted_tag_ids = list(instance.tags.values_list('pk', flat=True))
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, using='default', **kwargs):
+    _adjust_post_counts(getattr(instance, '_deleted_tag_ids', []), -1, using)
+
+# Signals: keep the full-text search index in sync
+@receiver(post_save, sender=Post)
+def index_saved_post(sender, instance, raw=False, using='default', **kwargs):
+    if not raw:
+        search.index_posts([instance.pk], using=using)
+
+@receiver(post_delete, sender=Post)
+def unindex_deleted_post(sender, instance, using='default', **kwargs):
+    search.remove_posts([instance.pk], using=using)
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def index_retagged_posts(sender, instance, action, reverse, pk_set, using='default', **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        links = _changed_tag_links(instance, action, reverse, pk_set)
+        search.index_posts({post_id for post_id, tag_id in links}, using=using)
+
+@receiver(post_save, sender=Tag)
+def index_renamed_tag_posts(sender, instance, created, raw=False, using='default', **kwargs):
+    if not created and not raw:
+        search.index_posts(instance.posts.values_list('pk', flat=True), using=using)
+
+@receiver(pre_delete, sender=Tag)
+def remember_deleted_tag_posts(sender, instance, **kwargs):
+    # The through rows are removed by the cascade without an m2m_changed signal
+    instance._deleted_post_ids = list(instance.posts.values_list('pk', flat=True))
+
+@receiver(post_delete, sender=Tag)
+def index_deleted_tag_posts(sender, instance, using='default', **kwargs):
+    search.index_posts(getattr(instance, '_deleted_post_ids', []), using=using)
+
+@receiver(post_save, sender=User)
+def index_renamed_author_posts(sender, instance, created, update_fields=None, raw=False, using='default', **kwargs):
+    # Logins only touch last_login, so skip saves that cannot change the username
+    if created or raw or (update_fields is not None and 'username' not in update_fields):
+        return
+    search.index_posts(instance.posts.values_list('pk', flat=True), using=using)
+
+
+# Signals: refresh precomputed related posts when tags change
+@receiver(m2m_changed, sender=Post.tags.through)
+def refresh_retagged_related_posts(sender, instance, action, reverse, pk_set, using='default', **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        links = _changed_tag_links(instance, action, reverse, pk_set)
+        related.schedule_refresh({post_id for post_id, tag_id in links}, using=using)
+
+@receiver(pre_delete, sender=Post)
+def remember_posts_listing_deleted_post(sender, instance, **kwargs):
+    # Their RelatedPost rows for this post are removed by the cascade
+    instance._listed_by_ids = list(RelatedPost.objects.filter(related=instance).values_list('post_id', flat=True))
+
+@receiver(post_delete, sender=Post)
+def refresh_posts_listing_deleted_post(sender, instance, using='default', **kwargs):
+    related.schedule_refresh(getattr(instance, '_listed_by_ids', []), using=using)
+
+@receiver(post_delete, sender=Tag)
+def refresh_deleted_tag_related_posts(sender, instance, using='default', **kwargs):
+    related.schedule_refresh(getattr(instance, '_deleted_post_ids', []), using=using)
+
+# Signals: invalidate cached pages and fragments (see blog/caching.py)
+@receiver(post_save, sender=Post)
+def invalidate_saved_post(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    tag_slugs = [] if created else instance.tags.values_list('slug', flat=True)
+    caching.invalidate(post_ids=[instance.pk], tag_slugs=tag_slugs)
+
+@receiver(post_delete, sender=Post)
+def invalidate_deleted_post(sender, instance, **kwargs):
+    caching.invalidate(post_ids=[instance.pk], tag_ids=getattr(instance, '_deleted_tag_ids', []), tag_cloud=True)
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def invalidate_retagged_posts(sender, instance, action, reverse, pk_set, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        links = _changed_tag_links(instance, action, reverse, pk_set)
+        caching.invalidate(
+            post_ids=[post_id for post_id, tag_id in links],
+            tag_ids=[tag_id for post_id, tag_id in links],
+            tag_cloud=True,
+        )
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_commented_post(sender, instance, raw=False, **kwargs):
+    if not raw:
+        tag_slugs = Tag.objects.filter(posts=instance.post_id).values_list('slug', flat=True)
+        caching.invalidate(post_ids=[instance.post_id], tag_slugs=tag_slugs)
+
+@receiver(pre_save, sender=Tag)
+def remember_previous_tag_slug(sender, instance, raw=False, **kwargs):
+    if instance.pk and not raw:
+        instance._previous_slug = Tag.objects.filter(pk=instance.pk).values_list('slug', flat=True).first()
+
+@receiver(post_save, sender=Tag)
+def invalidate_saved_tag(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    post_ids = [] if created else instance.posts.values_list('pk', flat=True)
+    tag_slugs = {instance.slug, getattr(instance, '_previous_slug', None) or instance.slug}
+    caching.invalidate(post_ids=post_ids, tag_slugs=tag_slugs, tag_cloud=True)
+
+@receiver(post_delete, sender=Tag)
+def invalidate_deleted_tag(sender, instance, **kwargs):
+    caching.invalidate(
+        post_ids=getattr(instance, '_deleted_post_ids', []), tag_slugs=[instance.slug], tag_cloud=True
+    )
+
+@receiver(post_save, sender=User)
+def invalidate_renamed_author(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    if created or raw or (update_fields is not None and 'username' not in update_fields):
+        return
+    caching.invalidate(
+        post_ids=instance.posts.values_list('pk', flat=True),
+        tag_slugs=Tag.objects.filter(posts__author=instance).values_list('slug', flat=True).distinct(),
+    )
\ No newline at end of file
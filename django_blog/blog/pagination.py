@@ -0,0 +1,165 @@
+"""
+Cursor (keyset) pagination for the blog's HTML views.
+
+Offset pagination makes the database walk past every skipped row, so deep
+pages get slower and slower. Here a page is requested relative to a cursor,
+the ``(published_date, id)`` of the last post shown (``?after=``) or of the
+first one (``?before=``), and fetched with an indexed range query. Every page
+costs the same, however deep it is.
+
+Totals are optional: ``paginator.count`` is only computed when a template
+asks for it, and it is cached (see ``caching.cached_count``) or supplied by
+the view from a denormalized counter.
+"""
+import base64
+import json
+from datetime import datetime
+
+from django.db.models import Q
+from django.http import Http404
+from django.utils.functional import cached_property
+
+from . import caching
+
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except ValueError:
+        raise Http404('Invalid page cursor.')
+
+
+class CursorPage:
+    def __init__(self, object_list, paginator, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """Paginate a Post queryset newest first, keyed on (published_date, id)."""
+
+    def __init__(self, queryset, per_page, count=None):
+        self.queryset = queryset
+        self.per_page = per_page
+        self._count = count
+
+    @cached_property
+    def count(self):
+        count = self._count() if callable(self._count) else self._count
+        if count is None:
+            count = caching.cached_count(self.queryset)
+        return count
+
+    def _position(self, cursor):
+        try:
+            published, pk = decode_cursor(cursor)
+            return datetime.fromisoformat(published), int(pk)
+        except (TypeError, ValueError):
+            raise Http404('Invalid page cursor.')
+
+    def _cursor(self, post):
+        return encode_cursor([post.published_date.isoformat(), post.pk])
+
+    def page(self, after=None, before=None):
+        queryset = self.queryset
+        if before:
+            published, pk = self._position(before)
+            rows = list(queryset.filter(
+                Q(published_date__gt=published) | Q(published_date=published, pk__gt=pk)
+            ).order_by('published_date', 'pk')[:self.per_page + 1])
+            has_more = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            has_next, has_previous = True, has_more
+        else:
+            if after:
+                published, pk = self._position(after)
+                queryset = queryset.filter(
+                    Q(published_date__lt=published) | Q(published_date=published, pk__lt=pk)
+                )
+            rows = list(queryset.order_by('-published_date', '-pk')[:self.per_page + 1])
+            has_next, has_previous = len(rows) > self.per_page, bool(after)
+            rows = rows[:self.per_page]
+        if not rows:
+            return CursorPage([], self)
+        return CursorPage(
+            rows,
+            self,
+            next_cursor=self._cursor(rows[-1]) if has_next else None,
+            previous_cursor=self._cursor(rows[0]) if has_previous else None,
+        )
+
+
+class RankedPaginator:
+    """
+    Paginate search results that are already ranked as a list of ids.
+
+    Only the posts on the requested page are loaded from ``queryset``; the
+    cursor is the position in the ranked list.
+    """
+
+    def __init__(self, queryset, ids, per_page):
+        self.queryset = queryset
+        self.per_page = per_page
+        # Drop ranked ids excluded by the queryset's other filters, keeping the order
+        matching = set(queryset.filter(pk__in=ids).values_list('pk', flat=True)) if ids else set()
+        self.ids = [pk for pk in ids if pk in matching]
+
+    @property
+    def count(self):
+        return len(self.ids)
+
+    def _offset(self, cursor):
+        try:
+            return max(int(decode_cursor(cursor)), 0)
+        except (TypeError, ValueError):
+            raise Http404('Invalid page cursor.')
+
+    def page(self, after=None, before=None):
+        if before:
+            end = self._offset(before)
+            start = max(end - self.per_page, 0)
+        else:
+            start = self._offset(after) if after else 0
+            end = start + self.per_page
+        page_ids = self.ids[start:end]
+        posts = {post.pk: post for post in self.queryset.filter(pk__in=page_ids)}
+        return CursorPage(
+            [posts[pk] for pk in page_ids if pk in posts],
+            self,
+            next_cursor=encode_cursor(end) if end < len(self.ids) else None,
+            previous_cursor=encode_cursor(start) if start > 0 else None,
+        )
+
+
+class KeysetPaginationMixin:
+    """ListView mixin that swaps Django's offset pagination for KeysetPaginator."""
+
+    def get_total_count(self, queryset):
+        """Total shown next to the page links; None lets the paginator use a cached count."""
+        return None
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = KeysetPaginator(queryset, page_size, count=lambda: self.get_total_count(queryset))
+        page = paginator.page(after=self.request.GET.get('after'), before=self.request.GET.get('before'))
+        return paginator, page, page.object_list, page.has_other_pages()
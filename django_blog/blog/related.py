@@ -0,0 +1,151 @@
+"""
+Precomputed related posts.
+
+Each post keeps its best matches in the ``RelatedPost`` table, scored by the
+Jaccard similarity of the two posts' tag sets (shared tags / all tags of
+either post). The detail page then reads its related posts with one indexed
+lookup instead of joining and de-duplicating posts on every request.
+
+When a post's tags change, the post itself, the posts that currently list
+it and the posts in its new list are refreshed once the transaction commits
+(see the signal handlers in ``blog.models``), in a background thread so the
+request that changed the tags does not wait for it (``BLOG_RELATED_REFRESH
+= 'sync'`` refreshes in the committing thread instead). A post that should newly list
+a retagged post without being in that post's own top list is only picked up
+by a full refresh, so run ``python manage.py refresh_related_posts``
+periodically (e.g. from cron).
+"""
+import logging
+import queue
+import threading
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Count, ExpressionWrapper, F, FloatField, OuterRef, Subquery
+from django.db.models.functions import Cast
+
+logger = logging.getLogger(__name__)
+
+# (using, post ids) committed and waiting for the background refresh
+_queue = queue.Queue()
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def limit():
+    return getattr(settings, 'BLOG_RELATED_POSTS', 5)
+
+
+def similar_posts(post_id, using='default'):
+    """Return [(related_post_id, score, shared_tags)] for a post, best match first."""
+    through = apps.get_model('blog', 'Post').tags.through
+    links = through.objects.using(using)
+    tag_ids = list(links.filter(post_id=post_id).values_list('tag_id', flat=True))
+    if not tag_ids:
+        return []
+    tag_totals = links.filter(post_id=OuterRef('post_id')).values('post_id').annotate(
+        count=Count('*')
+    ).values('count')
+    rows = (
+        links.filter(tag_id__in=tag_ids)
+        .exclude(post_id=post_id)
+        .values('post_id')
+        .annotate(shared=Count('*'), total=Subquery(tag_totals))
+        .annotate(score=ExpressionWrapper(
+            Cast('shared', FloatField()) / (len(tag_ids) + F('total') - F('shared')),
+            output_field=FloatField(),
+        ))
+        .order_by('-score', '-post_id')[:limit()]
+    )
+    return [(row['post_id'], row['score'], row['shared']) for row in rows]
+
+
+def refresh_posts(post_ids, using='default'):
+    """Recompute the stored related posts of the given posts."""
+    from . import caching
+    RelatedPost = apps.get_model('blog', 'RelatedPost')
+    post_ids = set(post_ids)
+    existing = set(apps.get_model('blog', 'Post').objects.using(using).filter(
+        pk__in=post_ids).values_list('pk', flat=True))
+    with transaction.atomic(using=using):
+        RelatedPost.objects.using(using).filter(post_id__in=post_ids).delete()
+        RelatedPost.objects.using(using).bulk_create([
+            RelatedPost(post_id=post_id, related_id=related_id, score=score, shared_tags=shared)
+            for post_id in existing
+            for related_id, score, shared in similar_posts(post_id, using)
+        ])
+    caching.invalidate(post_ids=existing, listings=False)
+
+
+def refresh_neighbourhood(post_ids, using='default'):
+    """
+    Refresh posts whose tags changed together with the posts whose lists they
+    were in and the posts they are now related to.
+    """
+    RelatedPost = apps.get_model('blog', 'RelatedPost')
+    post_ids = set(post_ids)
+    listing = RelatedPost.objects.using(using).filter(related_id__in=post_ids).values_list('post_id', flat=True)
+    refresh_posts(post_ids | set(listing), using)
+    listed = RelatedPost.objects.using(using).filter(post_id__in=post_ids).values_list('related_id', flat=True)
+    refresh_posts(set(listed) - post_ids, using)
+
+
+def refresh_all(batch_size=500, using='default'):
+    """Recompute every post's related posts. Returns the number of posts processed."""
+    Post = apps.get_model('blog', 'Post')
+    post_ids = list(Post.objects.using(using).order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(post_ids), batch_size):
+        refresh_posts(post_ids[start:start + batch_size], using)
+    return len(post_ids)
+
+
+def schedule_refresh(post_ids, using='default'):
+    """
+    Refresh the neighbourhood of ``post_ids`` after the current transaction
+    commits. Nothing is kept outside the on_commit hook, so a transaction
+    that rolls back schedules nothing.
+    """
+    post_ids = set(post_ids)
+    if post_ids:
+        transaction.on_commit(lambda: _enqueue(post_ids, using), using=using)
+
+
+def _enqueue(post_ids, using):
+    global _worker
+    if getattr(settings, 'BLOG_RELATED_REFRESH', 'thread') == 'sync':
+        refresh_neighbourhood(post_ids, using)
+        return
+    _queue.put((using, post_ids))
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_work, name='blog-related-refresh', daemon=True)
+            _worker.start()
+
+
+def _work():
+    while True:
+        items = [_queue.get()]
+        # Fold everything queued meanwhile (e.g. the remove and add of a
+        # tags.set()) into one refresh per database
+        while True:
+            try:
+                items.append(_queue.get_nowait())
+            except queue.Empty:
+                break
+        pending = {}
+        for using, post_ids in items:
+            pending.setdefault(using, set()).update(post_ids)
+        for using, post_ids in pending.items():
+            try:
+                refresh_neighbourhood(post_ids, using)
+            except Exception:
+                logger.exception('Refreshing the related posts of %s failed', sorted(post_ids))
+        connections.close_all()
+        for _ in items:
+            _queue.task_done()
+
+
+def wait():
+    """Block until the queued background refreshes are done."""
+    _queue.join()
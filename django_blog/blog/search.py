@@ -0,0 +1,248 @@
+"""
+Full-text search for blog posts.
+
+On SQLite the posts are indexed in an FTS5 virtual table (``blog_post_fts``)
+and on PostgreSQL in a ``tsvector`` table (``blog_post_search``) with a GIN
+index. Both hold one row per post with its title, content, author username
+and tag names, so a search is a single index lookup instead of a scan over
+``blog_post`` joined to users and tags.
+
+The index is kept in sync by the signal handlers in ``blog.models`` and can be
+rebuilt from scratch with ``python manage.py rebuild_search_index``. Other
+database backends fall back to the original ``icontains`` filter.
+"""
+import re
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections
+from django.db.models import Case, IntegerField, Q, When
+from django.db.models.expressions import RawSQL
+
+SQLITE_TABLE = 'blog_post_fts'
+POSTGRES_TABLE = 'blog_post_search'
+
+# Relative weight of each indexed column when ranking (title, content, author, tags)
+SQLITE_WEIGHTS = (10.0, 1.0, 4.0, 6.0)
+
+# Large id lists are sent to the database in chunks to stay below the
+# backend's query parameter limit
+CHUNK_SIZE = 500
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def is_supported(using='default'):
+    return connections[using].vendor in ('sqlite', 'postgresql')
+
+
+def _tables():
+    Post = apps.get_model('blog', 'Post')
+    User = Post._meta.get_field('author').related_model
+    return {
+        'post': Post._meta.db_table,
+        'tag': apps.get_model('blog', 'Tag')._meta.db_table,
+        'post_tags': Post.tags.through._meta.db_table,
+        'user': User._meta.db_table,
+    }
+
+
+def _chunks(ids):
+    ids = list(ids)
+    for start in range(0, len(ids), CHUNK_SIZE):
+        yield ids[start:start + CHUNK_SIZE]
+
+
+# Schema
+def create_index(schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_TABLE} "
+            "USING fts5(title, content, author, tags, "
+            "tokenize='porter unicode61 remove_diacritics 2')"
+        )
+    elif vendor == 'postgresql':
+        tables = _tables()
+        schema_editor.execute(
+            f"CREATE TABLE IF NOT EXISTS {POSTGRES_TABLE} ("
+            f"post_id bigint PRIMARY KEY REFERENCES {tables['post']} (id) "
+            "ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+            "document tsvector NOT NULL)"
+        )
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {POSTGRES_TABLE}_document_idx "
+            f"ON {POSTGRES_TABLE} USING gin (document)"
+        )
+
+
+def drop_index(schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {SQLITE_TABLE}')
+    elif vendor == 'postgresql':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {POSTGRES_TABLE}')
+
+
+# Indexing
+def _select_documents_sql(vendor, where=''):
+    tables = _tables()
+    if vendor == 'sqlite':
+        tag_names = (
+            f"(SELECT group_concat(t.name, ' ') FROM {tables['tag']} t "
+            f"JOIN {tables['post_tags']} pt ON pt.tag_id = t.id WHERE pt.post_id = p.id)"
+        )
+        return (
+            f"INSERT INTO {SQLITE_TABLE} (rowid, title, content, author, tags) "
+            f"SELECT p.id, p.title, p.content, u.username, COALESCE({tag_names}, '') "
+            f"FROM {tables['post']} p JOIN {tables['user']} u ON u.id = p.author_id {where}"
+        )
+    tag_names = (
+        f"(SELECT string_agg(t.name, ' ') FROM {tables['tag']} t "
+        f"JOIN {tables['post_tags']} pt ON pt.tag_id = t.id WHERE pt.post_id = p.id)"
+    )
+    return (
+        f"INSERT INTO {POSTGRES_TABLE} (post_id, document) "
+        "SELECT p.id, "
+        "setweight(to_tsvector('english', p.title), 'A') || "
+        f"setweight(to_tsvector('english', COALESCE({tag_names}, '')), 'B') || "
+        "setweight(to_tsvector('simple', u.username), 'B') || "
+        "setweight(to_tsvector('english', p.content), 'C') "
+        f"FROM {tables['post']} p JOIN {tables['user']} u ON u.id = p.author_id {where} "
+        "ON CONFLICT (post_id) DO UPDATE SET document = EXCLUDED.document"
+    )
+
+
+def index_posts(post_ids, using='default'):
+    """(Re)index the given posts from their current database rows."""
+    connection = connections[using]
+    if not is_supported(using):
+        return
+    with connection.cursor() as cursor:
+        for chunk in _chunks(post_ids):
+            placeholders = ', '.join(['%s'] * len(chunk))
+            if connection.vendor == 'sqlite':
+                cursor.execute(f'DELETE FROM {SQLITE_TABLE} WHERE rowid IN ({placeholders})', chunk)
+            cursor.execute(
+                _select_documents_sql(connection.vendor, f'WHERE p.id IN ({placeholders})'),
+                chunk,
+            )
+
+
+def remove_posts(post_ids, using='default'):
+    connection = connections[using]
+    if not is_supported(using):
+        return
+    table, column = (SQLITE_TABLE, 'rowid') if connection.vendor == 'sqlite' else (POSTGRES_TABLE, 'post_id')
+    with connection.cursor() as cursor:
+        for chunk in _chunks(post_ids):
+            placeholders = ', '.join(['%s'] * len(chunk))
+            cursor.execute(f'DELETE FROM {table} WHERE {column} IN ({placeholders})', chunk)
+
+
+def rebuild(using='default'):
+    """Drop every indexed document and index all posts again. Returns the post count."""
+    connection = connections[using]
+    if not is_supported(using):
+        return 0
+    table = SQLITE_TABLE if connection.vendor == 'sqlite' else POSTGRES_TABLE
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table}')
+        cursor.execute(_select_documents_sql(connection.vendor))
+        cursor.execute(f'SELECT COUNT(*) FROM {table}')
+        return cursor.fetchone()[0]
+
+
+# Querying
+def _tokens(query):
+    return [token.lower() for token in TOKEN_RE.findall(query)]
+
+
+def _match(vendor, tokens):
+    if vendor == 'sqlite':
+        return ' '.join(f'"{token}"*' for token in tokens)
+    return ' & '.join(f"'{token}':*" for token in tokens)
+
+
+def matching_post_ids(query, using='default'):
+    """
+    A subquery selecting the ids of every post matching ``query``, unranked
+    and without the BLOG_SEARCH_MAX_RESULTS cap, for ``pk__in`` filters.
+    """
+    match = _match(connections[using].vendor, _tokens(query))
+    if connections[using].vendor == 'sqlite':
+        return RawSQL(f'SELECT rowid FROM {SQLITE_TABLE} WHERE {SQLITE_TABLE} MATCH %s', [match])
+    return RawSQL(
+        f"SELECT post_id FROM {POSTGRES_TABLE} WHERE document @@ to_tsquery('english', %s)", [match]
+    )
+
+
+def ranked_post_ids(query, limit=None, using='default', within=None):
+    """
+    Return the ids of the posts matching ``query``, best match first.
+
+    Every word in the query has to match (as a prefix) somewhere in the
+    title, content, author or tags of the post. With ``within`` (a Post
+    queryset), only its posts are ranked, so its filters apply before the
+    BLOG_SEARCH_MAX_RESULTS cap rather than after it.
+    """
+    tokens = _tokens(query)
+    if not tokens:
+        return []
+    if limit is None:
+        limit = getattr(settings, 'BLOG_SEARCH_MAX_RESULTS', 500)
+    connection = connections[using]
+    column = 'rowid' if connection.vendor == 'sqlite' else 'post_id'
+    candidates, candidate_params = '', []
+    if within is not None and within.query.has_filters():
+        sql, candidate_params = within.order_by().values('pk').query.sql_with_params()
+        candidates = f'AND {column} IN ({sql}) '
+    with connection.cursor() as cursor:
+        match = _match(connection.vendor, tokens)
+        if connection.vendor == 'sqlite':
+            weights = ', '.join(str(weight) for weight in SQLITE_WEIGHTS)
+            cursor.execute(
+                f'SELECT rowid FROM {SQLITE_TABLE} WHERE {SQLITE_TABLE} MATCH %s {candidates}'
+                f'ORDER BY bm25({SQLITE_TABLE}, {weights}) LIMIT %s',
+                [match, *candidate_params, limit],
+            )
+        else:
+            cursor.execute(
+                f"SELECT post_id FROM {POSTGRES_TABLE}, to_tsquery('english', %s) query "
+                f"WHERE document @@ query {candidates}"
+                "ORDER BY ts_rank(document, query) DESC, post_id DESC LIMIT %s",
+                [match, *candidate_params, limit],
+            )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def order_by_ids(queryset, ids):
+    """Order ``queryset`` to follow the order of ``ids``."""
+    if not ids:
+        return queryset
+    return queryset.order_by(
+        Case(*[When(pk=pk, then=position) for position, pk in enumerate(ids)], output_field=IntegerField())
+    )
+
+
+def filter_posts(queryset, query, ranked=False):
+    """
+    Restrict a ``Post`` queryset to the posts matching ``query``.
+
+    With ``ranked=True`` the results are ordered by relevance and capped at
+    BLOG_SEARCH_MAX_RESULTS; otherwise every match is kept, in the
+    queryset's own ordering.
+    """
+    if not is_supported(queryset.db):
+        return queryset.filter(
+            Q(title__icontains=query) |
+            Q(content__icontains=query) |
+            Q(author__username__icontains=query) |
+            Q(tags__name__icontains=query)
+        ).distinct()
+    if not _tokens(query):
+        return queryset.none()
+    if not ranked:
+        return queryset.filter(pk__in=matching_post_ids(query, using=queryset.db))
+    ids = ranked_post_ids(query, using=queryset.db, within=queryset)
+    return order_by_ids(queryset.filter(pk__in=ids), ids)
@@ -1,3 +1,566 @@
-from django.test import TestCase
+import io
+import json
+import os
+import tempfile
+import threading
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from unittest import mock
+
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import benchmark, related, search
+from .forms import PostForm
+from .models import Comment, Post, Tag
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='alice', password='testpass123')
+        self.django_post = Post.objects.create(
+            title='Getting started with Django',
+            content='A short introduction to models, views and templates.',
+            author=self.author,
+        )
+        self.python_post = Post.objects.create(
+            title='Python tips',
+            content='Generators and comprehensions, with a nod to Django.',
+            author=self.author,
+        )
+
+    def test_title_match_ranks_first(self):
+        self.assertEqual(search.ranked_post_ids('django'), [self.django_post.pk, self.python_post.pk])
+
+    def test_prefix_and_all_words_must_match(self):
+        self.assertEqual(search.ranked_post_ids('gener comprehension'), [self.python_post.pk])
+        self.assertEqual(search.ranked_post_ids('django generators models'), [])
+
+    def test_index_follows_tag_changes(self):
+        tag = Tag.objects.create(name='tutorial')
+        self.python_post.tags.add(tag)
+        self.assertEqual(search.ranked_post_ids('tutorial'), [self.python_post.pk])
+
+        tag.name = 'howto'
+        tag.save()
+        self.assertEqual(search.ranked_post_ids('tutorial'), [])
+        self.assertEqual(search.ranked_post_ids('howto'), [self.python_post.pk])
+
+        tag.delete()
+        self.assertEqual(search.ranked_post_ids('howto'), [])
+
+    def test_index_follows_post_updates_and_deletes(self):
+        self.django_post.title = 'Deploying web apps'
+        self.django_post.save()
+        self.assertEqual(search.ranked_post_ids('deploying'), [self.django_post.pk])
+
+        self.django_post.delete()
+        self.assertEqual(search.ranked_post_ids('deploying'), [])
+
+    def test_rebuild_indexes_every_post(self):
+        self.assertEqual(search.rebuild(), 2)
+        self.assertCountEqual(search.ranked_post_ids('alice'), [self.django_post.pk, self.python_post.pk])
+
+    def test_filter_is_not_capped(self):
+        with self.settings(BLOG_SEARCH_MAX_RESULTS=1):
+            self.assertEqual(len(search.ranked_post_ids('django')), 1)
+            posts = search.filter_posts(Post.objects.all(), 'django')
+            self.assertCountEqual(posts, [self.django_post, self.python_post])
+            self.assertEqual(list(search.filter_posts(Post.objects.all(), 'django', ranked=True)), [self.django_post])
+        self.assertEqual(list(search.filter_posts(Post.objects.all(), '!!')), [])
+
+    def test_search_view_filters_by_author(self):
+        other = User.objects.create_user(username='bob', password='testpass123')
+        Post.objects.create(title='Django for bob', content='Bob writes about Django too.', author=other)
+        response = self.client.get(reverse('search_posts'), {'q': 'django', 'author': 'bob'})
+        self.assertEqual([post.title for post in response.context['posts']], ['Django for bob'])
+
+    def test_filtered_search_ranks_within_the_filter(self):
+        other = User.objects.create_user(username='bob', password='testpass123')
+        Post.objects.create(title='Notes from bob', content='Mostly about tea, a little about Django.', author=other)
+        # bob's post ranks below alice's title match, outside a global top 1
+        with self.settings(BLOG_SEARCH_MAX_RESULTS=1):
+            response = self.client.get(reverse('search_posts'), {'q': 'django', 'author': 'bob'})
+            self.assertEqual([post.title for post in response.context['posts']], ['Notes from bob'])
+            ranked = search.filter_posts(Post.objects.filter(author=other), 'django', ranked=True)
+            self.assertEqual([post.title for post in ranked], ['Notes from bob'])
+
+
+class TagPostCountTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='alice', password='testpass123')
+        self.posts = [
+            Post.objects.create(title=f'Post number {i}', content='Some content.', author=self.author)
+            for i in range(3)
+        ]
+        self.python = Tag.objects.create(name='python')
+        self.django = Tag.objects.create(name='django')
+
+    def assertCounts(self, python, django):
+        self.python.refresh_from_db()
+        self.django.refresh_from_db()
+        self.assertEqual((self.python.post_count, self.django.post_count), (python, django))
+
+    def test_counts_follow_post_tags(self):
+        first, second, third = self.posts
+        first.tags.add(self.python, self.django)
+        second.tags.set([self.python])
+        self.assertCounts(2, 1)
+
+        # Adding an existing link or removing a missing one changes nothing
+        first.tags.add(self.python)
+        third.tags.remove(self.python)
+        self.assertCounts(2, 1)
+
+        second.tags.set([self.django])
+        self.assertCounts(1, 2)
+
+        first.tags.clear()
+        self.assertCounts(0, 1)
+
+    def test_counts_follow_tag_posts(self):
+        self.python.posts.add(*self.posts)
+        self.assertCounts(3, 0)
+        self.python.posts.remove(self.posts[0])
+        self.assertCounts(2, 0)
+        self.python.posts.clear()
+        self.assertCounts(0, 0)
+
+    def test_deleting_a_post_decrements_its_tags(self):
+        self.posts[0].tags.add(self.python, self.django)
+        self.posts[1].tags.add(self.python)
+        self.posts[0].delete()
+        self.assertCounts(1, 0)
+
+    def test_recount_matches_signals(self):
+        self.posts[0].tags.add(self.python)
+        Tag.objects.update(post_count=0)
+        Tag.objects.recount()
+        self.assertCounts(1, 0)
+
+    def test_popular_tags_is_a_single_query(self):
+        self.python.posts.add(*self.posts[:2])
+        self.django.posts.add(self.posts[0])
+        with self.assertNumQueries(1):
+            self.assertEqual(list(Tag.objects.popular()[:10]), [self.python, self.django])
+
+
+class QueryCountTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='alice', password='testpass123')
+        self.tags = [Tag.objects.create(name=f'tag{i}') for i in range(3)]
+
+    def create_post(self, comments=0):
+        post = Post.objects.create(title='A post about things', content='Some content.', author=self.author)
+        post.tags.set(self.tags)
+        for i in range(comments):
+            commenter = User.objects.create_user(username=f'reader{post.pk}-{i}', password='testpass123')
+            Comment.objects.create(post=post, author=commenter, content='A thoughtful comment.')
+        return post
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_detail_page_query_count_does_not_grow_with_comments(self):
+        few = self.create_post(comments=1)
+        many = self.create_post(comments=8)
+        self.assertEqual(
+            self.count_queries(reverse('post_detail', args=[few.pk])),
+            self.count_queries(reverse('post_detail', args=[many.pk])),
+        )
+
+    def test_list_pages_query_count_does_not_grow_with_posts(self):
+        self.create_post(comments=1)
+        urls = [reverse('post_list'), reverse('posts_by_tag', args=['tag0']), reverse('search_posts') + '?q=things']
+        baseline = [self.count_queries(url) for url in urls]
+        for _ in range(4):
+            self.create_post(comments=2)
+        self.assertEqual([self.count_queries(url) for url in urls], baseline)
+
+    def test_advanced_search_query_count_does_not_grow_with_authors(self):
+        self.create_post()
+        baseline = self.count_queries(reverse('advanced_search'))
+        for i in range(3):
+            author = User.objects.create_user(username=f'writer{i}', password='testpass123')
+            Post.objects.create(title='Another post', content='Content.', author=author)
+        self.assertEqual(self.count_queries(reverse('advanced_search')), baseline)
+
+
+
+class CachingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='alice', password='testpass123')
+        self.tag = Tag.objects.create(name='python')
+        self.post = Post.objects.create(title='Cached post', content='Some content.', author=self.author)
+        self.post.tags.add(self.tag)
+        self.other = Post.objects.create(title='Unrelated post', content='Other content.', author=self.author)
+
+    def assertCached(self, url):
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+    def assertNotCached(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        self.assertGreater(len(queries), 0)
+
+    def test_anonymous_pages_are_served_from_cache(self):
+        for url in [reverse('post_list'), reverse('post_detail', args=[self.post.pk]), reverse('posts_by_tag', args=['python'])]:
+            self.assertCached(url)
+
+    def test_authenticated_pages_are_not_cached(self):
+        self.client.force_login(self.author)
+        self.client.get(reverse('post_list'))
+        self.assertNotCached(reverse('post_list'))
+
+    def test_editing_a_post_invalidates_its_pages_only(self):
+        detail = reverse('post_detail', args=[self.post.pk])
+        other_detail = reverse('post_detail', args=[self.other.pk])
+        tag_page = reverse('posts_by_tag', args=['python'])
+        for url in [detail, other_detail, tag_page]:
+            self.client.get(url)
+
+        self.post.title = 'Renamed post'
+        self.post.save()
+
+        self.assertContains(self.client.get(detail), 'Renamed post')
+        self.assertContains(self.client.get(tag_page), 'Renamed post')
+        with self.assertNumQueries(0):
+            self.client.get(other_detail)
+
+    def test_new_comment_invalidates_post_page(self):
+        detail = reverse('post_detail', args=[self.post.pk])
+        self.client.get(detail)
+        Comment.objects.create(post=self.post, author=self.author, content='Fresh comment text.')
+        self.assertContains(self.client.get(detail), 'Fresh comment text.')
+
+    def test_tag_changes_invalidate_tag_page_and_tag_cloud(self):
+        tag_page = reverse('posts_by_tag', args=['python'])
+        self.client.get(tag_page)
+        self.client.get(reverse('post_list'))
+
+        self.other.tags.add(self.tag)
+        self.assertContains(self.client.get(tag_page), 'Unrelated post')
+
+        Tag.objects.create(name='rust')
+        self.assertContains(self.client.get(reverse('post_list')), 'rust')
+
+
+@override_settings(BLOG_RELATED_REFRESH='sync')
+class RelatedPostTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='alice', password='testpass123')
+        self.tags = {name: Tag.objects.create(name=name) for name in ['python', 'django', 'web', 'rust']}
+
+    def create_post(self, title, *tag_names):
+        post = Post.objects.create(title=title, content='Some content.', author=self.author)
+        with self.captureOnCommitCallbacks(execute=True):
+            post.tags.set([self.tags[name] for name in tag_names])
+        return post
+
+    def test_related_posts_are_ranked_by_tag_overlap(self):
+        base = self.create_post('Base post', 'python', 'django', 'web')
+        close = self.create_post('Close match', 'python', 'django')
+        loose = self.create_post('Loose match', 'python', 'rust')
+        self.create_post('No overlap', 'rust')
+        self.assertEqual(list(base.get_related_posts()), [close, loose])
+        self.assertEqual(list(close.get_related_posts()), [base, loose])
+
+    def test_retagging_refreshes_neighbours(self):
+        base = self.create_post('Base post', 'python')
+        other = self.create_post('Other post', 'python')
+        self.assertEqual(list(base.get_related_posts()), [other])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            other.tags.set([self.tags['rust']])
+        self.assertEqual(list(base.get_related_posts()), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            other.tags.add(self.tags['python'])
+        self.assertEqual(list(base.get_related_posts()), [other])
+
+    def test_deleting_a_post_refreshes_posts_listing_it(self):
+        base = self.create_post('Base post', 'python')
+        gone = self.create_post('Deleted post', 'python', 'django')
+        kept = self.create_post('Kept post', 'python', 'web')
+        with self.captureOnCommitCallbacks(execute=True):
+            gone.delete()
+        self.assertEqual(list(base.get_related_posts()), [kept])
+
+    def test_detail_page_reads_related_posts_with_one_query(self):
+        base = self.create_post('Base post', 'python')
+        self.create_post('Other post', 'python')
+        with self.assertNumQueries(1):
+            self.assertEqual(len(base.get_related_posts()), 1)
+
+
+class RelatedRefreshSchedulingTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='alice', password='testpass123')
+        self.tag = Tag.objects.create(name='python')
+        self.post = Post.objects.create(title='Post', content='Some content.', author=self.author)
+
+    def test_rolled_back_changes_schedule_nothing(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                self.post.tags.add(self.tag)
+                raise RuntimeError
+        self.assertEqual(callbacks, [])
+
+    def test_refresh_runs_in_the_background(self):
+        threads = []
+        with mock.patch.object(related, 'refresh_neighbourhood') as refresh:
+            refresh.side_effect = lambda post_ids, using: threads.append(threading.current_thread())
+            related._enqueue({1}, 'default')
+            related._enqueue({2}, 'default')
+            related.wait()
+        refreshed = set().union(*(call.args[0] for call in refresh.call_args_list))
+        self.assertEqual(refreshed, {1, 2})
+        self.assertNotIn(threading.current_thread(), threads)
+
+
+class PaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='alice', password='testpass123')
+        self.tag = Tag.objects.create(name='python')
+        # Pairs of posts share a published date, so the id has to break ties
+        published = timezone.now()
+        self.posts = []
+        for i in range(12):
+            post = Post.objects.create(
+                title=f'Python post {i}', content='Some content.', author=self.author,
+                published_date=published - timedelta(days=i // 2),
+            )
+            post.tags.add(self.tag)
+            self.posts.append(post)
+        self.newest_first = sorted(self.posts, key=lambda post: (post.published_date, post.pk), reverse=True)
+
+    def walk(self, url, page_size, **params):
+        seen, cursor = [], None
+        while True:
+            response = self.client.get(url, dict(params, after=cursor) if cursor else params)
+            page = response.context['page_obj']
+            self.assertLessEqual(len(page), page_size)
+            seen.extend(page.object_list)
+            if not page.has_next():
+                return seen, page
+            cursor = page.next_cursor
+
+    def test_list_pages_cover_every_post_once_in_order(self):
+        seen, _ = self.walk(reverse('post_list'), 5)
+        self.assertEqual(seen, self.newest_first)
+
+    def test_previous_cursor_returns_the_previous_page(self):
+        first = self.client.get(reverse('post_list')).context['page_obj']
+        second = self.client.get(reverse('post_list'), {'after': first.next_cursor}).context['page_obj']
+        back = self.client.get(reverse('post_list'), {'before': second.previous_cursor}).context['page_obj']
+        self.assertEqual(back.object_list, first.object_list)
+        self.assertFalse(back.has_previous())
+
+    def test_tag_page_uses_denormalized_count(self):
+        seen, page = self.walk(reverse('posts_by_tag', args=['python']), 5)
+        self.assertEqual(seen, self.newest_first)
+        with self.assertNumQueries(0):
+            self.assertEqual(page.paginator.count, 12)
+
+    def test_list_count_is_cached(self):
+        response = self.client.get(reverse('post_list'))
+        self.assertContains(response, '12 posts')
+        with self.assertNumQueries(0):
+            self.assertEqual(response.context['paginator'].count, 12)
+
+    def test_search_results_are_paginated_by_rank(self):
+        ranked = search.ranked_post_ids('python')
+        seen, _ = self.walk(reverse('search_posts'), 10, q='python')
+        self.assertEqual([post.pk for post in seen], ranked)
+        response = self.client.get(reverse('search_posts'), {'q': 'python'})
+        self.assertContains(response, 'Found 12 results')
+
+    def test_deep_pages_cost_the_same_as_the_first(self):
+        first = self.client.get(reverse('post_list'))
+        last_cursor = first.context['page_obj'].next_cursor
+        cache.clear()
+        with CaptureQueriesContext(connection) as first_queries:
+            self.client.get(reverse('post_list'))
+        cache.clear()
+        with CaptureQueriesContext(connection) as deep_queries:
+            self.client.get(reverse('post_list'), {'after': last_cursor})
+        self.assertEqual(len(deep_queries), len(first_queries))
+        self.assertFalse(any('OFFSET' in query['sql'] for query in deep_queries.captured_queries))
+
+    def test_invalid_cursor_is_not_found(self):
+        self.assertEqual(self.client.get(reverse('post_list'), {'after': 'garbage'}).status_code, 404)
+
+
+class TagResolutionTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='alice', password='testpass123')
+        self.existing = Tag.objects.create(name='django')
+
+    def test_resolve_names_reuses_and_creates_in_order(self):
+        tags = Tag.objects.resolve_names(['python', ' django ', '', 'python', 'web'])
+        self.assertEqual([tag.name for tag in tags], ['python', 'django', 'web'])
+        self.assertEqual(tags[1], self.existing)
+        self.assertTrue(all(tag.pk for tag in tags))
+        self.assertEqual(Tag.objects.get(name='web').slug, 'web')
+
+    def test_resolve_names_handles_slug_collisions(self):
+        tags = Tag.objects.resolve_names(['Django', '日本語'])
+        self.assertEqual([tag.name for tag in tags], ['Django', '日本語'])
+        self.assertEqual(tags[0].slug, 'django-2')
+        self.assertEqual(tags[1].slug, 'tag')
+
+    def save_form(self, tags_input, instance=None):
+        form = PostForm(data={
+            'title': 'A post about tags',
+            'content': 'Enough content to pass the fifty character minimum of the form.',
+            'tags_input': tags_input,
+        }, instance=instance or Post(author=self.author))
+        self.assertTrue(form.is_valid(), form.errors)
+        with CaptureQueriesContext(connection) as queries:
+            post = form.save()
+        return post, len(queries)
+
+    def test_form_save_query_count_does_not_grow_with_tags(self):
+        _, few = self.save_form('one, two')
+        _, many = self.save_form(', '.join(f'tag{i}' for i in range(10)))
+        self.assertEqual(many, few)
+
+    def test_form_save_replaces_and_clears_tags(self):
+        post, _ = self.save_form('django, python')
+        self.assertCountEqual(post.tags.values_list('name', flat=True), ['django', 'python'])
+        post, _ = self.save_form('python', instance=post)
+        self.assertCountEqual(post.tags.values_list('name', flat=True), ['python'])
+        post, _ = self.save_form('', instance=post)
+        self.assertFalse(post.tags.exists())
+        self.assertEqual(Tag.objects.get(name='python').post_count, 0)
+
+
+class ImportExportTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='alice', password='testpass123')
+        self.tag = Tag.objects.create(name='django')
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, 'posts.jsonl')
+
+    def write_lines(self, *lines):
+        with open(self.path, 'w', encoding='utf-8') as output:
+            output.write('\n'.join(lines) + '\n')
+
+    def import_posts(self, batch_size=2):
+        stdout, stderr = io.StringIO(), io.StringIO()
+        call_command('import_posts', self.path, batch_size=batch_size, stdout=stdout, stderr=stderr)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_import_creates_posts_tags_and_links(self):
+        records = [
+            {'title': f'Imported post {i}', 'content': 'Imported content.', 'author': 'alice',
+             'published_date': '2024-01-0%dT12:00:00+00:00' % (i + 1), 'tags': ['django', f'topic{i % 2}']}
+            for i in range(5)
+        ]
+        self.write_lines(*(json.dumps(record) for record in records))
+        stdout, _ = self.import_posts()
+        self.assertIn('Imported 5 post(s)', stdout)
+        self.assertEqual(Post.objects.count(), 5)
+        self.assertEqual(Tag.objects.get(name='django').post_count, 5)
+        self.assertEqual(Tag.objects.get(name='topic0').post_count, 3)
+        self.assertEqual(len(search.ranked_post_ids('imported')), 5)
+
+    def test_invalid_records_are_skipped(self):
+        self.write_lines(
+            json.dumps({'title': 'Good post', 'content': 'Content.', 'author': 'alice'}),
+            'not json',
+            json.dumps({'title': 'Orphan post', 'content': 'Content.', 'author': 'nobody'}),
+            json.dumps({'title': 'Bad tags', 'content': 'Content.', 'author': 'alice', 'tags': 'django'}),
+            json.dumps({'title': 'Bad date', 'content': 'Content.', 'author': 'alice',
+                        'published_date': '2024-13-45T00:00:00'}),
+        )
+        stdout, stderr = self.import_posts()
+        self.assertEqual(list(Post.objects.values_list('title', flat=True)), ['Good post'])
+        self.assertIn('Skipped 4 invalid record(s)', stdout)
+        self.assertIn("unknown author 'nobody'", stderr)
+        self.assertIn("invalid published_date '2024-13-45T00:00:00'", stderr)
+
+    def test_export_round_trips_through_import(self):
+        post = Post.objects.create(title='Exported post', content='Exported content.', author=self.author)
+        post.tags.add(self.tag)
+        call_command('export_posts', self.path, stderr=io.StringIO())
+        with open(self.path, encoding='utf-8') as exported:
+            records = [json.loads(line) for line in exported]
+        self.assertEqual(records, [{
+            'title': 'Exported post', 'content': 'Exported content.', 'author': 'alice',
+            'published_date': post.published_date.isoformat(), 'tags': ['django'],
+        }])
+
+        self.import_posts()
+        copy = Post.objects.exclude(pk=post.pk).get()
+        self.assertEqual((copy.title, copy.published_date), (post.title, post.published_date))
+        self.assertEqual(list(copy.tags.all()), [self.tag])
+        self.assertEqual(Tag.objects.get(pk=self.tag.pk).post_count, 2)
+
+    def test_failed_batch_leaves_committed_batches_consistent(self):
+        self.write_lines(*(
+            json.dumps({'title': f'Post {i}', 'content': 'Content.', 'author': 'alice', 'tags': ['django']})
+            for i in range(4)
+        ))
+        index_posts = search.index_posts
+        calls = []
+
+        def fail_second_batch(*args, **kwargs):
+            calls.append(args)
+            if len(calls) == 2:
+                raise RuntimeError('second batch failed')
+            return index_posts(*args, **kwargs)
+
+        with mock.patch.object(search, 'index_posts', fail_second_batch), \
+                self.captureOnCommitCallbacks() as callbacks, self.assertRaises(RuntimeError):
+            self.import_posts(batch_size=2)
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(Tag.objects.get(name='django').post_count, 2)
+        # The cache invalidation of the committed batch only
+        self.assertEqual(len(callbacks), 1)
+
+    def test_import_query_count_does_not_grow_with_batch(self):
+        def run(count):
+            self.write_lines(*(
+                json.dumps({'title': f'Post {i}', 'content': 'Content.', 'author': 'alice', 'tags': [f't{i}']})
+                for i in range(count)
+            ))
+            with CaptureQueriesContext(connection) as queries:
+                self.import_posts(batch_size=100)
+            return len(queries)
+        self.assertEqual(run(3), run(30))
+
+
+class BenchmarkTests(TestCase):
+    def test_seed_and_run_report_every_scenario(self):
+        benchmark.seed(posts=30, tags=5, comments=60, users=3, batch_size=10)
+        self.assertEqual(benchmark.dataset()['posts'], 30)
+        self.assertEqual(benchmark.dataset()['comments'], 60)
+        results = benchmark.run(iterations=2, warmup=0)
+        self.assertIn('comment_create.cold', results)
+        self.assertEqual(results['post_list.warm']['queries'], 0)
+        self.assertGreater(results['post_list.cold']['queries'], 0)
+
+    def test_compare_flags_slower_p95_and_extra_queries(self):
+        old = {'scenarios': {'post_list.cold': {'p95_ms': 10.0, 'queries': 4}}}
+        new = {'scenarios': {'post_list.cold': {'p95_ms': 15.0, 'queries': 5}}}
+        self.assertEqual(benchmark.compare(old, new), [
+            ('post_list.cold', 'p95_ms', 10.0, 15.0, True),
+            ('post_list.cold', 'queries', 4, 5, True),
+        ])
+        self.assertFalse(any(row[-1] for row in benchmark.compare(new, old)))
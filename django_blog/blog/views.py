@@ -5,10 +5,14 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth.views import LoginView, LogoutView
 from django.contrib.auth.models import User
 from django.contrib import messages
+from django.conf import settings
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
-from django.db.models import Q
-from django.db import models
+from django.db.models import Count
+from django.utils.decorators import method_decorator
 from .models import Post, Profile, Comment, Tag
+from . import caching, search
+from .caching import cache_anonymous_page
+from .pagination import KeysetPaginationMixin, KeysetPaginator, RankedPaginator
 from .forms import UserRegisterForm, UserUpdateForm, ProfileUpdateForm, PostForm, CommentForm
 
 # Authentication Views (keep existing)
@@ -56,40 +60,30 @@ def profile(request):
     return render(request, 'blog/profile.html', context)
 
 # Blog Post CRUD Views with Enhanced Search and Tagging
-class PostListView(ListView):
+@method_decorator(cache_anonymous_page(lambda request: [caching.POSTS, caching.TAGS]), name='dispatch')
+class PostListView(KeysetPaginationMixin, ListView):
     model = Post
     template_name = 'blog/post_list.html'
     context_object_name = 'posts'
-    ordering = ['-published_date']
+    ordering = ['-published_date', '-id']
     paginate_by = 5
     
     def get_queryset(self):
-        queryset = super().get_queryset()
+        queryset = super().get_queryset().with_listing_data()
         search_query = self.request.GET.get('search')
         tag_slug = self.request.GET.get('tag')
         author_name = self.request.GET.get('author')
         
-        # Build complex query using Q objects
-        query_filters = Q()
-        
         if search_query:
-            # Search in title, content, author username, and tags
-            query_filters &= (
-                Q(title__icontains=search_query) |
-                Q(content__icontains=search_query) |
-                Q(author__username__icontains=search_query) |
-                Q(tags__name__icontains=search_query)
-            )
+            # Full-text search over title, content, author username, and tags
+            queryset = search.filter_posts(queryset, search_query)
         
         if tag_slug:
             tag = get_object_or_404(Tag, slug=tag_slug)
-            query_filters &= Q(tags__in=[tag])
+            queryset = queryset.filter(tags=tag)
         
         if author_name:
-            query_filters &= Q(author__username__icontains=author_name)
-        
-        if query_filters:
-            queryset = queryset.filter(query_filters).distinct()
+            queryset = queryset.filter(author__username__icontains=author_name)
         
         return queryset
     
@@ -98,46 +92,59 @@ class PostListView(ListView):
         context['search_query'] = self.request.GET.get('search', '')
         context['tag_slug'] = self.request.GET.get('tag', '')
         context['author_name'] = self.request.GET.get('author', '')
-        # Get popular tags (tags with most posts)
-        context['popular_tags'] = Tag.objects.annotate(
-            post_count=models.Count('posts')
-        ).order_by('-post_count')[:10]
+        # Get popular tags (tags with most posts, from the denormalized count)
+        context['popular_tags'] = Tag.objects.popular()[:10]
+        context['tags_version'] = caching.version_stamp(caching.TAGS)
+        context['cache_timeout'] = caching.timeout()
         return context
 
 # New Class-Based View for Posts by Tag
-class PostByTagListView(ListView):
+@method_decorator(
+    cache_anonymous_page(lambda request, tag_slug: [caching.tag_key(tag_slug), caching.TAGS]), name='dispatch'
+)
+class PostByTagListView(KeysetPaginationMixin, ListView):
     model = Post
     template_name = 'blog/posts_by_tag.html'
     context_object_name = 'posts'
-    ordering = ['-published_date']
+    ordering = ['-published_date', '-id']
     paginate_by = 5
     
     def get_queryset(self):
         tag_slug = self.kwargs.get('tag_slug')
         self.tag = get_object_or_404(Tag, slug=tag_slug)
-        return Post.objects.filter(tags__in=[self.tag]).order_by('-published_date')
+        return Post.objects.with_listing_data().filter(tags=self.tag).order_by('-published_date', '-id')
+    
+    def get_total_count(self, queryset):
+        # Denormalized on the tag, no COUNT query needed
+        return self.tag.post_count
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['tag'] = self.tag
-        context['popular_tags'] = Tag.objects.annotate(
-            post_count=models.Count('posts')
-        ).order_by('-post_count')[:10]
+        context['popular_tags'] = Tag.objects.popular()[:10]
+        context['tags_version'] = caching.version_stamp(caching.TAGS)
+        context['cache_timeout'] = caching.timeout()
         return context
 
+@method_decorator(cache_anonymous_page(lambda request, pk: caching.post_dependencies(pk)), name='dispatch')
 class PostDetailView(DetailView):
     model = Post
     template_name = 'blog/post_detail.html'
     context_object_name = 'post'
     
+    def get_queryset(self):
+        return Post.objects.with_detail_data()
+    
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['comments'] = self.object.comments.filter(active=True)
+        context['comments'] = self.object.active_comments
         context['comment_form'] = CommentForm()
-        # Get related posts (posts with same tags)
-        context['related_posts'] = Post.objects.filter(
-            tags__in=list(self.object.tags.all())
-        ).exclude(pk=self.object.pk).distinct()[:5]
+        # Get related posts (precomputed by tag overlap, see blog/related.py)
+        context['related_posts'] = self.object.get_related_posts()
+        # Fragment cache versions for the related posts box and the comment list
+        context['post_version'] = caching.version_stamp(caching.post_key(self.object.pk))
+        context['related_version'] = caching.version_stamp(*caching.post_dependencies(self.object.pk))
+        context['cache_timeout'] = caching.timeout()
         return context
 
 class PostCreateView(LoginRequiredMixin, CreateView):
@@ -236,50 +243,56 @@ class CommentDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
 # Enhanced Tag and Search Views
 def posts_by_tag(request, tag_slug):
     tag = get_object_or_404(Tag, slug=tag_slug)
-    posts = Post.objects.filter(tags__in=[tag]).order_by('-published_date')
+    posts = Post.objects.with_listing_data().filter(tags=tag).order_by('-published_date')
     
     context = {
         'tag': tag,
         'posts': posts,
-        'popular_tags': Tag.objects.annotate(post_count=models.Count('posts')).order_by('-post_count')[:10],
+        'popular_tags': Tag.objects.popular()[:10],
+        'tags_version': caching.version_stamp(caching.TAGS),
+        'cache_timeout': caching.timeout(),
     }
     return render(request, 'blog/posts_by_tag.html', context)
 
+SEARCH_RESULTS_PER_PAGE = 10
+
 def search_posts(request):
     query = request.GET.get('q', '')
     tag_filter = request.GET.get('tag', '')
     author_filter = request.GET.get('author', '')
     
-    posts = Post.objects.all().order_by('-published_date')
-    
-    # Build complex query using Q objects
-    query_filters = Q()
-    
-    if query:
-        query_filters &= (
-            Q(title__icontains=query) |
-            Q(content__icontains=query) |
-            Q(author__username__icontains=query) |
-            Q(tags__name__icontains=query)
-        )
+    posts = Post.objects.with_listing_data()
     
     if tag_filter:
         tag = get_object_or_404(Tag, slug=tag_filter)
-        query_filters &= Q(tags__in=[tag])
+        posts = posts.filter(tags=tag)
     
     if author_filter:
-        query_filters &= Q(author__username__icontains=author_filter)
+        posts = posts.filter(author__username__icontains=author_filter)
     
-    if query_filters:
-        posts = posts.filter(query_filters).distinct()
+    results_capped = False
+    if query and search.is_supported(posts.db):
+        # Ranked full-text search, best matches first, among the posts the tag
+        # and author filters kept; only the current page is loaded
+        ids = search.ranked_post_ids(query, using=posts.db, within=posts)
+        results_capped = len(ids) >= getattr(settings, 'BLOG_SEARCH_MAX_RESULTS', 500)
+        paginator = RankedPaginator(posts, ids, SEARCH_RESULTS_PER_PAGE)
+    else:
+        if query:
+            posts = search.filter_posts(posts, query)
+        paginator = KeysetPaginator(posts, SEARCH_RESULTS_PER_PAGE)
+    page = paginator.page(after=request.GET.get('after'), before=request.GET.get('before'))
     
     context = {
-        'posts': posts,
+        'posts': page.object_list,
+        'page_obj': page,
+        'is_paginated': page.has_other_pages(),
         'query': query,
         'tag_filter': tag_filter,
         'author_filter': author_filter,
-        'results_count': posts.count(),
-        'popular_tags': Tag.objects.annotate(post_count=models.Count('posts')).order_by('-post_count')[:10],
+        'results_count': paginator.count if query else None,
+        'results_capped': results_capped,
+        'popular_tags': Tag.objects.popular()[:10],
         'recent_authors': User.objects.filter(
             posts__isnull=False
         ).distinct().order_by('-date_joined')[:5],
@@ -288,18 +301,26 @@ def search_posts(request):
 
 # Advanced search page
 def advanced_search(request):
-    popular_tags = Tag.objects.annotate(post_count=models.Count('posts')).order_by('-post_count')[:15]
-    recent_authors = User.objects.filter(
-        posts__isnull=False
-    ).distinct().order_by('-date_joined')[:10]
+    popular_tags = Tag.objects.popular()[:15]
+    # Authors with their post count, in one grouped query
+    recent_authors = User.objects.annotate(
+        post_count=Count('posts')
+    ).filter(post_count__gt=0).order_by('-date_joined')[:10]
     
     context = {
         'popular_tags': popular_tags,
         'recent_authors': recent_authors,
+        'tags_version': caching.version_stamp(caching.TAGS),
+        'cache_timeout': caching.timeout(),
     }
     return render(request, 'blog/advanced_search.html', context)
 
 # Function-based view for posts (for compatibility)
 def post_list(request):
-    posts = Post.objects.all().order_by('-published_date')
-    return render(request, 'blog/post_list.html', {'posts': posts})
\ No newline at end of file
+    posts = Post.objects.with_listing_data().order_by('-published_date')
+    context = {
+        'posts': posts,
+        'tags_version': caching.version_stamp(caching.TAGS),
+        'cache_timeout': caching.timeout(),
+    }
+    return render(request, 'blog/post_list.html', context)
\ No newline at end of file
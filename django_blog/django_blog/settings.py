@@ -2,6 +2,8 @@
 Django settings for django_blog project.
 """
 
+import os
+from importlib.util import find_spec
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -104,4 +106,41 @@ USE_TZ = True
 STATIC_URL = '/static/'
 
 # Default primary key field type
-DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
\ No newline at end of file
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Cache (see blog/caching.py). Point BLOG_CACHE_URL at Redis or a Redis-compatible
+# server (e.g. redis://127.0.0.1:6379/1) to share the cache between processes.
+if os.environ.get('BLOG_CACHE_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['BLOG_CACHE_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'django-blog',
+        }
+    }
+
+BLOG_CACHE_TIMEOUT = 300
+
+# Full-text search (see blog/search.py)
+BLOG_SEARCH_MAX_RESULTS = 500
+
+# Number of precomputed related posts kept per post (see blog/related.py)
+BLOG_RELATED_POSTS = 5
+
+# Refresh related posts after a retag in a background 'thread', or 'sync'
+# in the committing request
+BLOG_RELATED_REFRESH = 'thread'
+
+# Per-request query/latency log (see instrumentation/metrics.py), when the
+# shared django-instrumentation package is installed (see its README)
+if find_spec('instrumentation'):
+    INSTALLED_APPS.append('instrumentation')
+    # First, so the other middleware is included in the request time
+    MIDDLEWARE.insert(0, 'instrumentation.middleware.InstrumentationMiddleware')
+INSTRUMENTATION_LOG_FILE = BASE_DIR / 'logs' / 'instrumentation.log'